@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Load test for the HTTP serving mode.
+
+Starts one server.py process in streamable-http (or sse) mode with the
+stub binaries from stub_tools.py first on PATH, then drives it with many
+concurrent local MCP client sessions, each making a series of tool calls.
+Reports connect time, per-call latency percentiles, calls per second and
+errors, plus the server's own server_stats output, as JSON.
+
+Calls use distinct targets by default so every one does real work; with
+--same-target all clients ask for the same scan and exercise call
+coalescing and the result cache instead.
+
+Requires mcp (client side) in the running interpreter.
+
+Usage:
+    python benchmarks/http_load_test.py --clients 20 --calls 10 --output http.json
+    python benchmarks/http_load_test.py --transport sse --latency 0.5 --same-target
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+import stub_tools  # noqa: E402
+from server_benchmark import git_commit  # noqa: E402
+
+# Tool calls served by the stubs (dig +trace always runs the dig binary)
+CALLS = [
+    ("nmap_scan", lambda i: {"target": f"10.1.{i // 256 % 256}.{i % 256}", "kwargs": "-sT -F", "structured": True}),
+    ("dig_query", lambda i: {"target": f"host{i}.bench.test", "kwargs": "+trace"}),
+    ("whatweb_scan", lambda i: {"target": f"web{i}.bench.test"}),
+]
+
+
+def free_port(host):
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(host, port, process, deadline):
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start listening in time")
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def client_factory(transport, url):
+    if transport == "sse":
+        from mcp.client.sse import sse_client
+        return lambda: sse_client(url)
+    from mcp.client.streamable_http import streamablehttp_client
+    return lambda: streamablehttp_client(url)
+
+
+async def run_client(index, args, connect, stats):
+    from mcp import ClientSession
+
+    start = time.perf_counter()
+    async with connect() as streams:
+        read, write = streams[0], streams[1]
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            stats["connect"].append(time.perf_counter() - start)
+            for call in range(args.calls):
+                tool, make_args = CALLS[call % len(CALLS)]
+                number = 0 if args.same_target else index * args.calls + call
+                started = time.perf_counter()
+                try:
+                    result = await session.call_tool(tool, make_args(number))
+                    text = "".join(getattr(item, "text", "") for item in result.content)
+                    failed = result.isError or text.startswith("Error")
+                except Exception:
+                    failed = True
+                stats["latency"].setdefault(tool, []).append(time.perf_counter() - started)
+                stats["errors"] += int(failed)
+
+
+async def fetch_server_stats(connect):
+    from mcp import ClientSession
+
+    async with connect() as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            result = await session.call_tool("server_stats", {})
+            return "".join(getattr(item, "text", "") for item in result.content)
+
+
+async def drive(args, url):
+    connect = client_factory(args.transport, url)
+    stats = {"connect": [], "latency": {}, "errors": 0}
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(run_client(index, args, connect, stats) for index in range(args.clients)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+    failed_clients = [repr(outcome) for outcome in outcomes if isinstance(outcome, BaseException)]
+
+    all_latencies = [sample for samples in stats["latency"].values() for sample in samples]
+    results = {
+        "clients": args.clients,
+        "failed_clients": len(failed_clients),
+        "client_errors": failed_clients[:5],
+        "calls": len(all_latencies),
+        "call_errors": stats["errors"],
+        "seconds": round(elapsed, 3),
+        "calls_per_second": round(len(all_latencies) / elapsed, 1) if elapsed else None,
+    }
+    if stats["connect"]:
+        results["connect_ms"] = {
+            "median": round(statistics.median(stats["connect"]) * 1000, 1),
+            "p95": round(percentile(stats["connect"], 0.95) * 1000, 1),
+        }
+    results["latency_ms"] = {
+        tool: {
+            "calls": len(samples),
+            "median": round(statistics.median(samples) * 1000, 1),
+            "p95": round(percentile(samples, 0.95) * 1000, 1),
+            "max": round(max(samples) * 1000, 1),
+        }
+        for tool, samples in stats["latency"].items()
+    }
+    try:
+        results["server_stats"] = (await fetch_server_stats(connect)).splitlines()
+    except Exception as e:
+        results["server_stats"] = f"unavailable: {e}"
+    return results
+
+
+def run(args):
+    with tempfile.TemporaryDirectory(prefix="recon-http-") as tmp:
+        bin_dir = stub_tools.install(os.path.join(tmp, "bin"))
+        port = args.port or free_port(args.host)
+        env = dict(
+            os.environ,
+            PATH=bin_dir + os.pathsep + os.environ.get("PATH", ""),
+            RECON_STUB_LINES=str(args.lines),
+            RECON_STUB_LATENCY=str(args.latency),
+            RECON_TOOL_MANIFEST=os.path.join(tmp, "manifest.json"),
+            RECON_CACHE_DB=os.path.join(tmp, "cache.sqlite"),
+            RECON_RESULT_DIR=os.path.join(tmp, "results"),
+            RECON_JOB_DB=os.path.join(tmp, "jobs.sqlite"),
+            RECON_INVENTORY_DB=os.path.join(tmp, "inventory.sqlite"),
+        )
+        log_path = os.path.join(tmp, "server.log")
+        with open(log_path, "w") as log:
+            started = time.monotonic()
+            process = subprocess.Popen(
+                [sys.executable, "server.py", "--transport", args.transport,
+                 "--host", args.host, "--port", str(port)],
+                cwd=REPO_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+            try:
+                wait_for_port(args.host, port, process, started + args.startup_timeout)
+                listening = time.monotonic() - started
+                path = "/sse" if args.transport == "sse" else "/mcp"
+                results = asyncio.run(drive(args, f"http://{args.host}:{port}{path}"))
+                results["server_listening_ms"] = round(listening * 1000, 1)
+            except Exception as e:
+                with open(log_path) as server_log:
+                    tail = server_log.read().splitlines()[-10:]
+                results = {"error": str(e), "server_log": tail}
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=["streamable-http", "sse"], default="streamable-http")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="server port (default: a free one)")
+    parser.add_argument("--clients", type=int, default=20, help="concurrent client sessions")
+    parser.add_argument("--calls", type=int, default=10, help="tool calls per client")
+    parser.add_argument("--lines", type=int, default=200, help="records per stub run")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds each stub sleeps before output")
+    parser.add_argument("--same-target", action="store_true", help="every call asks for the same targets")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "http_load",
+        "timestamp": time.time(),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": run(args),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Offline server benchmark against stub recon binaries.
+
+Puts the fake tools from stub_tools.py first on PATH and measures, each
+scenario in a fresh interpreter:
+
+- overhead:    per-call cost of server.tool_wrapper over calling the tool
+               function directly (and of the tool over a bare executor run)
+- throughput:  completed calls per second at several concurrency levels
+- memory:      peak RSS for one call whose tool output is --huge-lines long
+- startup:     cold-start times from startup_benchmark.py
+
+Tool calls go through server.tool_wrappers when mcp is installed and
+through the registry functions otherwise; every result records which mode
+it ran in. Caches, result store, job and inventory databases all live in a
+temporary directory. Results are printed and optionally written as JSON;
+--baseline compares against an earlier JSON report.
+
+Usage:
+    python benchmarks/server_benchmark.py --output server.json
+    python benchmarks/server_benchmark.py --lines 5000 --latency 0.05 --baseline server.json
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+import stub_tools  # noqa: E402
+
+# Tool calls that only run the stub binaries (no network, no native resolvers)
+OVERHEAD_CALL = ("amass_enum", {"target": "bench.example.org"})
+THROUGHPUT_CALL = ("nmap_scan", {"kwargs": "-sT -p 1-1000"})
+MEMORY_CALL = ("amass_enum", {"target": "bench.example.org"})
+
+
+def summarize(samples):
+    return {
+        "runs": len(samples),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(sorted(samples)[max(0, int(len(samples) * 0.95) - 1)] * 1000, 3),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# --- scenarios, run inside a child interpreter -------------------------------
+
+def load_tools():
+    """Callables by tool name: server wrappers if mcp is present, else raw functions"""
+    sys.path.insert(0, REPO_DIR)
+    import tool_registry
+    functions = {name: info["function"] for name, info in tool_registry.ToolRegistry().list_tools().items()}
+    if importlib.util.find_spec("mcp") is None:
+        return "direct", functions, functions
+    import server
+    return "wrapper", dict(server.tool_wrappers), functions
+
+
+def call_args(func, arguments):
+    arguments = dict(arguments)
+    signature = getattr(func, "__signature__", None)
+    if signature is not None and "no_cache" in signature.parameters:
+        # Measure the work, not a cache hit
+        arguments["no_cache"] = True
+    return arguments
+
+
+async def scenario_overhead(config):
+    mode, tools, functions = load_tools()
+    from tools import executor
+    name, arguments = OVERHEAD_CALL
+    runs = config["runs"]
+
+    async def timed(func, args):
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            await func(**args)
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    bare = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await executor.run_command(["amass", "enum", "-d", arguments["target"]])
+        bare.append(time.perf_counter() - start)
+    direct = await timed(functions[name], arguments)
+    results = {"mode": mode, "tool": name, "executor_run": summarize(bare), "tool_direct": summarize(direct)}
+    if mode == "wrapper":
+        wrapped = await timed(tools[name], call_args(tools[name], arguments))
+        results["tool_wrapper"] = summarize(wrapped)
+        results["wrapper_overhead_ms"] = round((statistics.mean(wrapped) - statistics.mean(direct)) * 1000, 3)
+    else:
+        results["tool_wrapper"] = "skipped: mcp not installed"
+    results["tool_overhead_ms"] = round((statistics.mean(direct) - statistics.mean(bare)) * 1000, 3)
+    return results
+
+
+async def scenario_throughput(config):
+    mode, tools, _ = load_tools()
+    name, arguments = THROUGHPUT_CALL
+    func = tools[name]
+    results = {"mode": mode, "tool": name, "levels": {}}
+    for concurrency in config["concurrency"]:
+        calls = max(concurrency, config["calls"])
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one(index):
+            # Distinct targets so no layer can share work between calls
+            args = call_args(func, dict(arguments, target=f"10.0.{index // 256 % 256}.{index % 256}"))
+            async with semaphore:
+                start = time.perf_counter()
+                await func(**args)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(calls)))
+        elapsed = time.perf_counter() - start
+        results["levels"][str(concurrency)] = {
+            "calls": calls,
+            "seconds": round(elapsed, 3),
+            "calls_per_second": round(calls / elapsed, 1),
+            "latency": summarize(latencies),
+        }
+    return results
+
+
+async def scenario_memory(config):
+    mode, tools, _ = load_tools()
+    name, arguments = MEMORY_CALL
+    func = tools[name]
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    result = await func(**call_args(func, arguments))
+    return {
+        "mode": mode,
+        "tool": name,
+        "lines": config["huge_lines"],
+        "seconds": round(time.perf_counter() - start, 3),
+        "result_chars": len(result),
+        "rss_before_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+SCENARIOS = {"overhead": scenario_overhead, "throughput": scenario_throughput, "memory": scenario_memory}
+
+
+def run_child(scenario, config):
+    results = asyncio.run(SCENARIOS[scenario](config))
+    sys.stdout.write(json.dumps(results) + "\n")
+
+
+# --- driver -----------------------------------------------------------------
+
+def run_scenario(scenario, config, env):
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", scenario, "--config", json.dumps(config)],
+        cwd=REPO_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1:] or f"exit code {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(config):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="recon-bench-") as tmp:
+        bin_dir = stub_tools.install(os.path.join(tmp, "bin"))
+        env = dict(
+            os.environ,
+            PATH=bin_dir + os.pathsep + os.environ.get("PATH", ""),
+            RECON_STUB_LINES=str(config["lines"]),
+            RECON_STUB_LATENCY=str(config["latency"]),
+            RECON_TOOL_MANIFEST=os.path.join(tmp, "manifest.json"),
+            RECON_CACHE_DB=os.path.join(tmp, "cache.sqlite"),
+            RECON_RESULT_DIR=os.path.join(tmp, "results"),
+            RECON_JOB_DB=os.path.join(tmp, "jobs.sqlite"),
+            RECON_INVENTORY_DB=os.path.join(tmp, "inventory.sqlite"),
+            RECON_MAX_PROCESSES=str(max(config["concurrency"])),
+            RECON_MAX_NMAP=str(max(config["concurrency"])),
+        )
+        env.pop("RECON_METRICS_FILE", None)
+        # Build the manifest once so scenarios measure steady state, not registry discovery
+        subprocess.run([sys.executable, "-c", "import tool_registry; tool_registry.ToolRegistry()"],
+                       cwd=REPO_DIR, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        for scenario in config["scenarios"]:
+            if scenario == "startup":
+                continue
+            scenario_env = env
+            if scenario == "memory":
+                scenario_env = dict(env, RECON_STUB_LINES=str(config["huge_lines"]), RECON_STUB_LATENCY="0")
+            results[scenario] = run_scenario(scenario, config, scenario_env)
+
+    if "startup" in config["scenarios"]:
+        import startup_benchmark
+        results["startup"] = startup_benchmark.run(config["startup_runs"])
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, path=""):
+    """Relative change of every numeric value present in both reports"""
+    changes = {}
+    if isinstance(current, dict) and isinstance(baseline, dict):
+        for key in current:
+            if key in baseline:
+                changes.update(compare(current[key], baseline[key], f"{path}.{key}" if path else key))
+    elif (isinstance(current, (int, float)) and isinstance(baseline, (int, float))
+          and not isinstance(current, bool) and baseline):
+        changes[path] = f"{(current - baseline) / baseline * 100:+.1f}%"
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="overhead,throughput,memory,startup",
+                        help="comma-separated subset of overhead, throughput, memory, startup")
+    parser.add_argument("--lines", type=int, default=1000, help="records per stub run")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds each stub sleeps before output")
+    parser.add_argument("--huge-lines", type=int, default=1_000_000, help="records for the memory scenario")
+    parser.add_argument("--runs", type=int, default=30, help="sequential calls for the overhead scenario")
+    parser.add_argument("--calls", type=int, default=64, help="calls per throughput level")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated throughput levels")
+    parser.add_argument("--startup-runs", type=int, default=5, help="samples per startup measurement")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, json.loads(args.config))
+        return
+
+    config = {
+        "scenarios": [s.strip() for s in args.scenarios.split(",") if s.strip()],
+        "lines": args.lines,
+        "latency": args.latency,
+        "huge_lines": args.huge_lines,
+        "runs": args.runs,
+        "calls": args.calls,
+        "concurrency": [int(level) for level in args.concurrency.split(",") if level.strip()],
+        "startup_runs": args.startup_runs,
+    }
+    report = {
+        "benchmark": "server",
+        "timestamp": time.time(),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "config": config,
+        "results": run(config),
+    }
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        report["baseline"] = {"commit": baseline.get("commit"),
+                              "changes": compare(report["results"], baseline.get("results", {}))}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Server cold-start benchmark.
+
+Times, in fresh interpreters, how long it takes to build the tool registry
+with no manifest (every tools/*_tool.py imported) and from a warm manifest
+(lazy registration), plus a full `import server` when mcp is installed.
+Results are printed and optionally written as JSON for comparison across
+commits.
+
+Usage:
+    python benchmarks/startup_benchmark.py --runs 10 --output startup.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REGISTRY_SNIPPET = "import tool_registry; tool_registry.ToolRegistry()"
+SERVER_SNIPPET = "import server"
+
+
+def time_snippet(snippet, env):
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=REPO_DIR,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def summarize(samples):
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples) * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def run(runs):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="recon-startup-") as tmp:
+        manifest = os.path.join(tmp, "manifest.json")
+        env = dict(os.environ, RECON_TOOL_MANIFEST=manifest, RECON_CACHE_DB=os.path.join(tmp, "cache.sqlite"))
+
+        cold = []
+        for _ in range(runs):
+            if os.path.exists(manifest):
+                os.unlink(manifest)
+            cold.append(time_snippet(REGISTRY_SNIPPET, env))
+        results["registry_cold"] = summarize(cold)
+
+        warm = [time_snippet(REGISTRY_SNIPPET, env) for _ in range(runs)]
+        results["registry_manifest"] = summarize(warm)
+
+        if importlib.util.find_spec("mcp") is not None:
+            results["server_import"] = summarize([time_snippet(SERVER_SNIPPET, env) for _ in range(runs)])
+        else:
+            results["server_import"] = "skipped: mcp not installed"
+
+    baseline = [time_snippet("pass", dict(os.environ)) for _ in range(runs)]
+    results["interpreter_baseline"] = summarize(baseline)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="samples per measurement")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    report = {"benchmark": "startup", "timestamp": time.time(), "python": sys.version.split()[0], "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
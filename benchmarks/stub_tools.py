@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Fake recon binaries for offline benchmarks.
+
+install(directory) writes nmap, amass, subfinder, dig, nslookup, whois,
+whatweb and sudo executables into a directory meant to go first on PATH.
+Each one prints output shaped like the real tool's, so the parsers and
+formatters do their normal amount of work, without touching the network.
+
+Size and speed come from the environment, so one install serves every
+scenario:
+    RECON_STUB_LINES    records per run (ports, subdomains, answers...), default 1000
+    RECON_STUB_LATENCY  seconds to sleep before writing output, default 0
+"""
+
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STUB_NAMES = ("nmap", "amass", "subfinder", "dig", "nslookup", "whois", "whatweb", "sudo")
+
+LAUNCHER = """#!{python}
+import sys
+sys.path.insert(0, {bench_dir!r})
+import stub_tools
+stub_tools.main({name!r}, sys.argv[1:])
+"""
+
+
+def install(directory: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    for name in STUB_NAMES:
+        path = os.path.join(directory, name)
+        with open(path, "w") as handle:
+            handle.write(LAUNCHER.format(python=sys.executable, bench_dir=BENCH_DIR, name=name))
+        os.chmod(path, 0o755)
+    return directory
+
+
+def _positional(args, takes_value=("-d", "-p", "-oX", "-oN", "-oG", "-i", "-h", "-t", "-type", "--log-json")):
+    values = []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in takes_value:
+            skip = True
+        elif not arg.startswith(("-", "+", "@")):
+            values.append(arg)
+    return values
+
+
+def _option(args, flag, default=None):
+    for index, arg in enumerate(args):
+        if arg == flag and index + 1 < len(args):
+            return args[index + 1]
+        if arg.startswith(flag + "="):
+            return arg.split("=", 1)[1]
+    return default
+
+
+def _ip(index: int) -> str:
+    return f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+
+def nmap(args, lines, out):
+    targets = _positional(args) or ["127.0.0.1"]
+    ports = [(1 + index % 65535, "open" if index % 7 else "filtered") for index in range(lines)]
+    text = [f"Starting Nmap 7.94 ( https://nmap.org ) at {time.strftime('%Y-%m-%d %H:%M')}"]
+    for target in targets:
+        text.extend([f"Nmap scan report for {target}", "Host is up (0.00042s latency).",
+                     "PORT      STATE    SERVICE  VERSION"])
+        text.extend(f"{port}/tcp".ljust(10) + f"{state.ljust(9)}http     nginx 1.25.{port % 10}"
+                    for port, state in ports)
+    text.append(f"Nmap done: {len(targets)} IP address ({len(targets)} host up) scanned in 1.23 seconds")
+    normal = "\n".join(text) + "\n"
+
+    raw_path = _option(args, "-oN")
+    if raw_path:
+        with open(raw_path, "w") as handle:
+            handle.write(normal)
+    if _option(args, "-oX") != "-":
+        out.write(normal)
+        return
+    out.write('<?xml version="1.0"?>\n<nmaprun scanner="nmap" args="nmap" version="7.94">\n')
+    for target in targets:
+        out.write(f'<host><status state="up" reason="syn-ack"/><address addr="{target}" addrtype="ipv4"/>'
+                  f'<hostnames><hostname name="{target}" type="user"/></hostnames><ports>\n')
+        for port, state in ports:
+            out.write(f'<port protocol="tcp" portid="{port}"><state state="{state}" reason="syn-ack"/>'
+                      f'<service name="http" product="nginx" version="1.25.{port % 10}"/></port>\n')
+        out.write("</ports></host>\n")
+    out.write(f'<runstats><finished elapsed="1.23"/><hosts up="{len(targets)}" down="0" '
+              f'total="{len(targets)}"/></runstats>\n</nmaprun>\n')
+
+
+def subdomains(args, lines, out):
+    domain = _option(args, "-d", "example.com")
+    for index in range(lines):
+        out.write(f"host{index}.{['www', 'api', 'dev', 'mail'][index % 4]}.{domain}\n")
+
+
+def dig(args, lines, out):
+    name = (_positional(args) or ["example.com"])[0]
+    out.write(f"; <<>> DiG 9.18.24 <<>> {' '.join(args)}\n;; ->>HEADER<<- opcode: QUERY, status: NOERROR\n"
+              f";; ANSWER SECTION:\n")
+    for index in range(lines):
+        out.write(f"{name}.\t\t300\tIN\tA\t{_ip(index)}\n")
+    out.write(";; Query time: 12 msec\n;; SERVER: 127.0.0.53#53(127.0.0.53) (UDP)\n")
+
+
+def nslookup(args, lines, out):
+    name = (_positional(args) or ["example.com"])[0]
+    out.write("Server:\t\t127.0.0.53\nAddress:\t127.0.0.53#53\n\nNon-authoritative answer:\n")
+    for index in range(lines):
+        out.write(f"Name:\t{name}\nAddress: {_ip(index)}\n")
+
+
+def whois(args, lines, out):
+    domain = (_positional(args) or ["example.com"])[0]
+    out.write(f"Domain Name: {domain.upper()}\nRegistry Domain ID: 2336799_DOMAIN_COM-VRSN\n"
+              "Registrar: Example Registrar, Inc.\nCreation Date: 1995-08-14T04:00:00Z\n"
+              "Registry Expiry Date: 2030-08-13T04:00:00Z\n")
+    for index in range(lines):
+        out.write(f"Name Server: NS{index}.EXAMPLE-DNS.NET\n" if index % 2
+                  else f"Domain Status: clientTransferProhibited https://icann.org/epp#{index}\n")
+    out.write(">>> Last update of whois database: 2026-01-01T00:00:00Z <<<\n")
+
+
+def whatweb(args, lines, out):
+    targets = _positional(args)
+    input_file = _option(args, "-i")
+    if input_file:
+        with open(input_file) as handle:
+            targets.extend(line.strip() for line in handle if line.strip())
+    # One plugin per 10 requested lines keeps per-target records realistic
+    plugins = max(1, lines // 10)
+    if _option(args, "--log-json") == "-":
+        out.write("[\n")
+        for index, target in enumerate(targets):
+            entry = {
+                "target": target if "://" in target else f"http://{target}",
+                "http_status": 200,
+                "plugins": {
+                    "IP": {"string": [_ip(index)]},
+                    "Title": {"string": [f"Welcome to {target}"]},
+                    **{f"Plugin{n}": {"version": [f"{n}.{index % 10}"]} for n in range(plugins)},
+                },
+            }
+            out.write(("," if index else "") + json.dumps(entry) + "\n")
+        out.write("]\n")
+        return
+    for index, target in enumerate(targets):
+        techs = ", ".join(f"Plugin{n}[{n}.{index % 10}]" for n in range(plugins))
+        out.write(f"http://{target} [200 OK] IP[{_ip(index)}], Title[Welcome to {target}], {techs}\n")
+
+
+def main(name, args):
+    if name == "sudo":
+        while args and args[0].startswith("-"):
+            args = args[1:]
+        os.execvp(args[0], args)
+
+    lines = int(os.environ.get("RECON_STUB_LINES", "1000"))
+    latency = float(os.environ.get("RECON_STUB_LATENCY", "0"))
+    if latency > 0:
+        time.sleep(latency)
+    handler = {"amass": subdomains, "subfinder": subdomains}.get(name) or globals()[name]
+    out = sys.stdout
+    handler(args, lines, out)
+    out.flush()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: stub_tools.py DIRECTORY  (then put DIRECTORY first on PATH)")
+    print(install(sys.argv[1]))
@@ -0,0 +1,281 @@
+"""
+Background jobs for long-running tool calls.
+
+A job runs a registered tool outside the MCP request that submitted it.
+Anything the tool reports through tools.progress (amass result lines,
+nmap shard completions) and every line its subprocesses print (through
+the progress output sink) is captured as numbered output lines that can
+be tailed while the job runs; the tool's return value becomes the job
+result. At most max_concurrent jobs run at once, the rest wait queued.
+
+Job rows and output are kept in SQLite so they survive a restart. Jobs
+that were still queued or running when the server went away cannot be
+resumed and come back as "interrupted" (sharded nmap sweeps can simply be
+resubmitted and pick up from their checkpoint).
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from tools import progress
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".cache", "recon-agent", "jobs.sqlite")
+DEFAULT_MAX_JOBS = int(os.environ.get("RECON_MAX_JOBS", "4"))
+# Finished jobs (and their output) older than this are pruned at startup
+JOB_RETENTION_SECONDS = int(os.environ.get("RECON_JOB_RETENTION", str(7 * 24 * 3600)))
+
+MAX_OUTPUT_LINES = 100000
+FLUSH_LINES = 500
+FLUSH_INTERVAL = 1.0
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class JobError(Exception):
+    """Unknown job or an operation that does not apply to its state"""
+
+
+@dataclass
+class Job:
+    id: str
+    tool: str
+    arguments: Dict[str, Any]
+    status: str = "queued"
+    created: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Optional[str] = None
+    output_lines: int = 0
+    dropped_lines: int = 0
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    _pending: List[Tuple[int, str]] = field(default_factory=list, repr=False)
+    _last_flush: float = field(default=0.0, repr=False)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+    def runtime(self) -> Optional[float]:
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    def describe(self) -> str:
+        runtime = self.runtime()
+        timing = f", {runtime:.1f}s" if runtime is not None else ""
+        return (f"{self.id} {self.tool} [{self.status}{timing}] "
+                f"{json.dumps(self.arguments, sort_keys=True)} ({self.output_lines} output lines)")
+
+
+class JobManager:
+    def __init__(self, db_path: Optional[str] = None, max_concurrent: int = DEFAULT_MAX_JOBS):
+        self.db_path = db_path or os.environ.get("RECON_JOB_DB", DEFAULT_DB_PATH)
+        self.max_concurrent = max(1, max_concurrent)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.db_path:
+            try:
+                directory = os.path.dirname(self.db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                db = sqlite3.connect(self.db_path, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs ("
+                    "id TEXT PRIMARY KEY, tool TEXT, arguments TEXT, status TEXT, created REAL, "
+                    "started REAL, finished REAL, result TEXT, output_lines INTEGER, dropped_lines INTEGER)"
+                )
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS job_output ("
+                    "job_id TEXT, seq INTEGER, line TEXT, PRIMARY KEY (job_id, seq))"
+                )
+                now = time.time()
+                # Whatever was in flight died with the previous process
+                db.execute(
+                    "UPDATE jobs SET status = 'interrupted', finished = ? WHERE status IN ('queued', 'running')",
+                    (now,),
+                )
+                stale = [row[0] for row in db.execute(
+                    "SELECT id FROM jobs WHERE finished < ?", (now - JOB_RETENTION_SECONDS,)
+                )]
+                for job_id in stale:
+                    db.execute("DELETE FROM job_output WHERE job_id = ?", (job_id,))
+                    db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                db.commit()
+                self._db = db
+            except sqlite3.Error:
+                # Jobs still work for the lifetime of this process without the store
+                self.db_path = None
+                self._db = None
+        return self._db
+
+    def _save_sync(self, job: Job) -> None:
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return
+            db.execute(
+                "INSERT OR REPLACE INTO jobs (id, tool, arguments, status, created, started, finished, "
+                "result, output_lines, dropped_lines) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.tool, json.dumps(job.arguments, default=str), job.status, job.created,
+                 job.started, job.finished, job.result, job.output_lines, job.dropped_lines),
+            )
+            db.commit()
+
+    def _write_output_sync(self, job_id: str, lines: List[Tuple[int, str]]) -> None:
+        with self._lock:
+            db = self._connect()
+            if db is None or not lines:
+                return
+            db.executemany(
+                "INSERT OR REPLACE INTO job_output (job_id, seq, line) VALUES (?, ?, ?)",
+                [(job_id, seq, line) for seq, line in lines],
+            )
+            db.commit()
+
+    async def _flush(self, job: Job) -> None:
+        # Swap on the loop thread so lines reported meanwhile land in the next batch
+        pending, job._pending = job._pending, []
+        job._last_flush = time.monotonic()
+        if pending:
+            await asyncio.to_thread(self._write_output_sync, job.id, pending)
+
+    def _row_to_job(self, row) -> Job:
+        return Job(
+            id=row[0], tool=row[1], arguments=json.loads(row[2] or "{}"), status=row[3],
+            created=row[4], started=row[5], finished=row[6], result=row[7],
+            output_lines=row[8] or 0, dropped_lines=row[9] or 0,
+        )
+
+    def _load_sync(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT id, tool, arguments, status, created, started, finished, result, output_lines, "
+                "dropped_lines FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    async def get(self, job_id: str) -> Job:
+        job_id = job_id.strip()
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = await asyncio.to_thread(self._load_sync, job_id)
+        if job is None:
+            raise JobError(f"unknown job {job_id}")
+        return job
+
+    async def _record(self, job: Job, message: str, progress_value: float, total: Optional[float]) -> None:
+        """progress.report()/output() sink: every message becomes one output line"""
+        for line in str(message).splitlines() or [""]:
+            if job.output_lines >= MAX_OUTPUT_LINES:
+                job.dropped_lines += 1
+                continue
+            job.output_lines += 1
+            job._pending.append((job.output_lines, line))
+        if len(job._pending) >= FLUSH_LINES or time.monotonic() - job._last_flush >= FLUSH_INTERVAL:
+            await self._flush(job)
+
+    async def _run(self, job: Job, runner: Callable[[], Awaitable[Any]]) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def reporter(message, progress_value, total):
+            await self._record(job, message, progress_value, total)
+
+        async def output(line):
+            await self._record(job, line, 0, None)
+
+        try:
+            async with self._semaphore:
+                job.status = "running"
+                job.started = time.time()
+                await asyncio.to_thread(self._save_sync, job)
+                with progress.bind(reporter), progress.bind_output(output):
+                    result = await runner()
+            job.result = result if isinstance(result, str) else json.dumps(result, default=str)
+            job.status = "failed" if job.result.startswith("Error") else "finished"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.result = f"Error executing job: {str(e)}"
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+            await asyncio.shield(self._flush(job))
+            await asyncio.shield(asyncio.to_thread(self._save_sync, job))
+            if self._db is not None:
+                # Persisted; later lookups read the row
+                self._jobs.pop(job.id, None)
+
+    async def submit(self, tool_name: str, arguments: Dict[str, Any],
+                     runner: Callable[[], Awaitable[Any]]) -> Job:
+        """Queue runner() as a background job and return immediately"""
+        job = Job(id=uuid.uuid4().hex[:12], tool=tool_name, arguments=arguments, created=time.time())
+        self._jobs[job.id] = job
+        await asyncio.to_thread(self._save_sync, job)
+        job.task = asyncio.create_task(self._run(job, runner), name=f"job-{job.id}")
+        return job
+
+    async def cancel(self, job_id: str) -> Job:
+        job = await self.get(job_id)
+        if not job.active or job.task is None:
+            raise JobError(f"job {job.id} is {job.status}, nothing to cancel")
+        job.task.cancel()
+        try:
+            await job.task
+        except asyncio.CancelledError:
+            pass
+        return job
+
+    async def tail(self, job_id: str, since: int = 0, limit: int = 200) -> Tuple[Job, List[Tuple[int, str]]]:
+        """Output lines numbered after `since`, oldest first"""
+        job = await self.get(job_id)
+        if job._pending:
+            await self._flush(job)
+
+        def query():
+            with self._lock:
+                db = self._connect()
+                if db is None:
+                    return []
+                return db.execute(
+                    "SELECT seq, line FROM job_output WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (job.id, since, max(1, limit)),
+                ).fetchall()
+
+        return job, await asyncio.to_thread(query)
+
+    async def list_jobs(self, status: str = "", limit: int = 20) -> List[Job]:
+        limit = max(1, limit)
+
+        def query():
+            with self._lock:
+                db = self._connect()
+                if db is None:
+                    return []
+                sql = ("SELECT id, tool, arguments, status, created, started, finished, result, output_lines, "
+                       "dropped_lines FROM jobs")
+                params: tuple = ()
+                if status:
+                    sql += " WHERE status = ?"
+                    params = (status,)
+                return db.execute(sql + " ORDER BY created DESC LIMIT ?", params + (limit,)).fetchall()
+
+        # Live objects win over their (possibly stale) rows
+        jobs = {job.id: job for job in map(self._row_to_job, await asyncio.to_thread(query))}
+        jobs.update((job.id, job) for job in self._jobs.values() if not status or job.status == status)
+        return sorted(jobs.values(), key=lambda job: job.created, reverse=True)[:limit]
@@ -0,0 +1,262 @@
+"""
+Two-tier result cache for tool calls: a bounded in-memory LRU in front of
+a persistent SQLite store that survives server restarts.
+
+Entries are keyed on the tool name, the normalized target and the parsed
+tool arguments. How long a result may be reused is decided per tool by
+CACHE_POLICIES; tools without a policy (e.g. active nmap scans) are never
+cached. The SQLite tier is capped at max_db_bytes of result text; past
+that, the entries closest to expiry are dropped first.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shlex
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Union
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".cache", "recon-agent", "results.sqlite")
+DEFAULT_MAX_DB_BYTES = int(os.environ.get("RECON_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Fallback TTL for DNS answers that don't show record TTLs (+short, nslookup)
+DNS_DEFAULT_TTL = 300
+DNS_MIN_TTL = 30
+DNS_MAX_TTL = 86400
+
+# Argument names that don't change what a tool returns
+KEY_IGNORED_PARAMS = {"no_cache", "ctx"}
+
+# Arguments whose results depend on the asset inventory's state, not just the inputs
+STATEFUL_PARAMS = ("delta", "skip_recent")
+
+_DNS_RECORD_RE = re.compile(r"^\S+\s+(\d+)\s+IN\s+[A-Z]+\s", re.MULTILINE)
+# Footer the executor-backed tools append, e.g. "[exit code 1 in 0.2s]"
+_FAILED_EXIT_RE = re.compile(r"\[exit code (?!0 in)")
+# subdomain_scan status line of a source that missed its deadline or failed, e.g. "- Amass: timed out (5.0s)"
+_PARTIAL_SOURCE_RE = re.compile(r"^- [\w .]+: (?:timed out|failed)", re.MULTILINE)
+# tools.batch header with failed sections, e.g. "(3 ok, 1 failed)"
+_FAILED_BATCH_RE = re.compile(r"\(\d+ ok, [1-9]\d* failed\)")
+# Pointer to a spilled output stream (tools.output_capture): a fetch_result handle or a spill file path
+_SPILL_POINTER_RE = re.compile(r'fetch_result\(handle="|omitted; full output \(|output truncated to head and tail')
+
+
+def dns_ttl(result: str) -> int:
+    """Follow the smallest record TTL in a dig-style answer, within sane bounds"""
+    ttls = [int(ttl) for ttl in _DNS_RECORD_RE.findall(result)]
+    if not ttls:
+        return DNS_DEFAULT_TTL
+    return max(DNS_MIN_TTL, min(DNS_MAX_TTL, min(ttls)))
+
+
+# Seconds, or a callable that derives the TTL from the result text
+CACHE_POLICIES: Dict[str, Union[int, Callable[[str], int]]] = {
+    "whois_lookup": 6 * 3600,
+    "dig_query": dns_ttl,
+    "nslookup_query": dns_ttl,
+    "subdomain_scan": 3600,
+    "amass_enum": 3600,
+    "whatweb_scan": 1800,
+}
+
+
+def normalize_target(target: Any) -> Any:
+    if isinstance(target, str):
+        return target.strip().lower().rstrip(".")
+    return target
+
+
+def make_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    """Stable cache key from tool name, normalized target and parsed arguments"""
+    normalized = {}
+    for name, value in arguments.items():
+        if name in KEY_IGNORED_PARAMS or name == "timeout" or name.endswith("_timeout"):
+            continue
+        if name == "target":
+            value = normalize_target(value)
+        elif name == "kwargs" and isinstance(value, str):
+            try:
+                value = shlex.split(value)
+            except ValueError:
+                value = value.split()
+        normalized[name] = value
+    payload = json.dumps([tool_name, normalized], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_stateful_call(arguments: Dict[str, Any]) -> bool:
+    """Delta/skip runs differ from call to call and must always execute"""
+    return any(arguments.get(name) for name in STATEFUL_PARAMS)
+
+
+def is_cacheable_result(result: Any) -> bool:
+    """Only complete, successful text results are worth reusing"""
+    if not isinstance(result, str) or not result.strip():
+        return False
+    if result.startswith("Error") or "timeout after" in result:
+        return False
+    if _FAILED_EXIT_RE.search(result):
+        return False
+    # Partial output was limited by a deadline that is not part of the key; a
+    # longer-deadline call must not be served the short one's answer
+    if _PARTIAL_SOURCE_RE.search(result) or _FAILED_BATCH_RE.search(result):
+        return False
+    # The result store and spill directory expire what these point at on their own
+    # schedule, so a cached copy could hand out a dead handle
+    if _SPILL_POINTER_RE.search(result):
+        return False
+    return True
+
+
+class ResultCache:
+    """In-memory LRU backed by SQLite, with hit/miss counters"""
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = 512,
+                 max_db_bytes: int = DEFAULT_MAX_DB_BYTES):
+        self.db_path = db_path or os.environ.get("RECON_CACHE_DB", DEFAULT_DB_PATH)
+        self.max_entries = max_entries
+        self.max_db_bytes = max_db_bytes
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "bypassed": 0,
+            "evicted": 0,
+        }
+
+    def policy_for(self, tool_name: str):
+        return CACHE_POLICIES.get(tool_name)
+
+    def is_enabled_for(self, tool_name: str) -> bool:
+        return self.policy_for(tool_name) is not None
+
+    def ttl_for(self, tool_name: str, result: str) -> int:
+        policy = self.policy_for(tool_name)
+        if policy is None:
+            return 0
+        return int(policy(result) if callable(policy) else policy)
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.db_path:
+            try:
+                directory = os.path.dirname(self.db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, tool TEXT, value TEXT, expires_at REAL, size INTEGER NOT NULL DEFAULT 0)"
+                )
+                columns = {row[1] for row in self._db.execute("PRAGMA table_info(results)")}
+                if "size" not in columns:
+                    # Database written before the size cap existed
+                    self._db.execute("ALTER TABLE results ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                    self._db.execute("UPDATE results SET size = LENGTH(CAST(value AS BLOB))")
+                # Covers both the size total and the eviction order without reading the values
+                self._db.execute("CREATE INDEX IF NOT EXISTS results_expiry ON results (expires_at, size)")
+                self._db.commit()
+            except sqlite3.Error:
+                # Fall back to memory-only caching if the disk tier is unusable
+                self.db_path = None
+                self._db = None
+        return self._db
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _get_sync(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+            db = self._connect()
+            if db is not None:
+                row = db.execute(
+                    "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        self._remember(key, row[0], row[1])
+                        self.stats["disk_hits"] += 1
+                        return row[0]
+                    db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    db.commit()
+
+            self.stats["misses"] += 1
+            return None
+
+    def _set_sync(self, key: str, tool_name: str, value: str, ttl: int) -> None:
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.stats["stores"] += 1
+            db = self._connect()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO results (key, tool, value, expires_at, size) VALUES (?, ?, ?, ?, ?)",
+                    (key, tool_name, value, expires_at, len(value.encode())),
+                )
+                db.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+                self._enforce_db_limit(db)
+                db.commit()
+
+    def _enforce_db_limit(self, db: sqlite3.Connection) -> None:
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_db_bytes:
+            return
+        rows = db.execute("SELECT key, size FROM results ORDER BY expires_at").fetchall()
+        for key, size in rows:
+            if total <= self.max_db_bytes:
+                break
+            db.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            self.stats["evicted"] += 1
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def set(self, key: str, tool_name: str, value: str, ttl: int) -> None:
+        if ttl <= 0:
+            return
+        await asyncio.to_thread(self._set_sync, key, tool_name, value, ttl)
+
+    def record_bypass(self) -> None:
+        self.stats["bypassed"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            db = self._connect()
+            if db is not None:
+                db.execute("DELETE FROM results")
+                db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "db_path": self.db_path,
+            "db_max_bytes": self.max_db_bytes,
+        }
@@ -0,0 +1,340 @@
+"""
+On-disk store for oversized tool outputs.
+
+A big amass/nmap/bulk_resolve result would otherwise go back to the client
+as a single multi-megabyte MCP message. Outputs over a size threshold are
+written here instead; the caller gets a head/tail summary plus a handle,
+and pages or grep slices are read back through mmap on demand.
+
+Handles are derived from the content, so storing the same output twice
+(e.g. a result-cache hit) refreshes the existing entry. Subprocess output
+that already spilled to a file (tools.output_capture) is adopted by
+moving the file in, without loading it into memory. Entries are
+evicted when older than max_age or when the store exceeds max_bytes
+(oldest first).
+"""
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_STORE_DIR = os.path.join(
+    os.environ.get("RECON_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "recon-agent")),
+    "results",
+)
+DEFAULT_THRESHOLD = int(os.environ.get("RECON_RESULT_THRESHOLD", str(64 * 1024)))
+DEFAULT_MAX_AGE = int(os.environ.get("RECON_RESULT_MAX_AGE", str(24 * 3600)))
+DEFAULT_MAX_BYTES = int(os.environ.get("RECON_RESULT_MAX_BYTES", str(512 * 1024 * 1024)))
+
+SUMMARY_HEAD_LINES = 40
+SUMMARY_TAIL_LINES = 10
+MAX_PAGE_SIZE = 2000
+MAX_LINE_CHARS = 2000
+
+_HANDLE_RE = re.compile(r"^[0-9a-f]{16}$")
+
+
+class ResultStoreError(Exception):
+    """Unknown/expired handle or unusable request"""
+
+
+@dataclass
+class StoredResult:
+    handle: str
+    tool: str
+    path: str
+    size: int
+    lines: int
+    created: float
+    _offsets: Optional[array] = field(default=None, repr=False)
+
+    def metadata(self) -> Dict[str, object]:
+        return {"tool": self.tool, "size": self.size, "lines": self.lines, "created": self.created}
+
+
+def count_lines(text: str) -> int:
+    if not text:
+        return 0
+    return text.count("\n") + (0 if text.endswith("\n") else 1)
+
+
+def clip_line(line: str) -> str:
+    if len(line) > MAX_LINE_CHARS:
+        return line[:MAX_LINE_CHARS] + f"... [{len(line) - MAX_LINE_CHARS} chars cut]"
+    return line
+
+
+class ResultStore:
+    def __init__(self, directory: Optional[str] = None, threshold: int = DEFAULT_THRESHOLD,
+                 max_age: int = DEFAULT_MAX_AGE, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or os.environ.get("RECON_RESULT_DIR", DEFAULT_STORE_DIR)
+        self.threshold = threshold
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._entries: Dict[str, StoredResult] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.stats = {"stored": 0, "reused": 0, "evicted": 0, "pages_served": 0}
+
+    def should_store(self, result) -> bool:
+        return isinstance(result, str) and self.threshold > 0 and len(result) > self.threshold
+
+    def _load(self) -> None:
+        """Pick up entries left by a previous server process"""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            handle = name[:-5]
+            try:
+                with open(os.path.join(self.directory, name)) as handle_file:
+                    meta = json.load(handle_file)
+                path = os.path.join(self.directory, f"{handle}.txt")
+                self._entries[handle] = StoredResult(
+                    handle, meta["tool"], path, meta["size"], meta["lines"], meta["created"]
+                )
+            except (OSError, ValueError, KeyError):
+                continue
+
+    def _remove(self, handle: str) -> None:
+        self._entries.pop(handle, None)
+        for suffix in (".txt", ".json"):
+            try:
+                os.unlink(os.path.join(self.directory, handle + suffix))
+            except OSError:
+                pass
+        self.stats["evicted"] += 1
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        cutoff = time.time() - self.max_age
+        for handle in [h for h, entry in self._entries.items() if entry.created < cutoff]:
+            self._remove(handle)
+        total = sum(entry.size for entry in self._entries.values())
+        for entry in sorted(self._entries.values(), key=lambda e: e.created):
+            if total <= self.max_bytes:
+                break
+            if entry.handle == keep:
+                # Never drop the result we are about to hand out a handle for
+                continue
+            total -= entry.size
+            self._remove(entry.handle)
+
+    def _put_sync(self, tool_name: str, text: str) -> StoredResult:
+        data = text.encode("utf-8", errors="replace")
+        handle = hashlib.sha256(tool_name.encode() + b"\0" + data).hexdigest()[:16]
+        now = time.time()
+        with self._lock:
+            self._load()
+            entry = self._entries.get(handle)
+            if entry is not None and os.path.exists(entry.path):
+                entry.created = now
+                os.utime(entry.path)
+                self._write_meta(entry)
+                self.stats["reused"] += 1
+                return entry
+
+            path = os.path.join(self.directory, f"{handle}.txt")
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as out:
+                out.write(data)
+            os.replace(tmp_path, path)
+            entry = StoredResult(handle, tool_name, path, len(data), count_lines(text), now)
+            self._write_meta(entry)
+            self._entries[handle] = entry
+            self.stats["stored"] += 1
+            self._evict(keep=handle)
+            return entry
+
+    def _adopt_sync(self, tool_name: str, source: str) -> StoredResult:
+        digest = hashlib.sha256(tool_name.encode() + b"\0")
+        size = newlines = 0
+        last = b"\n"
+        with open(source, "rb") as handle_file:
+            for block in iter(lambda: handle_file.read(1024 * 1024), b""):
+                digest.update(block)
+                size += len(block)
+                newlines += block.count(b"\n")
+                last = block[-1:]
+        handle = digest.hexdigest()[:16]
+        now = time.time()
+        with self._lock:
+            self._load()
+            entry = self._entries.get(handle)
+            if entry is not None and os.path.exists(entry.path):
+                os.unlink(source)
+                entry.created = now
+                os.utime(entry.path)
+                self._write_meta(entry)
+                self.stats["reused"] += 1
+                return entry
+
+            path = os.path.join(self.directory, f"{handle}.txt")
+            os.makedirs(self.directory, exist_ok=True)
+            shutil.move(source, path)
+            lines = newlines + (0 if last == b"\n" else 1)
+            entry = StoredResult(handle, tool_name, path, size, lines, now)
+            self._write_meta(entry)
+            self._entries[handle] = entry
+            self.stats["stored"] += 1
+            self._evict(keep=handle)
+            return entry
+
+    def _write_meta(self, entry: StoredResult) -> None:
+        with open(os.path.join(self.directory, f"{entry.handle}.json"), "w") as out:
+            json.dump(entry.metadata(), out)
+
+    def _get_entry(self, handle: str) -> StoredResult:
+        handle = handle.strip().lower()
+        if not _HANDLE_RE.match(handle):
+            raise ResultStoreError(f"invalid result handle '{handle}'")
+        with self._lock:
+            self._load()
+            self._evict()
+            entry = self._entries.get(handle)
+        if entry is None or not os.path.exists(entry.path):
+            raise ResultStoreError(f"result {handle} not found (expired or evicted)")
+        return entry
+
+    @staticmethod
+    def _line_offsets(entry: StoredResult, data) -> array:
+        """Byte offset of every line start, computed once per entry"""
+        if entry._offsets is None:
+            offsets = array("Q", [0])
+            position = data.find(b"\n")
+            while position != -1:
+                offsets.append(position + 1)
+                position = data.find(b"\n", position + 1)
+            if offsets[-1] == len(data) and len(offsets) > 1:
+                offsets.pop()
+            entry._offsets = offsets
+        return entry._offsets
+
+    @staticmethod
+    def _decode(raw: bytes) -> str:
+        return clip_line(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+
+    def _page_sync(self, handle: str, page: int, page_size: int) -> Tuple[StoredResult, List[str], int]:
+        entry = self._get_entry(handle)
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        pages = max(1, -(-entry.lines // page_size))
+        if page < 1 or page > pages:
+            raise ResultStoreError(f"page {page} out of range (1-{pages})")
+        with open(entry.path, "rb") as handle_file, \
+                mmap.mmap(handle_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offsets = self._line_offsets(entry, data)
+            first = (page - 1) * page_size
+            last = min(first + page_size, len(offsets))
+            lines = []
+            for index in range(first, last):
+                end = offsets[index + 1] if index + 1 < len(offsets) else len(data)
+                lines.append(self._decode(data[offsets[index]:end]))
+        self.stats["pages_served"] += 1
+        return entry, lines, pages
+
+    def _grep_sync(self, handle: str, pattern: str, context: int, max_matches: int,
+                   ignore_case: bool) -> Tuple[StoredResult, List[str], int]:
+        entry = self._get_entry(handle)
+        try:
+            # MULTILINE so ^ matches at the search position, which is always a line start
+            regex = re.compile(pattern.encode(), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        except re.error as e:
+            raise ResultStoreError(f"invalid pattern: {e}")
+        context = max(0, context)
+        out: List[str] = []
+        matches = 0
+        with open(entry.path, "rb") as handle_file, \
+                mmap.mmap(handle_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offsets = self._line_offsets(entry, data)
+            count = len(offsets)
+            last_printed = -1
+            for index in range(count):
+                end = offsets[index + 1] if index + 1 < count else len(data)
+                # Search the line without its terminator, so $ matches at its end
+                search_end = end
+                while search_end > offsets[index] and data[search_end - 1] in b"\r\n":
+                    search_end -= 1
+                if not regex.search(data, offsets[index], search_end):
+                    continue
+                matches += 1
+                if matches > max_matches:
+                    continue
+                start = max(index - context, last_printed + 1)
+                if context and out and start > last_printed + 1:
+                    out.append("--")
+                for line_no in range(start, min(index + context + 1, count)):
+                    line_end = offsets[line_no + 1] if line_no + 1 < count else len(data)
+                    out.append(f"{line_no + 1}: {self._decode(data[offsets[line_no]:line_end])}")
+                    last_printed = line_no
+        self.stats["pages_served"] += 1
+        return entry, out, matches
+
+    def _read_sync(self, handle: str) -> str:
+        entry = self._get_entry(handle)
+        with open(entry.path, "rb") as handle_file:
+            return handle_file.read().decode("utf-8", errors="replace")
+
+    async def read(self, handle: str) -> str:
+        """Complete text of a stored result, for tools that take a handle as input"""
+        return await asyncio.to_thread(self._read_sync, handle)
+
+    async def put(self, tool_name: str, text: str) -> StoredResult:
+        return await asyncio.to_thread(self._put_sync, tool_name, text)
+
+    async def adopt(self, tool_name: str, path: str) -> StoredResult:
+        """Take ownership of an output file (it is moved into the store)"""
+        return await asyncio.to_thread(self._adopt_sync, tool_name, path)
+
+    async def page(self, handle: str, page: int = 1, page_size: int = 200):
+        return await asyncio.to_thread(self._page_sync, handle, page, page_size)
+
+    async def grep(self, handle: str, pattern: str, context: int = 0, max_matches: int = 200,
+                   ignore_case: bool = False):
+        return await asyncio.to_thread(self._grep_sync, handle, pattern, context, max_matches, ignore_case)
+
+    def summarize(self, entry: StoredResult, text: str) -> str:
+        """Head and tail of the output plus how to fetch the rest"""
+        lines = text.splitlines()
+        if len(lines) > SUMMARY_HEAD_LINES + SUMMARY_TAIL_LINES:
+            omitted = len(lines) - SUMMARY_HEAD_LINES - SUMMARY_TAIL_LINES
+            shown = (lines[:SUMMARY_HEAD_LINES] + [f"... [{omitted} lines omitted] ..."]
+                     + lines[-SUMMARY_TAIL_LINES:])
+        else:
+            shown = lines
+        body = "\n".join(clip_line(line) for line in shown)
+        return (f"{body}\n\n[Output too large to return inline: {entry.lines} lines, {entry.size} bytes. "
+                f"Stored as result {entry.handle}; use fetch_result(handle=\"{entry.handle}\", page=N) "
+                f"or fetch_result(handle=\"{entry.handle}\", pattern=\"regex\") to read it.]")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._load()
+            for handle in list(self._entries):
+                self._remove(handle)
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            self._load()
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "bytes": sum(entry.size for entry in self._entries.values()),
+                "threshold": self.threshold,
+                "directory": self.directory,
+            }
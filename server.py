@@ -3,15 +3,22 @@
 MCP Server for Recon Agent - Uses dynamic tool registration with robust parameter handling
 """
 
+import argparse
 import logging
+import os
 import shlex
 import inspect
 import sys
-import shutil
-import platform
-import subprocess
+import time
 from inspect import Parameter
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+from pydantic import ValidationError, create_model
+
+from result_cache import ResultCache, is_cacheable_result, is_stateful_call, make_key
+from result_store import ResultStore, ResultStoreError
+from job_manager import JobError, JobManager
+from single_flight import SingleFlight, flight_key
+from tools import binaries, metrics, output_capture, progress
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,6 +30,35 @@ logger = logging.getLogger("recon-agent")
 
 mcp = FastMCP("recon-agent")
 
+result_cache = ResultCache()
+
+result_store = ResultStore()
+
+job_manager = JobManager()
+
+single_flight = SingleFlight()
+
+# Set RECON_COALESCE=0 to give every call its own run even if an identical one is in flight
+COALESCE_CALLS = os.environ.get("RECON_COALESCE", "1") != "0"
+
+
+async def publish_spilled_output(label, path):
+    """Move a subprocess output that spilled to disk into the result store"""
+    entry = await result_store.adopt(label, path)
+    return f'fetch_result(handle="{entry.handle}")', entry.path
+
+# Huge subprocess outputs come back truncated, pointing at a fetch_result handle for the rest
+output_capture.set_publisher(publish_spilled_output)
+
+# Tools that accept a handle (bulk_resolve) read stored results through this
+output_capture.set_reader(result_store.read)
+
+# Registered wrappers by tool name, so background jobs run the same pipeline as direct calls
+tool_wrappers = {}
+
+# Argument models built from each wrapper's signature, so jobs get the same validation as direct calls
+tool_argument_models = {}
+
 
 try:
     from tool_registry import ToolRegistry
@@ -65,20 +101,55 @@ def parse_kwargs_string(kwargs_string):
         logger.error(f"Error parsing kwargs string: {kwargs_string}, error: {e}")
         return {}
 
+def parse_args(argv=None):
+    """Transport selection; the environment provides the defaults"""
+    parser = argparse.ArgumentParser(description="Recon Agent MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "streamable-http", "sse"],
+        default=os.environ.get("RECON_TRANSPORT", "stdio"),
+        help="stdio serves one client; streamable-http and sse serve many clients from one process",
+    )
+    parser.add_argument("--host", default=os.environ.get("RECON_HOST", "127.0.0.1"),
+                        help="bind address for the HTTP transports")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("RECON_PORT", "8000")),
+                        help="port for the HTTP transports")
+    return parser.parse_args(argv)
+
 def check_tool_installation(tool_name):
-    """Check if a tool is installed and available in PATH"""
+    """Check if a tool is installed, via the cached binary index"""
     try:
-        if platform.system() == "Windows":
-            result = subprocess.run(
-                ["where", tool_name],
-                capture_output=True, text=True, check=False
-            )
-            return result.returncode == 0
-        else:
-            return shutil.which(tool_name) is not None
+        return binaries.is_installed(tool_name)
     except Exception:
         return False
 
+async def store_if_large(tool_name, result):
+    """Oversized output stays server-side; the client gets a summary and a handle"""
+    if result_store.should_store(result):
+        try:
+            entry = await result_store.put(tool_name, result)
+            return result_store.summarize(entry, result)
+        except Exception as e:
+            logger.warning(f"Failed to store large result for {tool_name}: {e}")
+    return result
+
+def make_progress_reporter(ctx):
+    """Adapt an MCP request context into a tools.progress reporter"""
+    if ctx is None:
+        return None
+
+    async def reporter(message, progress_value, total):
+        await ctx.report_progress(progress_value, total, message)
+
+    return reporter
+
+
+# Resolve every required binary once; later checks only stat the cached path
+binaries.index.warm(
+    info["function"]._required_tool
+    for info in tool_registry.list_tools().values()
+    if hasattr(info["function"], "_required_tool")
+)
 
 for tool_name, tool_info in tool_registry.list_tools().items():
     tool_func = tool_info["function"]
@@ -111,23 +182,82 @@ for tool_name, tool_info in tool_registry.list_tools().items():
             )
         params.append(param)
 
+    # Cacheable tools get a switch to skip cached results and force a fresh run
+    if result_cache.is_enabled_for(tool_name):
+        params.append(
+            Parameter("no_cache", Parameter.KEYWORD_ONLY, default=False, annotation=bool)
+        )
+
+    # FastMCP injects the request context here; it is used for progress notifications
+    params.append(Parameter("ctx", Parameter.KEYWORD_ONLY, default=None, annotation=Context))
+
     signature = inspect.Signature(params)
+    argument_model = create_model(
+        f"{tool_name}_arguments",
+        **{
+            param.name: (param.annotation, ... if param.default is Parameter.empty else param.default)
+            for param in params
+            if param.name != "ctx"
+        },
+    )
 
     # Fix late-binding issue by capturing values in default args
-    async def tool_wrapper(*args, __tool_func=tool_func, __signature=signature, **kwargs):
+    async def tool_wrapper(*args, __tool_func=tool_func, __tool_name=tool_name, __signature=signature, **kwargs):
         bound = __signature.bind(*args, **kwargs)
         bound.apply_defaults()
+        ctx = bound.arguments.pop("ctx", None)
+        no_cache = bound.arguments.pop("no_cache", False)
 
         if hasattr(__tool_func, "_required_tool") and not check_tool_installation(
             __tool_func._required_tool
         ):
             return f"Error: {__tool_func._required_tool} is not installed. Please install it to use this tool."
 
-        try:
-            return await __tool_func(**bound.arguments)
-        except Exception as e:
-            logger.error(f"Error executing tool {tool_name}: {e}", exc_info=True)
-            return f"Error executing tool: {str(e)}"
+        cache_key = None
+        if result_cache.is_enabled_for(__tool_name) and not is_stateful_call(bound.arguments):
+            cache_key = make_key(__tool_name, bound.arguments)
+            if no_cache:
+                result_cache.record_bypass()
+            else:
+                cached = await result_cache.get(cache_key)
+                if cached is not None:
+                    metrics.record_cache_hit(__tool_name)
+                    # Same content, same handle: this refreshes the stored entry
+                    return await store_if_large(__tool_name, cached)
+
+        async def execute():
+            try:
+                with metrics.track(__tool_name):
+                    result = await __tool_func(**bound.arguments)
+            except Exception as e:
+                logger.error(f"Error executing tool {__tool_name}: {e}", exc_info=True)
+                metrics.record_error(__tool_name)
+                return f"Error executing tool: {str(e)}"
+            if isinstance(result, str) and result.startswith("Error"):
+                metrics.record_error(__tool_name)
+
+            if cache_key is not None and is_cacheable_result(result):
+                try:
+                    await result_cache.set(
+                        cache_key, __tool_name, result, result_cache.ttl_for(__tool_name, result)
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to cache result for {__tool_name}: {e}")
+            return await store_if_large(__tool_name, result)
+
+        # Background jobs bind their own reporter before calling in
+        reporter = make_progress_reporter(ctx) if ctx is not None else progress.current()
+        if not COALESCE_CALLS:
+            with progress.bind(reporter):
+                return await execute()
+
+        # Identical calls already running are joined instead of started again
+        key = flight_key(__tool_name, bound.arguments)
+        joined, started = single_flight.is_running(key), time.monotonic()
+        result = await single_flight.run(key, execute, reporter, progress.current_output())
+        if joined:
+            metrics.record_coalesced(__tool_name, time.monotonic() - started)
+        return result
 
     # Set the function attributes
     tool_wrapper.__signature__ = signature
@@ -137,9 +267,118 @@ for tool_name, tool_info in tool_registry.list_tools().items():
 
     # Register the tool with MCP
     mcp.tool()(tool_wrapper)
+    tool_wrappers[tool_name] = tool_wrapper
+    tool_argument_models[tool_name] = argument_model
     logger.info(f"Registered tool: {tool_name}")
 
+
+@mcp.tool()
+async def cache_stats() -> str:
+    """Show result cache hit/miss counters and occupancy."""
+    stats = result_cache.get_stats()
+    return "\n".join(f"{key}: {value}" for key, value in stats.items())
+
+
+@mcp.tool()
+async def server_stats() -> str:
+    """Show per-tool call counts, errors, latency percentiles, queue wait vs run time, subprocess counts, output volume, exit codes and cache hits."""
+    return metrics.snapshot()
+
+
+@mcp.tool()
+async def fetch_result(
+    handle: str,
+    page: int = 1,
+    page_size: int = 200,
+    pattern: str = "",
+    context: int = 0,
+    max_matches: int = 200,
+    ignore_case: bool = False,
+) -> str:
+    """Read a stored oversized tool result by handle: one page of lines, or the lines matching a regex pattern (with optional context lines)."""
+    try:
+        if pattern:
+            entry, lines, matches = await result_store.grep(handle, pattern, context, max_matches, ignore_case)
+            shown = min(matches, max_matches)
+            header = f"Result {entry.handle} ({entry.tool}): {matches} lines match /{pattern}/"
+            if matches > shown:
+                header += f", showing first {shown}"
+            return header + ":\n\n" + "\n".join(lines)
+        entry, lines, pages = await result_store.page(handle, page, page_size)
+        return (f"Result {entry.handle} ({entry.tool}) page {page}/{pages}, "
+                f"{entry.lines} lines, {entry.size} bytes:\n\n" + "\n".join(lines))
+    except ResultStoreError as e:
+        return f"Error: {str(e)}"
+
+
+@mcp.tool()
+async def submit_job(tool: str, arguments: dict = None) -> str:
+    """Run any registered tool as a background job and return its job id immediately. arguments holds the tool's parameters, e.g. {"target": "example.com", "kwargs": "--passive"}."""
+    wrapper = tool_wrappers.get(tool)
+    if wrapper is None:
+        return f"Error: unknown tool '{tool}'. Available: {', '.join(sorted(tool_wrappers))}"
+    arguments = dict(arguments or {})
+    arguments.pop("ctx", None)
+    try:
+        wrapper.__signature__.bind(**arguments)
+        # Same lax coercion a direct call gets ("30" -> 30)
+        validated = tool_argument_models[tool].model_validate(arguments)
+    except (TypeError, ValidationError) as e:
+        return f"Error: invalid arguments for {tool}: {str(e)}"
+    arguments = {name: getattr(validated, name) for name in arguments}
+
+    job = await job_manager.submit(tool, arguments, lambda: wrapper(**arguments))
+    return (f"Submitted job {job.id} ({tool}). Poll with tail_job(job_id=\"{job.id}\"), "
+            f"get the output with job_result(job_id=\"{job.id}\") or stop it with cancel_job.")
+
+
+@mcp.tool()
+async def list_jobs(status: str = "", limit: int = 20) -> str:
+    """List background jobs, newest first, optionally filtered by status (queued, running, finished, failed, cancelled, interrupted)."""
+    jobs = await job_manager.list_jobs(status, limit)
+    if not jobs:
+        return "No jobs."
+    return "\n".join(job.describe() for job in jobs)
+
+
+@mcp.tool()
+async def tail_job(job_id: str, since: int = 0, limit: int = 200) -> str:
+    """Show a job's output lines numbered after `since`; pass the returned cursor back to read only new lines."""
+    try:
+        job, lines = await job_manager.tail(job_id, since, limit)
+    except JobError as e:
+        return f"Error: {str(e)}"
+    cursor = lines[-1][0] if lines else since
+    body = "\n".join(line for _, line in lines)
+    return f"{job.describe()}\n[cursor {cursor}]\n\n{body}".rstrip()
+
+
+@mcp.tool()
+async def cancel_job(job_id: str) -> str:
+    """Cancel a queued or running job; its subprocesses are killed."""
+    try:
+        job = await job_manager.cancel(job_id)
+    except JobError as e:
+        return f"Error: {str(e)}"
+    return f"Cancelled job {job.id} ({job.tool})"
+
+
+@mcp.tool()
+async def job_result(job_id: str) -> str:
+    """Return the final result of a finished job, or its current status if it is still running."""
+    try:
+        job = await job_manager.get(job_id)
+    except JobError as e:
+        return f"Error: {str(e)}"
+    if job.result is None:
+        if job.active:
+            return f"Job {job.describe()} has no result yet."
+        return f"Job {job.describe()} ended without a result."
+    return job.result
+
+
 if __name__ == "__main__":
+    args = parse_args()
     logger.info("Starting MCP server for Recon Agent...")
     available_tools = list(tool_registry.list_tools().keys())
     logger.info(f"Available tools: {', '.join(available_tools)}")
@@ -155,4 +394,14 @@ if __name__ == "__main__":
         logger.warning(f"The following tools are not installed: {', '.join(missing_tools)}")
         logger.warning("Some functionality may be limited")
 
-    mcp.run(transport="stdio")
+    # Optional Prometheus text file, rewritten every RECON_METRICS_INTERVAL seconds
+    if metrics.start_exporter():
+        logger.info("Writing metrics to the file set in RECON_METRICS_FILE")
+
+    if args.transport != "stdio":
+        # One long-lived process: every client shares the caches, process limits and jobs
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        path = mcp.settings.streamable_http_path if args.transport == "streamable-http" else mcp.settings.sse_path
+        logger.info(f"Serving {args.transport} on http://{args.host}:{args.port}{path}")
+    mcp.run(transport=args.transport)
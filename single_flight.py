@@ -0,0 +1,105 @@
+"""
+Coalescing of identical in-flight tool calls.
+
+When several clients ask for the same scan (same tool, normalized target
+and arguments) while one is already running, they all await that one run
+and get its result instead of each starting a subprocess. The shared run
+lives in its own task: cancelling one waiter only detaches that waiter,
+and the run is cancelled (killing its process group) only once no waiter
+is left. Progress and subprocess output from the shared run are
+forwarded to every waiter that is listening.
+"""
+
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from result_cache import make_key
+from tools import progress
+
+
+def flight_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    """Cache key plus the timeouts, which the cache ignores but a shared run must honour"""
+    timeouts = {name: value for name, value in arguments.items() if name == "timeout" or name.endswith("_timeout")}
+    payload = make_key(tool_name, arguments) + json.dumps(timeouts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass
+class _Flight:
+    task: Optional[asyncio.Task] = None
+    waiters: int = 0
+    reporters: List[progress.Reporter] = field(default_factory=list)
+    outputs: List[progress.OutputSink] = field(default_factory=list)
+
+    async def broadcast(self, message: str, progress_value: float, total: Optional[float]) -> None:
+        for reporter in list(self.reporters):
+            try:
+                await reporter(message, progress_value, total)
+            except Exception:
+                pass
+
+    async def broadcast_output(self, line: str) -> None:
+        for sink in list(self.outputs):
+            try:
+                await sink(line)
+            except Exception:
+                pass
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.stats = {"executed": 0, "coalesced": 0}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def is_running(self, key: str) -> bool:
+        return key in self._flights
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]],
+                  reporter: Optional[progress.Reporter] = None,
+                  output: Optional[progress.OutputSink] = None) -> Any:
+        """
+        Await factory() once per key at a time; concurrent callers with the
+        same key share the result (or exception) of the running call.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.create_task(self._lead(key, flight, factory))
+            self.stats["executed"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        flight.waiters += 1
+        if reporter is not None:
+            flight.reporters.append(reporter)
+        if output is not None:
+            flight.outputs.append(output)
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if reporter is not None:
+                flight.reporters.remove(reporter)
+            if output is not None:
+                flight.outputs.remove(output)
+            if flight.waiters == 0 and not flight.task.done():
+                # Last interested caller went away: stop the shared run
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    async def _lead(self, key: str, flight: _Flight, factory: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            # Output is only copied when the leader is tailed (a background job), so
+            # direct calls skip line splitting; jobs joining such a run get progress only
+            output = flight.broadcast_output if flight.outputs else None
+            with progress.bind(flight.broadcast), progress.bind_output(output):
+                return await factory()
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
@@ -0,0 +1,16 @@
+from pathlib import Path
+
+import pytest
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture
+def read_fixture():
+    """Contents of a file under tests/fixtures (bytes for .bin, text otherwise)"""
+
+    def read(name: str):
+        path = FIXTURE_DIR / name
+        return path.read_bytes() if path.suffix == ".bin" else path.read_text()
+
+    return read
@@ -0,0 +1,19 @@
+from tools import batch
+
+
+def test_merge_targets_orders_and_deduplicates():
+    assert batch.merge_targets(" a.example.com ", ["b.example.com", "a.example.com", "", None, " "]) == [
+        "a.example.com", "b.example.com",
+    ]
+    assert batch.merge_targets("", None) == []
+
+
+async def test_run_batch_keeps_input_order_and_counts_failures():
+    async def run_one(name):
+        if name == "bad":
+            raise RuntimeError("boom")
+        return f"ok {name}"
+
+    text = await batch.run_batch("Scan", ["b", "bad", "a"], run_one, concurrency=2)
+
+    assert text == "Scan for 3 targets (2 ok, 1 failed):\n\n=== b ===\nok b\n\n=== bad ===\nError: boom\n\n=== a ===\nok a"
@@ -0,0 +1,106 @@
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from tools import ct_client
+
+
+class CTLogFixture:
+    """Minimal HTTP/1.1 server answering crt.sh queries with chunked JSON"""
+
+    def __init__(self):
+        self.routes = {}
+        self.queries = []
+        self.server = None
+        self.url = ""
+
+    def route(self, query, chunks, status=200):
+        """chunks are strings written as separate HTTP chunks; an Event pauses the body until set"""
+        self.routes[query] = (status, chunks)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.url = f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    async def handle(self, reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        target = request.split(b" ")[1].decode()
+        query = parse_qs(urlsplit(target).query)
+        self.queries.append(query)
+        status, chunks = self.routes.get(query["q"][0], (404, ["not found"]))
+        writer.write(
+            f"HTTP/1.1 {status} Fixture\r\nContent-Type: application/json\r\n"
+            "Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n".encode()
+        )
+        for chunk in chunks:
+            if isinstance(chunk, asyncio.Event):
+                await chunk.wait()
+                continue
+            data = chunk.encode()
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+
+@pytest.fixture
+async def ct_log():
+    fixture = CTLogFixture()
+    await fixture.start()
+    yield fixture
+    fixture.server.close()
+    await fixture.server.wait_closed()
+    # The pooled client is bound to this test's event loop
+    await ct_client.aclose()
+
+
+async def collect(domain, url):
+    return [name async for name in ct_client.iter_names(domain, base_url=url)]
+
+
+async def test_names_from_chunked_json(ct_log, read_fixture):
+    text = read_fixture("crtsh.json")
+    ct_log.route("%.example.com", [text[start:start + 11] for start in range(0, len(text), 11)])
+
+    names = await collect("example.com", ct_log.url)
+
+    assert names == [
+        "example.com", "www.example.com", "*.api.example.com", "mail.example.com", "MAIL.example.com.",
+    ]
+    assert ct_log.queries == [{"q": ["%.example.com"], "output": ["json"]}]
+
+
+async def test_names_arrive_before_the_body_ends(ct_log, read_fixture):
+    entries = json.loads(read_fixture("crtsh.json"))
+    release = asyncio.Event()
+    ct_log.route("%.example.com", ["[" + json.dumps(entries[0]) + ",", release, json.dumps(entries[1]) + "]"])
+
+    names = ct_client.iter_names("example.com", base_url=ct_log.url)
+    # The server holds the rest of the array until the first names were read
+    assert [await anext(names), await anext(names)] == ["example.com", "www.example.com"]
+    release.set()
+    assert [name async for name in names] == ["*.api.example.com"]
+
+
+async def test_empty_array(ct_log):
+    ct_log.route("%.nothing.test", ["[", "]"])
+
+    assert await collect("nothing.test", ct_log.url) == []
+
+
+async def test_http_error(ct_log):
+    ct_log.route("%.example.com", ["<html>busy</html>"], status=503)
+
+    with pytest.raises(ct_client.CTLogError, match="HTTP 503"):
+        await collect("example.com", ct_log.url)
+
+
+async def test_truncated_array(ct_log, read_fixture):
+    text = read_fixture("crtsh.json")
+    ct_log.route("%.example.com", [text[:len(text) // 2]])
+
+    with pytest.raises(ct_client.CTLogError, match="Truncated JSON array"):
+        await collect("example.com", ct_log.url)
@@ -0,0 +1,260 @@
+import asyncio
+import socket
+import struct
+
+import pytest
+
+from tools import dns_client
+
+
+def test_parse_response_sections(read_fixture):
+    response = dns_client.parse_response(read_fixture("dns_mx_response.bin"))
+
+    assert response.id == 0x1A2B
+    assert response.status == "NOERROR"
+    assert response.authoritative and not response.truncated
+    assert response.question == ("example.com.", "MX")
+    assert [r.to_text() for r in response.answers] == [
+        "example.com.\t3600\tIN\tMX\t10 mail.example.com.",
+        "example.com.\t3600\tIN\tMX\t20 backup.example.com.",
+    ]
+    assert [(r.rtype, r.data) for r in response.authority] == [("NS", "ns1.example.com.")]
+
+
+def test_parse_response_follows_pointers_into_rdata_and_skips_opt(read_fixture):
+    response = dns_client.parse_response(read_fixture("dns_mx_response.bin"))
+
+    # Owner names point into the first MX's rdata; the EDNS OPT record is dropped
+    assert [(r.name, r.rtype, r.data) for r in response.additional] == [
+        ("mail.example.com.", "A", "192.0.2.25"),
+        ("mail.example.com.", "AAAA", "2001:db8::25"),
+    ]
+
+
+@pytest.mark.parametrize("cut", [5, 20, 40, -3])
+def test_parse_response_rejects_truncated_messages(read_fixture, cut):
+    message = read_fixture("dns_mx_response.bin")
+    with pytest.raises(dns_client.DNSError):
+        dns_client.parse_response(message[:cut])
+
+
+def test_read_name_rejects_pointer_loop():
+    message = struct.pack("!HHHHHH", 1, 0, 1, 0, 0, 0) + b"\xc0\x0c"
+    with pytest.raises(dns_client.DNSError, match="loop"):
+        dns_client.read_name(message, 12)
+
+
+def test_build_query_round_trips():
+    response = dns_client.parse_response(dns_client.build_query("www.example.com", "AAAA", 77))
+
+    assert response.id == 77
+    assert response.question == ("www.example.com.", "AAAA")
+    assert response.answers == []
+
+
+def test_encode_name_rejects_long_labels():
+    with pytest.raises(dns_client.DNSError):
+        dns_client.encode_name("a" * 64 + ".example.com")
+
+
+def test_truncated_question_raises_dns_error():
+    message = struct.pack("!HHHHHH", 1, 0x8180, 1, 0, 0, 0) + dns_client.encode_name("example.com") + b"\x00\x0f"
+
+    with pytest.raises(dns_client.DNSError, match="question"):
+        dns_client.parse_response(message)
+
+
+@pytest.mark.parametrize("rtype, rdata", [(15, b"\x00"), (6, b"\x00\x00" + b"\x00" * 10)])
+def test_short_rdata_raises_dns_error(rtype, rdata):
+    message = (
+        struct.pack("!HHHHHH", 1, 0x8180, 1, 1, 0, 0)
+        + dns_client.encode_name("example.com") + struct.pack("!HH", rtype, 1)
+        + b"\xc0\x0c" + struct.pack("!HHIH", rtype, 1, 60, len(rdata)) + rdata
+    )
+
+    with pytest.raises(dns_client.DNSError, match="Truncated"):
+        dns_client.parse_response(message)
+
+
+def reply(query: bytes, addresses=(), truncated=False, rdata=None) -> bytes:
+    """Answer a query from a stub server with A records (or raw rdata of the asked type)"""
+    query_id, _ = struct.unpack("!HH", query[:4])
+    name, offset = dns_client.read_name(query, 12)
+    question = query[12:offset + 4]
+    qtype = struct.unpack("!H", query[offset:offset + 2])[0]
+    records = [(1, socket.inet_aton(address)) for address in addresses]
+    if rdata is not None:
+        records.append((qtype, rdata))
+    flags = 0x8180 | (0x0200 if truncated else 0)
+    message = struct.pack("!HHHHHH", query_id, flags, 1, len(records), 0, 0) + question
+    for rtype, data in records:
+        message += b"\xc0\x0c" + struct.pack("!HHIH", rtype, 1, 60, len(data)) + data
+    return message
+
+
+class DNSStub:
+    """
+    UDP and TCP DNS server on one local port. answer(name, attempt, query) returns the
+    reply bytes for a UDP datagram, or None to drop it; tcp_answer does the same over TCP.
+    """
+
+    def __init__(self, answer, tcp_answer=None, hold=0):
+        self.answer = answer
+        self.tcp_answer = tcp_answer
+        self.hold = hold
+        self.attempts = {}
+        self.clients = set()
+        self.tcp_queries = []
+        self._held = []
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        stub = self
+
+        class Protocol(asyncio.DatagramProtocol):
+            def connection_made(self, transport):
+                stub.transport = transport
+
+            def datagram_received(self, data, addr):
+                stub.on_datagram(data, addr)
+
+        await loop.create_datagram_endpoint(Protocol, local_addr=("127.0.0.1", 0))
+        self.port = self.transport.get_extra_info("sockname")[1]
+        self.tcp = await asyncio.start_server(self.on_tcp, "127.0.0.1", self.port)
+
+    def on_datagram(self, data, addr):
+        name = dns_client.read_name(data, 12)[0]
+        self.attempts[name] = self.attempts.get(name, 0) + 1
+        self.clients.add(addr)
+        answer = self.answer(name, self.attempts[name], data)
+        if answer is None:
+            return
+        self._held.append((answer, addr))
+        if len(self._held) >= self.hold:
+            # Release held answers in reverse order of arrival
+            for held, client in reversed(self._held):
+                self.transport.sendto(held, client)
+            self._held.clear()
+
+    async def on_tcp(self, reader, writer):
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+        query = await reader.readexactly(length)
+        self.tcp_queries.append(dns_client.read_name(query, 12)[0])
+        answer = self.tcp_answer(query)
+        writer.write(struct.pack("!H", len(answer)) + answer)
+        await writer.drain()
+        writer.close()
+
+    def close(self):
+        self.transport.close()
+        self.tcp.close()
+
+
+@pytest.fixture
+async def dns_stub():
+    stubs = []
+
+    async def start(answer, tcp_answer=None, hold=0):
+        stub = DNSStub(answer, tcp_answer, hold)
+        await stub.start()
+        stubs.append(stub)
+        return stub
+
+    yield start
+    for stub in stubs:
+        stub.close()
+
+
+async def test_pipelined_queries_share_one_socket(dns_stub):
+    names = [f"host{i}.example.test" for i in range(20)]
+    stub = await dns_stub(lambda name, attempt, query: reply(query, [f"192.0.2.{name[4:-14]}"]), hold=len(names))
+    resolver = dns_client.DNSResolver("127.0.0.1", stub.port, timeout=2.0, retries=0)
+
+    # The stub answers only once all 20 are in flight, and then in reverse order
+    responses = await asyncio.gather(*(resolver.query(name) for name in names))
+    resolver.close()
+
+    assert [r.answers[0].data for r in responses] == [f"192.0.2.{i}" for i in range(20)]
+    assert len(stub.clients) == 1
+
+
+async def test_lost_and_malformed_datagrams_are_retried(dns_stub):
+    def answer(name, attempt, query):
+        if attempt == 1:
+            return None
+        if attempt == 2:
+            return reply(query, rdata=b"\x00")  # MX rdata cut short
+        return reply(query, rdata=b"\x00\x0a\x04mail\xc0\x0c")
+
+    stub = await dns_stub(answer)
+    callback_errors = []
+    asyncio.get_running_loop().set_exception_handler(lambda loop, context: callback_errors.append(context))
+    resolver = dns_client.DNSResolver("127.0.0.1", stub.port, timeout=0.2, retries=3)
+    response = await resolver.query("example.test", "MX")
+    resolver.close()
+
+    assert [r.data for r in response.answers] == ["10 mail.example.test."]
+    assert stub.attempts == {"example.test.": 3}
+    # The malformed reply is dropped inside the protocol callback, not raised out of it
+    assert callback_errors == []
+
+
+async def test_timeout_after_all_attempts(dns_stub):
+    stub = await dns_stub(lambda name, attempt, query: None)
+    resolver = dns_client.DNSResolver("127.0.0.1", stub.port, timeout=0.1, retries=2)
+
+    with pytest.raises(dns_client.DNSTimeout, match="after 3 attempts"):
+        await resolver.query("example.test")
+    resolver.close()
+    assert stub.attempts == {"example.test.": 3}
+
+
+async def test_answer_for_another_question_is_ignored(dns_stub):
+    def answer(name, attempt, query):
+        if attempt == 1:
+            spoofed = query[:12] + dns_client.encode_name("evil.test") + query[-4:]
+            return reply(spoofed, ["203.0.113.66"])
+        return reply(query, ["192.0.2.1"])
+
+    stub = await dns_stub(answer)
+    resolver = dns_client.DNSResolver("127.0.0.1", stub.port, timeout=0.2, retries=1)
+    response = await resolver.query("example.test")
+    resolver.close()
+
+    assert [r.data for r in response.answers] == ["192.0.2.1"]
+
+
+async def test_truncated_answer_is_retried_over_tcp(dns_stub):
+    addresses = [f"192.0.2.{i}" for i in range(1, 41)]
+    stub = await dns_stub(
+        lambda name, attempt, query: reply(query, addresses[:2], truncated=True),
+        tcp_answer=lambda query: reply(query, addresses),
+    )
+    response = await dns_client.resolve("big.example.test", server="127.0.0.1", port=stub.port)
+
+    assert response.via_tcp and not response.truncated
+    assert [r.data for r in response.answers] == addresses
+    assert stub.tcp_queries == ["big.example.test."]
+    assert response.server == f"127.0.0.1#{stub.port}"
+
+
+async def test_tcp_fallback_errors_are_dns_errors(dns_stub):
+    stub = await dns_stub(lambda name, attempt, query: reply(query, truncated=True))
+    stub.tcp.close()
+    await stub.tcp.wait_closed()
+    resolver = dns_client.DNSResolver("127.0.0.1", stub.port, timeout=0.5, retries=0)
+
+    with pytest.raises(dns_client.DNSError, match="TCP"):
+        await resolver.query("example.test")
+    resolver.close()
+
+
+def test_get_resolver_is_per_event_loop():
+    async def pair():
+        return dns_client.get_resolver("127.0.0.1", 5353), dns_client.get_resolver("127.0.0.1", 5353)
+
+    first, again = asyncio.run(pair())
+    second, _ = asyncio.run(pair())
+
+    assert first is again
+    assert first is not second
@@ -0,0 +1,156 @@
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+from tools import executor
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX-only")
+
+# Prints the pid of a background grandchild, then waits on it
+GRANDCHILD = "sleep 30 & echo $!; wait"
+
+
+def alive(pid: int) -> bool:
+    """True while pid runs; an unreaped zombie (no init reaping in containers) counts as gone"""
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+async def wait_gone(pid: int, within: float = 2.0) -> bool:
+    deadline = time.monotonic() + within
+    while alive(pid):
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.02)
+    return True
+
+
+async def test_exit_code_and_both_streams():
+    result = await executor.run_command(["sh", "-c", "echo out; echo err >&2; exit 3"])
+
+    assert (result.returncode, result.ok, result.timed_out) == (3, False, False)
+    assert result.stdout == b"out\n" and result.stderr == b"err\n"
+    assert (result.stdout_bytes, result.stderr_bytes) == (4, 4)
+    assert result.summary().startswith("exit code 3 in ")
+
+
+async def test_stdin_and_line_callbacks():
+    lines = []
+
+    async def collect(line):
+        lines.append(line)
+
+    result = await executor.run_command(["sh", "-c", "cat; printf tail"], stdin_data=b"a\r\nb\n",
+                                        on_stdout_line=collect)
+
+    assert lines == ["a", "b", "tail"]
+    assert result.ok and result.stdout == b""
+
+
+async def test_wall_clock_timeout_kills_grandchildren():
+    result = await executor.run_command(["sh", "-c", GRANDCHILD], timeout=0.3)
+
+    assert result.timed_out and result.timeout_reason == "wall-clock"
+    assert not result.ok and result.duration < 3
+    assert "process group killed" in result.summary()
+    assert await wait_gone(int(result.stdout.split()[0]))
+
+
+async def test_idle_timeout_fires_only_when_output_stops():
+    result = await executor.run_command(
+        ["sh", "-c", "for i in 1 2 3 4 5; do echo $i; sleep 0.1; done; sleep 30"], idle_timeout=0.5,
+    )
+
+    assert result.timed_out and result.timeout_reason == "idle-output"
+    assert result.stdout.split() == [b"1", b"2", b"3", b"4", b"5"]
+
+
+async def test_sigterm_is_escalated_to_sigkill(monkeypatch):
+    monkeypatch.setattr(executor, "KILL_GRACE_PERIOD", 0.3)
+    start = time.monotonic()
+
+    # Ignored signals stay ignored across exec, so every process in the group shrugs off SIGTERM
+    result = await executor.run_command(
+        ["sh", "-c", "trap '' TERM; sleep 30 & echo $!; while :; do sleep 0.05; done"], timeout=0.3,
+    )
+
+    assert result.timed_out and result.returncode == -signal.SIGKILL
+    assert time.monotonic() - start < 3
+    assert await wait_gone(int(result.stdout.split()[0]))
+
+
+async def test_cancellation_kills_the_process_group():
+    started = asyncio.Event()
+    pids = []
+
+    def on_line(line):
+        pids.append(int(line))
+        started.set()
+
+    task = asyncio.create_task(executor.run_command(["sh", "-c", GRANDCHILD], on_stdout_line=on_line))
+    await asyncio.wait_for(started.wait(), 5)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert await wait_gone(pids[0])
+
+
+async def test_closing_a_stream_early_kills_the_process():
+    stream = executor.stream_command(["sh", "-c", GRANDCHILD])
+    kind, line = await anext(stream)
+    await stream.aclose()
+
+    assert kind == "stdout"
+    assert await wait_gone(int(line))
+
+
+async def test_stream_command_ends_with_exit_result():
+    items = [item async for item in executor.stream_command(["sh", "-c", "echo a; echo b >&2; exit 1"])]
+
+    assert sorted(items[:-1]) == [("stderr", "b"), ("stdout", "a")]
+    kind, result = items[-1]
+    assert kind == "exit" and result.returncode == 1
+
+
+async def test_kill_gives_up_when_sigkill_is_refused(monkeypatch):
+    monkeypatch.setattr(executor, "KILL_GRACE_PERIOD", 0.05)
+
+    def refuse(*args):
+        raise PermissionError
+
+    class RootChild:
+        """A sudo'd child this user may not signal, and which never exits"""
+        pid = 999999
+        returncode = None
+        send_signal = staticmethod(refuse)
+
+        async def wait(self):
+            await asyncio.sleep(3600)
+
+    monkeypatch.setattr(os, "killpg", refuse)
+
+    await asyncio.wait_for(executor.kill_process_group(RootChild()), 2)
+
+
+def test_binary_name_looks_through_sudo():
+    assert executor.binary_name(["sudo", "-n", "/usr/bin/nmap", "-sV"]) == "nmap"
+    assert executor.binary_name(["amass", "enum"]) == "amass"
+
+
+async def test_line_without_newline_is_delivered_in_bounded_pieces():
+    pieces = []
+    result = await executor.run_command(
+        ["sh", "-c", "head -c 300000 /dev/zero | tr '\\000' a; echo; echo end"], on_stdout_line=pieces.append,
+    )
+
+    assert result.ok
+    assert pieces[-1] == "end"
+    assert "".join(pieces[:-1]) == "a" * 300000
+    assert len(pieces) > 2 and max(len(piece) for piece in pieces) <= 2 * executor.READ_CHUNK_SIZE
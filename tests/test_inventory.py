@@ -0,0 +1,172 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+from tools import inventory, whatweb_tool
+from tools.inventory import Inventory
+
+
+@pytest.fixture
+def inv(tmp_path, monkeypatch):
+    store = Inventory(db_path=str(tmp_path / "inventory.sqlite"))
+    # The module-level helpers the tools call go to this store too
+    monkeypatch.setattr(inventory, "_inventory", store)
+    return store
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(inventory.time, "time", lambda: now[0])
+    return now
+
+
+def test_first_run_reports_everything_new(inv):
+    delta = inv.observe("port", "10.0.0.1", {"443/tcp": "https nginx", "22/tcp": "ssh"}, context="-sV")
+
+    assert delta.previous_run is None
+    assert delta.new == [("22/tcp", "ssh"), ("443/tcp", "https nginx")]
+    assert (delta.changed, delta.gone, delta.unchanged) == ([], [], 0)
+    assert "last run never): 2 new, 0 changed, 0 gone, 0 unchanged" in delta.format()
+
+
+def test_repeat_run_reports_new_changed_and_gone(inv, clock):
+    inv.observe("port", "10.0.0.1", {"22/tcp": "ssh", "80/tcp": "http", "443/tcp": "https"}, context="-sV")
+    first = clock[0]
+    clock[0] += 3600
+
+    delta = inv.observe("port", "10.0.0.1", {"22/tcp": "ssh", "443/tcp": "https nginx", "8080/tcp": ""},
+                        context="-sV")
+
+    assert delta.previous_run == first
+    assert delta.new == [("8080/tcp", "")]
+    assert delta.changed == [("443/tcp", "https", "https nginx")]
+    assert delta.gone == [("80/tcp", "http", first)]
+    assert delta.unchanged == 1
+    assert inv.assets("port", "10.0.0.1") == [("22/tcp", "ssh"), ("443/tcp", "https nginx"), ("8080/tcp", "")]
+
+
+def test_unchanged_repeat_run_is_empty(inv):
+    inv.observe("domain", "example.com", {"www.example.com": "", "mail.example.com": ""})
+    delta = inv.observe("domain", "example.com", {"mail.example.com": "", "www.example.com": ""})
+
+    assert delta.empty and delta.unchanged == 2
+
+
+def test_gone_asset_that_returns_is_new_again(inv):
+    inv.observe("domain", "example.com", {"old.example.com": ""})
+    inv.observe("domain", "example.com", {})
+
+    assert inv.observe("domain", "example.com", {"old.example.com": ""}).new == [("old.example.com", "")]
+
+
+def test_only_complete_runs_with_the_same_context_mark_assets_gone(inv):
+    inv.observe("port", "10.0.0.1", {"22/tcp": "ssh"}, context="-p 22")
+    inv.observe("port", "10.0.0.1", {"443/tcp": "https"}, context="-p 443")
+
+    # A different profile did not look at port 22
+    assert inv.observe("port", "10.0.0.1", {}, context="-p 443").gone[0][0] == "443/tcp"
+    assert inv.observe("port", "10.0.0.1", {}, context="-p 22", complete=False).gone == []
+    assert inv.assets("port", "10.0.0.1") == [("22/tcp", "ssh")]
+
+
+def test_scopes_are_independent(inv):
+    inv.observe("port", "10.0.0.1", {"22/tcp": "ssh"})
+
+    assert inv.observe("port", "10.0.0.2", {}).gone == []
+    assert inv.observe("technology", "10.0.0.1", {"nginx": "1.25"}).new == [("nginx", "1.25")]
+
+
+def test_recently_observed(inv, clock):
+    inv.observe("technology", "a.example.com", {"nginx": ""}, context="-a 3")
+    clock[0] += 100
+    inv.observe("technology", "b.example.com", {"nginx": ""}, context="-a 3")
+    clock[0] += 100
+
+    scopes = ["a.example.com", "b.example.com", "c.example.com"]
+    assert inv.recently_observed("technology", scopes, 150, context="-a 3") == {"b.example.com"}
+    assert inv.recently_observed("technology", scopes, 300, context="-a 3") == {"a.example.com", "b.example.com"}
+    assert inv.recently_observed("technology", scopes, 300) == set()
+    assert inv.recently_observed("port", scopes, 300, context="-a 3") == set()
+    assert inv.recently_observed("technology", scopes, 0, context="-a 3") == set()
+
+
+def test_recently_observed_handles_more_scopes_than_one_query(inv):
+    scopes = [f"host{number}.example.com" for number in range(1200)]
+    for scope in scopes[::100]:
+        inv.observe("technology", scope, {})
+
+    assert inv.recently_observed("technology", scopes, 60) == set(scopes[::100])
+
+
+def test_format_deltas(inv):
+    inv.observe("domain", "example.com", {"www.example.com": ""})
+    deltas = [
+        inv.observe("domain", "example.com", {"www.example.com": ""}),
+        inv.observe("domain", "example.org", {"www.example.org": ""}),
+    ]
+
+    text = inventory.format_deltas(deltas)
+    assert text.startswith("Delta since last run: 1 of 2 scopes changed\nexample.org (subdomains, last run never)")
+    assert "  + www.example.org" in text
+    assert inventory.format_deltas(deltas + [None]) == "Asset inventory unavailable; delta could not be computed"
+
+
+# whatweb stand-in: answers each host in the -i file with the technologies in $FAKE_TECH
+FAKE_WHATWEB = """#!{python}
+import json, os, sys
+hosts = open(sys.argv[sys.argv.index("-i") + 1]).read().split()
+with open({log!r}, "a") as log:
+    log.write(json.dumps(hosts) + "\\n")
+tech = json.loads(os.environ["FAKE_TECH"])
+print(json.dumps([
+    {{"target": host if "://" in host else "http://" + host, "http_status": 200,
+      "plugins": {{name: {{"version": [version]}} for name, version in tech.items()}}}}
+    for host in hosts
+]))
+"""
+
+
+@pytest.fixture
+def whatweb(tmp_path, monkeypatch, inv):
+    log = tmp_path / "whatweb.log"
+    script = tmp_path / "whatweb"
+    script.write_text(FAKE_WHATWEB.format(python=sys.executable, log=str(log)))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    async def scan(tech, **kwargs):
+        monkeypatch.setenv("FAKE_TECH", json.dumps(tech))
+        return await whatweb_tool.register_tool()["whatweb_scan"](**kwargs)
+
+    scan.runs = lambda: [json.loads(line) for line in log.read_text().splitlines()]
+    return scan
+
+
+async def test_delta_mode_first_and_repeat_run(whatweb):
+    hosts = ["a.example.com", "b.example.com"]
+
+    first = await whatweb({"nginx": "1.24"}, targets=hosts, delta=True)
+    repeat = await whatweb({"nginx": "1.24"}, targets=hosts, delta=True)
+    upgraded = await whatweb({"nginx": "1.25", "PHP": "8.3"}, target="a.example.com", delta=True)
+
+    assert "Delta since last run: 2 of 2 scopes changed" in first
+    assert "a.example.com (technologies, last run never): 1 new" in first
+    assert "Delta since last run: 0 of 2 scopes changed" in repeat
+    assert "1 new, 1 changed, 0 gone, 0 unchanged" in upgraded
+    assert "  + PHP  8.3" in upgraded and "  ~ nginx  1.24 -> 1.25" in upgraded
+
+
+async def test_skip_recent(whatweb):
+    # A single target only goes through the recorded batch path with delta or skip_recent
+    await whatweb({"nginx": "1.24"}, target="a.example.com", skip_recent=3600)
+
+    partly = await whatweb({"nginx": "1.24"}, targets=["a.example.com", "https://b.example.com/"], skip_recent=3600)
+    everything = await whatweb({}, targets=["a.example.com", "b.example.com"], skip_recent=3600)
+
+    assert whatweb.runs() == [["a.example.com"], ["https://b.example.com/"]]
+    assert "Skipped (1 fingerprinted in the last 3600s): a.example.com" in partly
+    assert everything.endswith("all 2 targets were fingerprinted in the last 3600s; nothing to scan")
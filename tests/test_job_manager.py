@@ -0,0 +1,176 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+import job_manager
+from job_manager import JobError, JobManager
+from tools import progress
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.sqlite")
+
+
+@pytest.fixture
+def manager(db_path):
+    return JobManager(db_path=db_path, max_concurrent=1)
+
+
+def blocked(release: asyncio.Event, result="done"):
+    """Runner that prints a line, then waits for release"""
+
+    async def runner():
+        await progress.output("started")
+        await release.wait()
+        return result
+
+    return runner
+
+
+async def test_output_lines_are_numbered_and_tailed(manager):
+    async def runner():
+        await progress.report("shard 1/2 done", 1, 2)
+        await progress.output("line a\nline b")
+        await progress.output("line c")
+        return "all done"
+
+    job = await manager.submit("nmap_scan", {"target": "10.0.0.0/24"}, runner)
+    await job.task
+
+    _, lines = await manager.tail(job.id)
+    assert lines == [(1, "shard 1/2 done"), (2, "line a"), (3, "line b"), (4, "line c")]
+    _, lines = await manager.tail(job.id, since=2, limit=1)
+    assert lines == [(3, "line b")]
+    _, lines = await manager.tail(job.id, since=4)
+    assert lines == []
+
+
+async def test_running_job_can_be_tailed(manager):
+    release = asyncio.Event()
+    job = await manager.submit("amass_enum", {}, blocked(release))
+    while job.status != "running" or not job.output_lines:
+        await asyncio.sleep(0.01)
+
+    # Lines not yet flushed to disk are flushed by the tail itself
+    live, lines = await manager.tail(job.id)
+    assert live.status == "running" and lines == [(1, "started")]
+
+    release.set()
+    await job.task
+
+
+async def test_results_and_failures(manager):
+    async def returns(value):
+        return value
+
+    async def raises():
+        raise RuntimeError("boom")
+
+    finished = await manager.submit("dig_query", {}, lambda: returns("answer"))
+    failed = await manager.submit("dig_query", {}, lambda: returns("Error: dig is not installed"))
+    crashed = await manager.submit("dig_query", {}, raises)
+    structured = await manager.submit("dig_query", {}, lambda: returns({"hosts": 2}))
+    await asyncio.gather(finished.task, failed.task, crashed.task, structured.task)
+
+    results = [await manager.get(job.id) for job in (finished, failed, crashed, structured)]
+    assert [(job.status, job.result) for job in results] == [
+        ("finished", "answer"),
+        ("failed", "Error: dig is not installed"),
+        ("failed", "Error executing job: boom"),
+        ("finished", '{"hosts": 2}'),
+    ]
+    assert all(job.finished >= job.started >= job.created for job in results)
+
+
+async def test_jobs_beyond_the_limit_wait_queued(manager):
+    release = asyncio.Event()
+    first = await manager.submit("nmap_scan", {}, blocked(release, "first"))
+    second = await manager.submit("nmap_scan", {}, blocked(release, "second"))
+    await asyncio.sleep(0.05)
+
+    assert (first.status, second.status) == ("running", "queued")
+    release.set()
+    await asyncio.gather(first.task, second.task)
+    assert [(await manager.get(job.id)).result for job in (first, second)] == ["first", "second"]
+
+
+async def test_cancellation(manager):
+    release = asyncio.Event()
+    running = await manager.submit("nmap_scan", {}, blocked(release))
+    queued = await manager.submit("nmap_scan", {}, blocked(release))
+    await asyncio.sleep(0.05)
+
+    assert (await manager.cancel(queued.id)).status == "cancelled"
+    assert (await manager.cancel(running.id)).status == "cancelled"
+
+    stored = await JobManager(db_path=manager.db_path).get(running.id)
+    assert stored.status == "cancelled" and stored.result is None and stored.output_lines == 1
+    with pytest.raises(JobError, match="is cancelled, nothing to cancel"):
+        await manager.cancel(running.id)
+    with pytest.raises(JobError, match="unknown job nope"):
+        await manager.cancel("nope")
+
+
+async def test_restart_marks_active_jobs_interrupted(manager, db_path):
+    release = asyncio.Event()
+    running = await manager.submit("nmap_scan", {"target": "10.0.0.0/16"}, blocked(release))
+    queued = await manager.submit("nmap_scan", {}, blocked(release))
+    await asyncio.sleep(0.05)
+
+    # A new process opening the same store
+    restarted = JobManager(db_path=db_path)
+
+    jobs = {job.id: job for job in await restarted.list_jobs()}
+    assert jobs[running.id].status == "interrupted" and jobs[running.id].arguments == {"target": "10.0.0.0/16"}
+    assert jobs[queued.id].status == "interrupted"
+    assert [job.id for job in await restarted.list_jobs(status="interrupted")] == [queued.id, running.id]
+    assert jobs[running.id].finished is not None and not jobs[running.id].active
+    with pytest.raises(JobError):
+        await restarted.cancel(running.id)
+
+    release.set()
+    await asyncio.gather(running.task, queued.task)
+
+
+async def test_old_finished_jobs_are_pruned(manager, db_path, monkeypatch):
+    job = await manager.submit("dig_query", {}, lambda: asyncio.sleep(0, "ok"))
+    await job.task
+    monkeypatch.setattr(job_manager, "JOB_RETENTION_SECONDS", 60)
+    monkeypatch.setattr(job_manager.time, "time", lambda: job.finished + 61)
+
+    restarted = JobManager(db_path=db_path)
+
+    with pytest.raises(JobError):
+        await restarted.get(job.id)
+    db = sqlite3.connect(db_path)
+    assert db.execute("SELECT COUNT(*) FROM job_output").fetchone() == (0,)
+
+
+async def test_output_beyond_the_limit_is_counted_not_stored(manager, monkeypatch):
+    monkeypatch.setattr(job_manager, "MAX_OUTPUT_LINES", 2)
+
+    async def chatty():
+        for number in range(5):
+            await progress.output(f"line {number}")
+        return "ok"
+
+    job = await manager.submit("amass_enum", {}, chatty)
+    await job.task
+
+    job, lines = await manager.tail(job.id)
+    assert (job.output_lines, job.dropped_lines) == (2, 3)
+    assert lines == [(1, "line 0"), (2, "line 1")]
+
+
+async def test_list_jobs_newest_first(manager):
+    jobs = []
+    for tool in ("dig_query", "whois_lookup", "nmap_scan"):
+        jobs.append(await manager.submit(tool, {}, lambda: asyncio.sleep(0, "ok")))
+        await jobs[-1].task
+        time.sleep(0.001)
+
+    assert [job.tool for job in await manager.list_jobs(limit=2)] == ["nmap_scan", "whois_lookup"]
+    assert await manager.list_jobs(status="failed") == []
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from tools.json_stream import JSONArrayStream, JSONStreamError
+
+
+@pytest.mark.parametrize("chunk", [1, 13, 4096])
+def test_elements_across_chunk_boundaries(read_fixture, chunk):
+    text = read_fixture("crtsh.json")
+    stream = JSONArrayStream()
+    items = []
+    for start in range(0, len(text), chunk):
+        items.extend(stream.feed(text[start:start + chunk]))
+    stream.close()
+
+    assert items == json.loads(text)
+
+
+def test_buffer_holds_only_the_unparsed_tail(read_fixture):
+    text = read_fixture("crtsh.json")
+    stream = JSONArrayStream()
+    split = text.index("},") + 10
+    assert len(stream.feed(text[:split])) == 1
+    assert len(stream._buffer) < 10
+
+
+def test_empty_array():
+    stream = JSONArrayStream()
+
+    assert stream.feed(" [ ] ") == []
+    stream.close()
+
+
+def test_rejects_non_array():
+    with pytest.raises(JSONStreamError):
+        JSONArrayStream().feed('{"name_value": "example.com"}')
+
+
+def test_close_reports_truncation(read_fixture):
+    text = read_fixture("crtsh.json")
+    stream = JSONArrayStream()
+    stream.feed(text[:len(text) // 2])
+
+    with pytest.raises(JSONStreamError, match="Truncated"):
+        stream.close()
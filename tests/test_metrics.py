@@ -0,0 +1,148 @@
+import re
+
+import pytest
+
+from tools import metrics
+from tools.metrics import Histogram
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_histogram_buckets_are_inclusive_upper_bounds():
+    histogram = Histogram(buckets=(1, 5))
+    for value in (0.5, 1, 1.5, 5, 7):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 2, 1]
+    assert (histogram.count, histogram.sum, histogram.mean) == (5, 15.0, 3.0)
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(1, 5))
+    assert histogram.quantile(0.5) is None and histogram.mean == 0.0
+
+    for value in (0.5, 0.5, 0.5, 2, 10):
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == 1
+    assert histogram.quantile(0.8) == 5
+    assert histogram.quantile(0.95) == float("inf")
+
+
+def test_track_counts_calls_and_in_flight():
+    with metrics.track("dig_query"):
+        assert metrics._tools["dig_query"].in_flight == 1
+        with pytest.raises(RuntimeError):
+            with metrics.track("dig_query"):
+                assert metrics._tools["dig_query"].in_flight == 2
+                raise RuntimeError
+
+    stats = metrics._tools["dig_query"]
+    assert (stats.calls, stats.in_flight, stats.latency.count) == (2, 0, 2)
+
+
+def test_subprocesses_are_attributed_to_the_running_tool():
+    with metrics.track("nmap_scan"):
+        metrics.record_process("nmap", 0.2, 3.0, 0, 100, 5, False)
+        metrics.record_process("nmap", 0.0, 60.0, None, 10, 0, True)
+    metrics.record_process("nmap", 0.0, 1.0, 1, 0, 0, False)
+
+    tool, binary = metrics._tools["nmap_scan"], metrics._binaries["nmap"]
+    assert (tool.processes, tool.timeouts, tool.stdout_bytes, tool.stderr_bytes) == (2, 1, 110, 5)
+    assert tool.exit_codes == {"0": 1, "killed": 1}
+    assert (binary.processes, binary.exit_codes) == (3, {"0": 1, "killed": 1, "1": 1})
+
+
+def test_snapshot():
+    assert "No tool calls recorded yet." in metrics.snapshot()
+
+    with metrics.track("amass_enum"):
+        metrics.record_process("amass", 0.0, 2.0, 0, 10, 0, False)
+    metrics.record_error("amass_enum")
+    metrics.record_cache_hit("amass_enum")
+    metrics.record_coalesced("amass_enum", 0.3)
+
+    text = metrics.snapshot()
+    assert "amass_enum: 3 calls (1 errors, 1 cache hits, 1 coalesced, 0 in flight)" in text
+    assert "processes  1 (0 timed out), exit codes 0:1" in text
+    assert "  amass: 1 runs, wait p50<=0.01s" in text
+
+
+def families(text):
+    """Metric family -> (TYPE, sample lines), checking each family is one contiguous group"""
+    result = {}
+    current = None
+    for line in text.splitlines():
+        match = re.fullmatch(r"# TYPE (\w+) (counter|gauge|histogram)", line)
+        if match:
+            assert match.group(1) not in result, f"second TYPE line for {match.group(1)}"
+            current = match.group(1)
+            result[current] = (match.group(2), [])
+            continue
+        name = re.match(r"[a-z_]+", line).group(0)
+        assert re.fullmatch(rf"{current}(_bucket|_sum|_count)?", name), f"{name} outside its family"
+        result[current][1].append(line)
+    return result
+
+
+def test_render_prometheus_groups_each_family():
+    for tool in ("whois_lookup", "dig_query"):
+        with metrics.track(tool):
+            metrics.record_process(tool.split("_")[0], 0.0, 0.1, 0, 1, 0, False)
+
+    text = metrics.render_prometheus()
+    parsed = families(text)
+
+    assert text.endswith("\n")
+    assert parsed["recon_tool_calls_total"] == ("counter", [
+        'recon_tool_calls_total{tool="dig_query"} 1', 'recon_tool_calls_total{tool="whois_lookup"} 1',
+    ])
+    assert parsed["recon_tool_duration_seconds"][0] == "histogram"
+    assert parsed["recon_processes_running"] == ("gauge", ["recon_processes_running 0"])
+    assert len(parsed["recon_binary_exec_seconds"][1]) == 2 * (len(metrics.LATENCY_BUCKETS) + 3)
+
+
+def test_render_prometheus_histogram_is_cumulative():
+    with metrics.track("nmap_scan"):
+        metrics.record_process("nmap", 0.0, 0.07, 0, 0, 0, False)
+        metrics.record_process("nmap", 0.0, 4000, 0, 0, 0, False)
+        metrics.record_process("nmap", 0.0, 2.0, 3, 0, 0, False)
+
+    samples = dict(line.rsplit(" ", 1) for line in families(metrics.render_prometheus())["recon_tool_exec_seconds"][1])
+    labels = 'tool="nmap_scan"'
+
+    assert samples[f'recon_tool_exec_seconds_bucket{{{labels},le="0.05"}}'] == "0"
+    assert samples[f'recon_tool_exec_seconds_bucket{{{labels},le="0.1"}}'] == "1"
+    assert samples[f'recon_tool_exec_seconds_bucket{{{labels},le="2.5"}}'] == "2"
+    assert samples[f'recon_tool_exec_seconds_bucket{{{labels},le="3600"}}'] == "2"
+    assert samples[f'recon_tool_exec_seconds_bucket{{{labels},le="+Inf"}}'] == "3"
+    assert samples[f"recon_tool_exec_seconds_count{{{labels}}}"] == "3"
+    assert float(samples[f"recon_tool_exec_seconds_sum{{{labels}}}"]) == pytest.approx(4002.07)
+
+
+def test_render_prometheus_counts_and_escaping():
+    with metrics.track('odd"tool\\name'):
+        pass
+    with metrics.track("nmap_scan"):
+        metrics.record_process("nmap", 0.0, 1.0, 0, 300, 20, False)
+        metrics.record_process("nmap", 0.0, 1.0, None, 0, 0, True)
+
+    text = metrics.render_prometheus()
+
+    assert 'recon_tool_calls_total{tool="odd\\"tool\\\\name"} 1' in text
+    assert 'recon_tool_output_bytes_total{tool="nmap_scan",stream="stdout"} 300' in text
+    assert 'recon_tool_exit_codes_total{tool="nmap_scan",code="killed"} 1' in text
+    assert 'recon_binary_timeouts_total{binary="nmap"} 1' in text
+
+
+def test_write_prometheus(tmp_path):
+    path = tmp_path / "recon.prom"
+    metrics.write_prometheus(str(path))
+
+    assert path.read_text() == metrics.render_prometheus()
+    assert not (tmp_path / "recon.prom.tmp").exists()
@@ -0,0 +1,96 @@
+import pytest
+
+from tools import nmap_shards
+from tools.nmap_shards import Checkpoint, ShardError, split_targets
+
+
+def test_large_network_becomes_aligned_subnets():
+    shards = split_targets("10.0.0.0/22", 256)
+
+    assert shards == [["10.0.0.0/24"], ["10.0.1.0/24"], ["10.0.2.0/24"], ["10.0.3.0/24"]]
+
+
+def test_shard_size_rounds_down_to_a_power_of_two():
+    assert split_targets("10.0.0.0/24", 100) == [[f"10.0.0.{start}/26"] for start in (0, 64, 128, 192)]
+
+
+def test_loose_targets_are_grouped_in_order():
+    shards = split_targets("a.example.com, 10.0.0.1 10.0.0.0/31\n10.0.0.10-20 b.example.com", 2)
+
+    assert shards == [["a.example.com", "10.0.0.1"], ["10.0.0.0/31", "10.0.0.10-20"], ["b.example.com"]]
+
+
+def test_networks_come_before_loose_targets():
+    assert split_targets("host.example.com 192.168.0.0/25", 64) == [
+        ["192.168.0.0/26"], ["192.168.0.64/26"], ["host.example.com"],
+    ]
+
+
+def test_empty_target():
+    assert split_targets("  ,\n", 256) == []
+
+
+def test_shard_limit_is_checked_before_enumerating():
+    # 2**88 subnets: enumerating them would never finish, counting is instant
+    with pytest.raises(ShardError, match=f"would need {2 ** 88} shards"):
+        split_targets("2001:db8::/32", 256)
+
+
+def test_shard_limit_counts_networks_and_loose_targets():
+    assert len(split_targets("10.0.0.0/23 a b c", 256, max_shards=3)) == 3
+    with pytest.raises(ShardError, match=r"4 shards of 256 hosts \(limit 3\)"):
+        split_targets("10.0.0.0/22", 256, max_shards=3)
+    with pytest.raises(ShardError):
+        split_targets("10.0.0.0/23 a b c", 2, max_shards=3)
+
+
+def test_default_limit():
+    assert len(split_targets("10.0.0.0/12", 256)) == nmap_shards.MAX_SHARDS
+    with pytest.raises(ShardError):
+        split_targets("10.0.0.0/11", 256)
+
+
+def test_checkpoint_resumes_finished_shards(tmp_path):
+    shards = split_targets("10.0.0.0/22", 256)
+    checkpoint = Checkpoint("10.0.0.0/22", "-sS", 256, directory=str(tmp_path))
+    checkpoint.record(0, shards[0], [{"address": "10.0.0.5"}], "1 host up")
+    checkpoint.record(2, shards[2], [], "0 hosts up")
+
+    # A fresh run of the same sweep finds the same file
+    resumed = Checkpoint("10.0.0.0/22", "-sS", 256, directory=str(tmp_path)).load()
+
+    assert sorted(resumed) == [0, 2]
+    assert resumed[0]["hosts"] == [{"address": "10.0.0.5"}] and resumed[2]["summary"] == "0 hosts up"
+    assert [index for index in range(len(shards)) if index not in resumed] == [1, 3]
+
+
+def test_checkpoint_ignores_a_torn_last_line(tmp_path):
+    checkpoint = Checkpoint("10.0.0.0/22", "", 256, directory=str(tmp_path))
+    checkpoint.record(1, ["10.0.1.0/24"], [], "0 hosts up")
+    with open(checkpoint.path, "a") as handle:
+        handle.write('{"shard": 3, "targets": ["10.0.3')
+
+    assert list(checkpoint.load()) == [1]
+    # Shards finished after the crash start on a fresh line
+    checkpoint.record(3, ["10.0.3.0/24"], [], "0 hosts up")
+    checkpoint.record(2, ["10.0.2.0/24"], [], "0 hosts up")
+    assert sorted(checkpoint.load()) == [1, 2, 3]
+
+
+def test_checkpoint_is_per_sweep(tmp_path):
+    first = Checkpoint("10.0.0.0/22", "-sS", 256, directory=str(tmp_path))
+    first.record(0, ["10.0.0.0/24"], [], "0 hosts up")
+
+    assert Checkpoint("10.0.0.0/22", "-sT", 256, directory=str(tmp_path)).load() == {}
+    assert Checkpoint("10.0.0.0/22", "-sS", 128, directory=str(tmp_path)).load() == {}
+    assert Checkpoint("10.0.0.0/21", "-sS", 256, directory=str(tmp_path)).load() == {}
+
+
+def test_checkpoint_clear(tmp_path):
+    checkpoint = Checkpoint("10.0.0.0/22", "", 256, directory=str(tmp_path / "missing"))
+    assert checkpoint.load() == {}
+    checkpoint.clear()
+
+    checkpoint.record(0, ["10.0.0.0/24"], [], "0 hosts up")
+    checkpoint.clear()
+    assert checkpoint.load() == {}
@@ -0,0 +1,75 @@
+from tools import nmap_xml
+
+
+def parse(text, chunk=None):
+    stream = nmap_xml.NmapXMLStream()
+    if chunk is None:
+        for line in text.splitlines(keepends=True):
+            stream.feed(line)
+    else:
+        for start in range(0, len(text), chunk):
+            stream.feed(text[start:start + chunk])
+    return stream
+
+
+def test_host_records(read_fixture):
+    stream = parse(read_fixture("nmap_scan.xml"))
+
+    assert stream.error is None
+    up, down = stream.hosts
+    assert up["state"] == "up" and down["state"] == "down"
+    assert up["hostnames"] == ["www.example.com"]
+    assert up["os"] == "Linux 5.0 - 5.14 (98%)"
+    # Closed and filtered ports are dropped; open|filtered is kept
+    assert [(p["port"], p["protocol"], p["state"]) for p in up["ports"]] == [
+        (22, "tcp", "open"), (80, "tcp", "open"), (161, "udp", "open|filtered"),
+    ]
+    assert up["ports"][0]["service"] == "ssh OpenSSH 9.6p1 (Ubuntu Linux; protocol 2.0)"
+    assert up["ports"][1]["scripts"] == [{"id": "http-title", "output": "Example Domain"}]
+
+
+def test_run_stats(read_fixture):
+    stream = parse(read_fixture("nmap_scan.xml"))
+
+    assert stream.stats["elapsed"] == "12.34"
+    assert stream.stats["hosts_up"] == "1"
+    assert stream.stats["hosts_total"] == "2"
+
+
+def test_chunk_boundaries_do_not_matter(read_fixture):
+    text = read_fixture("nmap_scan.xml")
+
+    assert parse(text, chunk=7).hosts == parse(text).hosts
+
+
+def test_format_table(read_fixture):
+    table = nmap_xml.format_table(parse(read_fixture("nmap_scan.xml")).hosts)
+
+    assert table.splitlines() == [
+        "192.0.2.10 (www.example.com) os: Linux 5.0 - 5.14 (98%)",
+        "  22/tcp\tssh OpenSSH 9.6p1 (Ubuntu Linux; protocol 2.0)",
+        "  80/tcp\thttp nginx 1.24.0",
+        "    http-title: Example Domain",
+        "  161/udp [open|filtered]\tsnmp",
+        "  smb-os-discovery: OS: Unix",
+    ]
+
+
+def test_malformed_xml_sets_error_and_keeps_parsed_hosts(read_fixture):
+    text = read_fixture("nmap_scan.xml")
+    cut = text.index("</host>") + len("</host>\n")
+    stream = parse(text[:cut] + "<host><status state='up'></port>\n")
+
+    assert stream.error.startswith("Malformed nmap XML")
+    assert len(stream.hosts) == 1
+
+
+def test_long_script_output_is_clipped():
+    output = "x" * (nmap_xml.SCRIPT_OUTPUT_LIMIT + 50)
+    xml = (
+        "<nmaprun><host><status state='up'/><address addr='192.0.2.1' addrtype='ipv4'/>"
+        f"<hostscript><script id='banner' output='{output}'/></hostscript></host></nmaprun>"
+    )
+    (host,) = parse(xml).hosts
+
+    assert host["scripts"][0]["output"] == "x" * nmap_xml.SCRIPT_OUTPUT_LIMIT + "..."
@@ -0,0 +1,56 @@
+import pytest
+
+from tools import dns_client, nslookup_tool
+
+
+class FakeResolver:
+    """Answers every question with one PTR record and remembers what was asked"""
+
+    def __init__(self):
+        self.questions = []
+
+    async def query(self, name, rtype="A"):
+        self.questions.append((name, rtype))
+        answers = [dns_client.DNSRecord(name, "PTR", 300, "dns.google.")] if rtype == "PTR" else []
+        return dns_client.DNSResponse(1, 0, False, False, (name, rtype), answers, server="127.0.0.1#53")
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    fake = FakeResolver()
+    monkeypatch.setattr(dns_client, "get_resolver", lambda server=None, port=53: fake)
+    return fake
+
+
+@pytest.fixture
+def nslookup_query():
+    return nslookup_tool.register_tool()["nslookup_query"]
+
+
+@pytest.mark.parametrize("kwargs", ["", "-type=PTR", "-q=ptr 127.0.0.1"])
+async def test_address_is_looked_up_by_reverse_name(resolver, nslookup_query, kwargs):
+    result = await nslookup_query("8.8.8.8", kwargs)
+
+    assert resolver.questions == [("8.8.8.8.in-addr.arpa.", "PTR")]
+    assert "8.8.8.8.in-addr.arpa\tname = dns.google." in result
+
+
+async def test_ipv6_reverse_name(resolver, nslookup_query):
+    await nslookup_query("2001:db8::1", "-type=PTR")
+
+    assert resolver.questions == [(dns_client.reverse_name("2001:db8::1"), "PTR")]
+    assert resolver.questions[0][0].endswith(".ip6.arpa.")
+
+
+async def test_other_types_keep_the_target(resolver, nslookup_query):
+    await nslookup_query("example.com", "-type=PTR")
+    await nslookup_query("8.8.8.8", "-type=A")
+
+    assert resolver.questions == [("example.com", "PTR"), ("8.8.8.8", "A")]
+
+
+async def test_default_lookup_asks_both_families(resolver, nslookup_query):
+    result = await nslookup_query("example.com")
+
+    assert resolver.questions == [("example.com", "A"), ("example.com", "AAAA")]
+    assert "*** Can't find example.com: No answer" in result
@@ -0,0 +1,104 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+from tools import binaries, ct_client, recon_pipeline_tool
+
+# Stands in for whatweb: logs the hosts of each run, answers every host except dead.* in --log-json form
+FAKE_WHATWEB = """#!{python}
+import json, sys
+hosts = open(sys.argv[sys.argv.index("-i") + 1]).read().split()
+with open({log!r}, "a") as log:
+    log.write(json.dumps(hosts) + "\\n")
+entries = [
+    {{"target": "http://" + host, "http_status": 200,
+      "plugins": {{"Title": {{"string": ["Home"]}}, "Apache": {{"version": ["2.4"]}}}}}}
+    for host in hosts if not host.startswith("dead.")
+]
+print(json.dumps(entries))
+"""
+
+
+class FakePool:
+    """Every name resolves except nx.*; broken.* raises"""
+
+    def __init__(self, servers, *args):
+        self.servers = servers
+        self.wildcards = {}
+
+    async def lookup(self, name, index=0):
+        if name.startswith("broken."):
+            raise RuntimeError("resolver exploded")
+        return set() if name.startswith("nx.") else {"192.0.2.1"}
+
+    async def is_wildcard(self, name, ips):
+        return False
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    names = []
+
+    async def iter_names(domain, **kwargs):
+        for name in names:
+            yield name
+
+    monkeypatch.setattr(ct_client, "iter_names", iter_names)
+    monkeypatch.setattr(recon_pipeline_tool, "ResolverPool", FakePool)
+    monkeypatch.setattr(binaries, "is_installed", lambda name: name == "whatweb")
+
+    log = tmp_path / "whatweb.log"
+    script = tmp_path / "whatweb"
+    script.write_text(FAKE_WHATWEB.format(python=sys.executable, log=str(log)))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    run = recon_pipeline_tool.register_tool()["recon_pipeline"]
+    run.names = names
+    run.whatweb_runs = lambda: [json.loads(line) for line in log.read_text().splitlines()] if log.exists() else []
+    return run
+
+
+def rows(report):
+    return {line.split("\t")[0]: line.split("\t")[1:] for line in report.splitlines() if "\t" in line}
+
+
+async def test_failed_lookups_are_counted_not_fatal(pipeline):
+    pipeline.names.extend(["www.example.com", "broken.example.com", "nx.example.com", "mail.example.com"])
+
+    report = await pipeline("example.com", sources="crtsh", fingerprint=False,
+                            resolve_concurrency=1, timeout=30)
+
+    assert report.startswith("Recon pipeline for example.com: completed")
+    assert "-> 3 live hosts (1 unresolved, 0 wildcard matches dropped, 1 lookups failed)" in report
+    assert set(rows(report)) == {"host", "example.com", "www.example.com", "mail.example.com"}
+
+
+async def test_live_hosts_are_fingerprinted_in_batches(pipeline):
+    pipeline.names.extend(f"host{number}.example.com" for number in range(30))
+    pipeline.names.append("dead.example.com")
+
+    report = await pipeline("example.com", sources="crtsh", fingerprint_concurrency=2, timeout=60)
+
+    runs = pipeline.whatweb_runs()
+    fingerprinted = [host for run in runs for host in run]
+    assert sorted(fingerprinted) == sorted(["example.com", "dead.example.com", *pipeline.names[:30]])
+    assert all(len(run) <= recon_pipeline_tool.FINGERPRINT_BATCH_SIZE for run in runs)
+    assert len(runs) < len(fingerprinted)
+
+    table = rows(report)
+    assert table["host5.example.com"] == ["192.0.2.1", "crtsh", "200 Home: Apache[2.4]"]
+    assert table["dead.example.com"][2].startswith("(no response; exit code 0 in ")
+    assert "-> 32 fingerprinted" in report
+
+
+async def test_resolvers_must_be_addresses(pipeline):
+    result = await pipeline("example.com", resolvers="8.8.8.8,dns.google")
+
+    assert result == "Error: resolvers must be IP addresses, got dns.google"
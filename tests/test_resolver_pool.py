@@ -0,0 +1,16 @@
+import pytest
+
+from tools import resolver_pool
+from tools.resolver_pool import parse_resolvers
+
+
+def test_parse_resolvers():
+    assert parse_resolvers(" 192.0.2.53, 2001:db8::53 ,") == ["192.0.2.53", "2001:db8::53"]
+    assert parse_resolvers("") == resolver_pool.DEFAULT_RESOLVERS
+    assert parse_resolvers("") is not resolver_pool.DEFAULT_RESOLVERS
+
+
+@pytest.mark.parametrize("resolvers", ["dns.google", "8.8.8.8,1.1.1", "8.8.8.8:53", "8.8.8.8 1.1.1.1"])
+def test_parse_resolvers_rejects_non_addresses(resolvers):
+    with pytest.raises(ValueError, match="resolvers must be IP addresses"):
+        parse_resolvers(resolvers)
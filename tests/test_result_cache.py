@@ -0,0 +1,129 @@
+import sqlite3
+import time
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, dns_ttl, is_cacheable_result, is_stateful_call, make_key
+
+DIG_ANSWER = "example.com.\t120\tIN\tA\t192.0.2.1\nexample.com.\t3600\tIN\tA\t192.0.2.2\n"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(db_path=str(tmp_path / "cache.sqlite"))
+
+
+def test_key_normalizes_target_and_flags():
+    key = make_key("dig_query", {"target": "Example.COM.", "kwargs": "+short  -t MX", "timeout": 5})
+
+    assert key == make_key("dig_query", {"target": "example.com", "kwargs": "+short -t MX", "timeout": 50})
+    assert key == make_key("dig_query", {"target": "example.com", "kwargs": "+short -t MX", "no_cache": True})
+    assert key != make_key("dig_query", {"target": "example.com", "kwargs": "-t MX +short"})
+    assert key != make_key("nslookup_query", {"target": "example.com", "kwargs": "+short -t MX"})
+
+
+def test_stateful_calls():
+    assert is_stateful_call({"delta": True})
+    assert is_stateful_call({"skip_recent": 3600})
+    assert not is_stateful_call({"delta": False, "skip_recent": 0})
+
+
+@pytest.mark.parametrize("result", [
+    "",
+    "Error: whois server unreachable",
+    "Nmap scan ...\n\n[wall-clock timeout after 60.0s, process group killed]",
+    "WhatWeb ...\n\n[exit code 1 in 0.2s]",
+    "Subdomain scan for example.com\n- Amass: timed out (300.0s)\n- crt.sh: ok",
+    "WHOIS for 3 domains (2 ok, 1 failed)",
+    'a.example.com\n[... 3.2 MB omitted; full output (4.0 MB) in fetch_result(handle="0123456789abcdef") ...]\n',
+    "[exit code 0 in 1.0s; output truncated to head and tail, full 2.0 MB in /tmp/recon-agent-spill/x]",
+    None,
+])
+def test_uncacheable_results(result):
+    assert not is_cacheable_result(result)
+
+
+def test_cacheable_result():
+    assert is_cacheable_result("WhatWeb ...\n\n[exit code 0 in 0.2s]")
+    assert is_cacheable_result("WHOIS for 3 domains (3 ok, 0 failed)")
+
+
+def test_dns_ttl_follows_smallest_record_within_bounds():
+    assert dns_ttl(DIG_ANSWER) == 120
+    assert dns_ttl("example.com.\t5\tIN\tA\t192.0.2.1\n") == result_cache.DNS_MIN_TTL
+    assert dns_ttl("192.0.2.1") == result_cache.DNS_DEFAULT_TTL
+
+
+def test_ttl_policies(cache):
+    assert cache.ttl_for("whois_lookup", "x") == 6 * 3600
+    assert cache.ttl_for("dig_query", DIG_ANSWER) == 120
+    assert cache.ttl_for("nmap_scan", "x") == 0 and not cache.is_enabled_for("nmap_scan")
+
+
+async def test_memory_then_disk_hits(cache):
+    await cache.set("k", "whois_lookup", "record", 60)
+
+    assert await cache.get("k") == "record"
+    reopened = ResultCache(db_path=cache.db_path)
+    assert await reopened.get("k") == "record"
+    assert await reopened.get("k") == "record"
+    assert await reopened.get("missing") is None
+    assert (reopened.stats["disk_hits"], reopened.stats["memory_hits"], reopened.stats["misses"]) == (1, 1, 1)
+
+
+async def test_expired_entries_are_misses(cache, monkeypatch):
+    await cache.set("k", "whois_lookup", "record", 60)
+    now = time.time()
+    monkeypatch.setattr(result_cache.time, "time", lambda: now + 61)
+
+    assert await cache.get("k") is None
+    assert await ResultCache(db_path=cache.db_path).get("k") is None
+
+
+async def test_zero_ttl_is_not_stored(cache):
+    await cache.set("k", "whois_lookup", "record", 0)
+
+    assert await cache.get("k") is None
+    assert cache.stats["stores"] == 0
+
+
+async def test_memory_tier_is_lru_bounded(tmp_path):
+    cache = ResultCache(db_path=str(tmp_path / "cache.sqlite"), max_entries=2)
+    for key in ("a", "b", "c"):
+        await cache.set(key, "whois_lookup", key, 60)
+
+    assert list(cache._memory) == ["b", "c"]
+    # The disk tier still has the entry the memory tier dropped
+    assert await cache.get("a") == "a"
+
+
+async def test_disk_tier_drops_soonest_expiring_past_byte_limit(tmp_path):
+    cache = ResultCache(db_path=str(tmp_path / "cache.sqlite"), max_db_bytes=250)
+    await cache.set("short", "dig_query", "s" * 100, 60)
+    await cache.set("long", "whois_lookup", "l" * 100, 6 * 3600)
+    await cache.set("mid", "amass_enum", "m" * 100, 3600)
+
+    keys = {row[0] for row in cache._connect().execute("SELECT key FROM results")}
+    assert keys == {"long", "mid"}
+    assert cache.stats["evicted"] == 1
+
+
+def test_old_database_gains_size_column(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE results (key TEXT PRIMARY KEY, tool TEXT, value TEXT, expires_at REAL)")
+    db.execute("INSERT INTO results VALUES ('k', 'whois_lookup', 'café', ?)", (time.time() + 60,))
+    db.commit()
+    db.close()
+
+    cache = ResultCache(db_path=path)
+    assert cache._get_sync("k") == "café"
+    assert cache._connect().execute("SELECT size FROM results").fetchone() == (5,)
+
+
+async def test_clear(cache):
+    await cache.set("k", "whois_lookup", "record", 60)
+    cache.clear()
+
+    assert await ResultCache(db_path=cache.db_path).get("k") is None
@@ -0,0 +1,91 @@
+import pytest
+
+from result_store import ResultStore, ResultStoreError
+
+LINES = [f"host{i}.example.com\t192.0.2.{i % 256}" for i in range(1, 1001)]
+TEXT = "\n".join(LINES) + "\n"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(directory=str(tmp_path / "results"), threshold=100)
+
+
+@pytest.fixture
+async def entry(store):
+    return await store.put("bulk_resolve", TEXT)
+
+
+async def test_put_is_content_addressed(store, entry):
+    again = await store.put("bulk_resolve", TEXT)
+
+    assert again.handle == entry.handle
+    assert entry.lines == 1000 and entry.size == len(TEXT)
+    assert store.stats["reused"] == 1
+
+
+async def test_pages(store, entry):
+    _, first, pages = await store.page(entry.handle, page=1, page_size=300)
+    _, last, _ = await store.page(entry.handle, page=4, page_size=300)
+
+    assert pages == 4
+    assert first == LINES[:300]
+    assert last == LINES[900:]
+
+
+async def test_page_out_of_range(store, entry):
+    with pytest.raises(ResultStoreError, match="out of range"):
+        await store.page(entry.handle, page=5, page_size=300)
+
+
+async def test_grep_anchors_each_line(store, entry):
+    _, out, matches = await store.grep(entry.handle, r"^host99\.")
+
+    assert matches == 1
+    assert out == ["99: host99.example.com\t192.0.2.99"]
+
+
+async def test_grep_end_anchor_excludes_the_line_break(store, entry):
+    _, out, matches = await store.grep(entry.handle, r"\.250$")
+
+    assert matches == 3
+    assert [line.split(":")[0] for line in out] == ["250", "506", "762"]
+
+
+async def test_grep_context_and_limit(store, entry):
+    _, out, matches = await store.grep(entry.handle, r"host(10|12)\.", context=1, max_matches=1)
+
+    assert matches == 2
+    assert out == ["9: " + LINES[8], "10: " + LINES[9], "11: " + LINES[10]]
+
+
+async def test_grep_ignore_case_and_bad_pattern(store, entry):
+    _, _, matches = await store.grep(entry.handle, r"HOST1\.", ignore_case=True)
+    assert matches == 1
+
+    with pytest.raises(ResultStoreError, match="invalid pattern"):
+        await store.grep(entry.handle, "(")
+
+
+async def test_read_returns_the_full_text(store, entry):
+    assert await store.read(entry.handle) == TEXT
+
+
+async def test_unknown_and_invalid_handles(store):
+    with pytest.raises(ResultStoreError, match="not found"):
+        await store.page("0123456789abcdef")
+    with pytest.raises(ResultStoreError, match="invalid"):
+        await store.page("../etc/passwd")
+
+
+async def test_entries_survive_a_restart(store, entry, tmp_path):
+    reopened = ResultStore(directory=store.directory, threshold=100)
+
+    _, lines, _ = await reopened.page(entry.handle, page=2, page_size=500)
+    assert lines == LINES[500:]
+
+
+def test_should_store_uses_threshold(store):
+    assert store.should_store("x" * 101)
+    assert not store.should_store("x" * 100)
+    assert not store.should_store(None)
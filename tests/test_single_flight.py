@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight, flight_key
+from tools import progress
+
+
+def test_flight_key_includes_timeouts():
+    base = {"target": "192.0.2.1", "kwargs": "-F"}
+
+    assert flight_key("nmap_scan", base) == flight_key("nmap_scan", dict(base))
+    assert flight_key("nmap_scan", {**base, "timeout": 60}) != flight_key("nmap_scan", {**base, "timeout": 600})
+    assert flight_key("nmap_scan", base) != flight_key("dig_query", base)
+
+
+async def test_concurrent_callers_share_one_run():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def scan():
+        calls.append(1)
+        await release.wait()
+        return "result"
+
+    waiters = [asyncio.create_task(flights.run("key", scan)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert flights.is_running("key")
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["result"] * 5
+    assert calls == [1]
+    assert flights.stats == {"executed": 1, "coalesced": 4}
+    assert flights.in_flight() == 0
+
+
+async def test_exception_reaches_every_waiter():
+    flights = SingleFlight()
+
+    async def scan():
+        await asyncio.sleep(0)
+        raise RuntimeError("nmap failed")
+
+    results = await asyncio.gather(*(flights.run("key", scan) for _ in range(3)), return_exceptions=True)
+    assert [str(result) for result in results] == ["nmap failed"] * 3
+
+
+async def test_cancelling_one_waiter_keeps_the_run():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def scan():
+        await release.wait()
+        return "result"
+
+    first = asyncio.create_task(flights.run("key", scan))
+    second = asyncio.create_task(flights.run("key", scan))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == "result"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_last_waiter_leaving_cancels_the_run():
+    flights = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def scan():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(flights.run("key", scan))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert flights.in_flight() == 0
+
+
+async def test_progress_and_output_reach_every_listener():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    reports = {"a": [], "b": []}
+    lines = {"a": [], "b": []}
+
+    async def scan():
+        await release.wait()
+        await progress.report("half", progress=1, total=2)
+        await progress.output("22/tcp open")
+        return "done"
+
+    def listener(name):
+        async def reporter(message, value, total):
+            reports[name].append((message, value, total))
+
+        async def sink(line):
+            lines[name].append(line)
+        return reporter, sink
+
+    waiters = [asyncio.create_task(flights.run("key", scan, *listener(name))) for name in ("a", "b")]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*waiters)
+
+    assert reports == {"a": [("half", 1, 2)], "b": [("half", 1, 2)]}
+    assert lines == {"a": ["22/tcp open"], "b": ["22/tcp open"]}
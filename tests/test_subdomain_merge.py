@@ -0,0 +1,49 @@
+from tools.subdomain_merge import SubdomainMerger, SuffixTrie, canonicalize
+
+SUBFINDER = "www.example.com\napi.example.com\nWWW.EXAMPLE.COM.\nnotexample.com\n"
+AMASS = "www.example.com (FQDN) --> a_record --> 192.0.2.1 (IPAddress)\n*.dev.example.com\nexample.com.evil.net\n"
+
+
+def test_scope_uses_whole_labels():
+    trie = SuffixTrie(["example.com", "corp"])
+
+    assert trie.match("a.b.example.com") == "example.com"
+    assert trie.match("example.com") == "example.com"
+    assert trie.match("notexample.com") is None
+    assert trie.match("example.com.evil.net") is None
+    assert trie.match("host.corp") == "corp"
+
+
+def test_canonicalize():
+    assert canonicalize("*.*.Dev.Example.COM.") == ("dev.example.com", True)
+    assert canonicalize("-bad-.example.com") is None
+    assert canonicalize("localhost") is None
+
+
+def test_merge_sources():
+    merger = SubdomainMerger(["example.com"])
+    merger.add_text(SUBFINDER, "subfinder")
+    merger.add_text(AMASS, "amass")
+
+    assert merger.names() == ["api.example.com", "dev.example.com", "www.example.com"]
+    assert merger.sources["www.example.com"] == ["subfinder", "amass"]
+    assert merger.wildcards == {"dev.example.com"}
+    assert merger.source_counts == {"subfinder": 2, "amass": 2}
+    assert merger.out_of_scope == 2
+
+
+def test_add_new_returns_only_first_sightings():
+    merger = SubdomainMerger(["example.com"])
+
+    assert merger.add_new(SUBFINDER, "subfinder") == ["www.example.com", "api.example.com"]
+    assert merger.add_new(AMASS, "amass") == ["dev.example.com"]
+    assert merger.add_new(SUBFINDER, "crtsh") == []
+
+
+def test_format_header_and_rows():
+    merger = SubdomainMerger(["example.com"])
+    merger.add_text(SUBFINDER, "subfinder")
+    lines = merger.format().splitlines()
+
+    assert lines[0] == "2 unique subdomains (4 names seen, 1 duplicates, 1 out of scope or invalid)"
+    assert lines[1:] == ["api.example.com\tsubfinder", "www.example.com\tsubfinder"]
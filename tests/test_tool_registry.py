@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+import tool_registry
+from tool_registry import LazyTool, ToolRegistry
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    return str(tmp_path / "manifest.json")
+
+
+@pytest.fixture
+def eager(manifest_path):
+    """A fully imported registry, which also writes the manifest"""
+    return ToolRegistry(lazy=False, manifest_path=manifest_path)
+
+
+def schemas(registry):
+    return {name: info["schema"] for name, info in registry.list_tools().items()}
+
+
+def is_lazy(registry):
+    return all(isinstance(func, LazyTool) for func in registry.tools.values())
+
+
+def edit_manifest(path, change):
+    with open(path) as handle:
+        manifest = json.load(handle)
+    change(manifest)
+    with open(path, "w") as handle:
+        json.dump(manifest, handle)
+
+
+def test_lazy_tools_match_eager_loading(eager, manifest_path):
+    lazy = ToolRegistry(manifest_path=manifest_path)
+
+    assert is_lazy(lazy) and lazy.tools
+    assert schemas(lazy) == schemas(eager)
+    assert lazy.modules == eager.modules
+    for name, func in eager.tools.items():
+        assert getattr(lazy.tools[name], "_required_tool", None) == getattr(func, "_required_tool", None)
+
+
+def test_lazy_tool_imports_its_module_on_first_use(eager, manifest_path):
+    lazy = ToolRegistry(manifest_path=manifest_path)
+    func = lazy.get_tool("dig_query")
+
+    assert not isinstance(func, LazyTool)
+    assert func._mcp_schema == eager.tools["dig_query"]._mcp_schema
+    assert lazy._loaded_modules == {"dig_tool"}
+    assert isinstance(lazy.tools["whois_lookup"], LazyTool)
+
+
+@pytest.mark.parametrize("content", ["", "{not json", "[]", '{"version": 2}'])
+def test_corrupt_manifest_is_rebuilt(eager, manifest_path, content):
+    with open(manifest_path, "w") as handle:
+        handle.write(content)
+
+    registry = ToolRegistry(manifest_path=manifest_path)
+
+    assert not is_lazy(registry) and schemas(registry) == schemas(eager)
+    assert is_lazy(ToolRegistry(manifest_path=manifest_path))
+
+
+def test_manifest_with_broken_entries_is_rebuilt(eager, manifest_path):
+    edit_manifest(manifest_path, lambda manifest: manifest["tools"]["dig_query"].pop("module"))
+
+    registry = ToolRegistry(manifest_path=manifest_path)
+
+    assert not is_lazy(registry) and registry.modules["dig_query"] == "dig_tool"
+
+
+@pytest.mark.parametrize("change", [
+    # A helper module the tools import, not only the *_tool.py files
+    lambda manifest: manifest["files"]["tools/batch.py"].__setitem__(0, 0),
+    lambda manifest: manifest["files"]["tools/dig_tool.py"].__setitem__(1, 0),
+    lambda manifest: manifest["files"].pop("tools/executor.py"),
+    lambda manifest: manifest["files"].__setitem__("tools/removed_tool.py", [0, 0]),
+    lambda manifest: manifest.__setitem__("version", tool_registry.MANIFEST_VERSION - 1),
+    lambda manifest: manifest.__setitem__("tools_dir", "/elsewhere/tools"),
+])
+def test_stale_manifest_is_rebuilt(eager, manifest_path, change):
+    edit_manifest(manifest_path, change)
+
+    registry = ToolRegistry(manifest_path=manifest_path)
+
+    assert not is_lazy(registry) and schemas(registry) == schemas(eager)
+    assert is_lazy(ToolRegistry(manifest_path=manifest_path))
+
+
+def test_manifest_covers_the_whole_tools_package(eager, manifest_path):
+    with open(manifest_path) as handle:
+        files = json.load(handle)["files"]
+
+    assert {"tool_registry.py", "tools/__init__.py", "tools/executor.py", "tools/dig_tool.py"} <= set(files)
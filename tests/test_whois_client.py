@@ -0,0 +1,180 @@
+import asyncio
+import socket
+import struct
+
+import pytest
+
+from tools import whois_client
+from tools.whois_client import WhoisClient, WhoisError, find_referral
+
+REGISTRY = "127.0.0.1"
+REGISTRAR = "127.0.0.2"
+
+
+class WhoisFixture:
+    """
+    Port-43 stand-in listening on two loopback addresses with one port.
+
+    answers maps (server address, query) to a reply string, or to a coroutine
+    function called with the writer for misbehaving servers.
+    """
+
+    def __init__(self):
+        self.answers = {}
+        self.queries = []
+        self.servers = []
+        self.port = 0
+
+    async def start(self):
+        for host in (REGISTRY, REGISTRAR):
+            server = await asyncio.start_server(self.handle, host, self.port)
+            self.port = server.sockets[0].getsockname()[1]
+            self.servers.append(server)
+
+    async def handle(self, reader, writer):
+        host = writer.get_extra_info("sockname")[0]
+        query = (await reader.readline()).decode().strip()
+        self.queries.append((host, query))
+        answer = self.answers.get((host, query), "No match\r\n")
+        if callable(answer):
+            await answer(writer)
+            return
+        writer.write(answer.encode())
+        await writer.drain()
+        writer.close()
+
+    def client(self, tmp_path, **kwargs):
+        return WhoisClient(port=self.port, iana_server=REGISTRY,
+                           server_cache_path=str(tmp_path / "servers.json"), **kwargs)
+
+
+async def reset(writer):
+    # Zero linger turns the close into a RST
+    writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+    writer.transport.abort()
+
+
+async def silent(writer):
+    await asyncio.sleep(1)
+    writer.close()
+
+
+@pytest.fixture
+async def whois(monkeypatch):
+    monkeypatch.setattr(whois_client, "DEFAULT_MIN_INTERVAL", 0)
+    fixture = WhoisFixture()
+    try:
+        await fixture.start()
+    except OSError:
+        pytest.skip("127.0.0.2 is not a loopback address here")
+    yield fixture
+    for server in fixture.servers:
+        server.close()
+        await server.wait_closed()
+
+
+def test_referral_value_must_be_on_the_same_line():
+    assert find_referral("Registrar WHOIS Server:\nRegistrar URL: http://example.net\n", "a") is None
+    assert find_referral("  Registrar WHOIS Server: whois.example.net.\n", "a") == "whois.example.net"
+    assert find_referral("ReferralServer: rwhois://rwhois.example.net:4321\n", "a") == "rwhois.example.net"
+    assert find_referral("refer:\twhois.nic.test\n", "whois.iana.org") == "whois.nic.test"
+    assert find_referral("Whois Server: whois.nic.test\n", "WHOIS.NIC.TEST") is None
+
+
+async def test_registry_referral_is_followed(whois, tmp_path, read_fixture):
+    registry, registrar = read_fixture("whois_com.txt").split("\n\n", 1)
+    whois.answers[(REGISTRY, "example.com")] = f"Registrar WHOIS Server: {REGISTRAR}\r\n{registry}"
+    whois.answers[(REGISTRAR, "example.com")] = registrar
+
+    result = await whois.client(tmp_path).lookup("example.com", server=REGISTRY)
+
+    assert result.servers == [REGISTRY, REGISTRAR]
+    assert result.text.startswith(f"# {REGISTRAR}\n{registrar.strip()}\n# {REGISTRY}\n")
+    assert whois.queries == [(REGISTRY, "example.com"), (REGISTRAR, "example.com")]
+
+
+async def test_referrals_stop_at_loops_and_when_disabled(whois, tmp_path):
+    whois.answers[(REGISTRY, "example.com")] = f"Whois Server: {REGISTRAR}\r\n"
+    whois.answers[(REGISTRAR, "example.com")] = f"Whois Server: {REGISTRY}\r\n"
+    client = whois.client(tmp_path)
+
+    assert (await client.lookup("example.com", server=REGISTRY)).servers == [REGISTRY, REGISTRAR]
+    assert (await client.lookup("example.com", server=REGISTRY, follow_referrals=False)).servers == [REGISTRY]
+    assert len(whois.queries) == 3
+
+
+async def test_unknown_tld_is_learned_from_iana(whois, tmp_path):
+    whois.answers[(REGISTRY, "test")] = f"domain:       TEST\r\nrefer:        {REGISTRAR}\r\n"
+    whois.answers[(REGISTRAR, "example.test")] = "Domain Name: EXAMPLE.TEST\r\n"
+
+    result = await whois.client(tmp_path).lookup("example.test")
+    # A second client picks the server up from the on-disk cache without asking IANA
+    again = await whois.client(tmp_path).lookup("other.test")
+
+    assert result.servers == [REGISTRAR] and again.servers == [REGISTRAR]
+    assert whois.queries == [(REGISTRY, "test"), (REGISTRAR, "example.test"), (REGISTRAR, "other.test")]
+
+
+async def test_response_is_capped(whois, tmp_path):
+    async def endless(writer):
+        while True:
+            writer.write(b"x" * 65536)
+            await writer.drain()
+
+    whois.answers[(REGISTRY, "example.com")] = endless
+
+    text = await whois.client(tmp_path, timeout=5).raw_query(REGISTRY, "example.com")
+
+    assert whois_client.MAX_RESPONSE_BYTES <= len(text) < whois_client.MAX_RESPONSE_BYTES + 65536
+
+
+async def test_connection_refused(whois, tmp_path):
+    with socket.socket() as unused:
+        unused.bind((REGISTRY, 0))
+        port = unused.getsockname()[1]
+    client = WhoisClient(port=port, server_cache_path=None)
+
+    with pytest.raises(WhoisError, match=f"Could not connect to {REGISTRY}:{port}"):
+        await client.raw_query(REGISTRY, "example.com")
+
+
+async def test_connection_reset_mid_answer(whois, tmp_path):
+    async def partial_then_reset(writer):
+        writer.write(b"Domain Name: EXAMPLE.COM\r\n")
+        await writer.drain()
+        await asyncio.sleep(0.05)
+        await reset(writer)
+
+    whois.answers[(REGISTRY, "example.com")] = partial_then_reset
+
+    with pytest.raises(WhoisError, match=f"Connection to {REGISTRY} failed"):
+        await whois.client(tmp_path).raw_query(REGISTRY, "example.com")
+
+
+async def test_read_timeout(whois, tmp_path):
+    whois.answers[(REGISTRY, "example.com")] = silent
+
+    with pytest.raises(WhoisError, match=f"Timed out reading from {REGISTRY}"):
+        await whois.client(tmp_path, timeout=0.2).raw_query(REGISTRY, "example.com")
+
+
+async def test_failing_registrar_keeps_the_registry_answer(whois, tmp_path):
+    whois.answers[(REGISTRY, "example.com")] = f"Registrar WHOIS Server: {REGISTRAR}\r\nDomain Name: EXAMPLE.COM\r\n"
+    whois.answers[(REGISTRAR, "example.com")] = reset
+
+    result = await whois.client(tmp_path).lookup("example.com", server=REGISTRY)
+
+    assert result.servers == [REGISTRY]
+    assert "Domain Name: EXAMPLE.COM" in result.text
+
+
+async def test_batch_reports_errors_per_query(whois, tmp_path):
+    whois.answers[(REGISTRY, "example.test")] = "Domain Name: EXAMPLE.TEST\r\n"
+    whois.answers[(REGISTRAR, "example.invalid")] = silent
+    client = whois.client(tmp_path, timeout=0.2)
+    client._tld_servers.update(test=REGISTRY, invalid=REGISTRAR)
+
+    results = await client.batch(["example.test", "example.invalid"])
+
+    assert results["example.test"].servers == [REGISTRY]
+    assert results["example.invalid"] == f"Timed out reading from {REGISTRAR}"
@@ -0,0 +1,58 @@
+import pytest
+
+from tools import whois_parser
+
+
+def test_registry_then_registrar_answer(read_fixture):
+    record = whois_parser.parse_whois(read_fixture("whois_com.txt"))
+
+    # The first answer wins for single fields; list fields are merged
+    assert record["domain"] == "example.com"
+    assert record["registrar"] == "RESERVED-Internet Assigned Numbers Authority"
+    assert record["created"] == "1995-08-14"
+    assert record["updated"] == "2024-08-14"
+    assert record["expires"] == "2025-08-13"
+    assert record["registrant_org"] == "Internet Assigned Numbers Authority"
+    assert record["name_servers"] == ["a.iana-servers.net", "b.iana-servers.net", "c.iana-servers.net"]
+    assert record["status"] == ["clientDeleteProhibited", "clientTransferProhibited", "clientUpdateProhibited"]
+
+
+def test_nominet_blocks(read_fixture):
+    record = whois_parser.parse_whois(read_fixture("whois_uk.txt"))
+
+    assert record["domain"] == "example.co.uk"
+    assert record["registrant_org"] == "Example Holdings Ltd"
+    assert record["registrar"] == "Example Registrar Ltd [Tag = EXAMPLE]"
+    assert (record["created"], record["expires"], record["updated"]) == ("1996-11-26", "2026-11-26", "2024-10-12")
+    assert record["name_servers"] == ["ns1.example.net", "ns2.example.net"]
+
+
+def test_format_record_field_order(read_fixture):
+    text = whois_parser.compact(read_fixture("whois_com.txt"))
+
+    assert [line.split(":")[0] for line in text.splitlines()] == whois_parser.FIELD_ORDER
+
+
+def test_not_registered():
+    record = whois_parser.parse_whois('No match for "UNREGISTERED-EXAMPLE.COM".\n>>> Last update <<<\n')
+
+    assert record == {"status": ["not registered"]}
+
+
+def test_compact_falls_back_to_meaningful_lines():
+    text = "% comment\n\nfree text one\nfree text two\nfree text three\n"
+
+    assert whois_parser.compact(text, fallback_lines=2) == "free text one\nfree text two"
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-08-14T07:01:34Z", "2024-08-14"),
+    ("2024-08-14T23:30:00-02:00", "2024-08-15"),
+    ("2024-08-14 07:01:34 (UTC+8)", "2024-08-14"),
+    ("14-Aug-2024", "2024-08-14"),
+    ("2024.08.14", "2024-08-14"),
+    ("20240814", "2024-08-14"),
+    ("sometime soon", "sometime soon"),
+])
+def test_normalize_date(value, expected):
+    assert whois_parser.normalize_date(value) == expected
@@ -1,54 +1,196 @@
 from typing import Dict, Any, Callable
+import hashlib
 import importlib
+import json
 import os
 import sys
 
+MANIFEST_VERSION = 2
+
+
+def default_manifest_path(tools_dir):
+    """Per-checkout manifest location under the user's cache directory"""
+    cache_dir = os.environ.get(
+        "RECON_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "recon-agent")
+    )
+    digest = hashlib.sha256(tools_dir.encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"tool_manifest-{digest}.json")
+
+
+class LazyTool:
+    """
+    Stand-in for a tool function that has not been imported yet.
+
+    Carries the schema (and required binary) from the manifest so the server
+    can register it; the module is imported on the first call.
+    """
+
+    def __init__(self, registry, name, schema, required_tool=None):
+        self._registry = registry
+        self.__name__ = name
+        self._mcp_schema = schema
+        if required_tool:
+            self._required_tool = required_tool
+
+    async def __call__(self, *args, **kwargs):
+        func = self._registry.get_tool(self.__name__)
+        if func is None or func is self:
+            raise RuntimeError(f"Tool {self.__name__} could not be loaded from its module")
+        return await func(*args, **kwargs)
+
+
 class ToolRegistry:
-    def __init__(self):
+    def __init__(self, lazy=True, manifest_path=None):
         self.tools = {}
-       
+        self.modules = {}
+        self._loaded_modules = set()
+        self._failed_modules = set()
+
         current_dir = os.path.dirname(os.path.abspath(__file__))
         if current_dir not in sys.path:
             sys.path.insert(0, current_dir)
-        self.load_all_tools()
-    
+        self.tools_dir = os.path.join(current_dir, 'tools')
+        self.manifest_path = manifest_path or os.environ.get(
+            "RECON_TOOL_MANIFEST", default_manifest_path(self.tools_dir)
+        )
+
+        if not lazy or not self.load_from_manifest():
+            self.load_all_tools()
+            self.write_manifest()
+
+    def tool_files(self):
+        """Sorted *_tool.py filenames, one tool module each"""
+        if not os.path.exists(self.tools_dir):
+            return []
+        return [filename for filename in sorted(os.listdir(self.tools_dir)) if filename.endswith('_tool.py')]
+
+    def source_files(self):
+        """
+        Map of every module in the tools package (and this file) to [mtime_ns, size].
+
+        Schemas can depend on helper modules such as batch or executor, so the
+        manifest is invalidated by any source change, not only *_tool.py ones.
+        """
+        paths = [os.path.abspath(__file__)]
+        if os.path.exists(self.tools_dir):
+            paths.extend(
+                os.path.join(self.tools_dir, filename)
+                for filename in sorted(os.listdir(self.tools_dir))
+                if filename.endswith('.py')
+            )
+        files = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[os.path.relpath(path, os.path.dirname(self.tools_dir))] = [stat.st_mtime_ns, stat.st_size]
+        return files
+
     def load_all_tools(self):
         """Dynamically load all tools from the tools directory"""
-      
+
         sys.stderr.write("Loading tools dynamically from tools directory...\n")
-        
-       
-        tools_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tools')
-        
-        
-        if not os.path.exists(tools_dir):
-            sys.stderr.write(f"Tools directory not found: {tools_dir}\n")
+
+        if not os.path.exists(self.tools_dir):
+            sys.stderr.write(f"Tools directory not found: {self.tools_dir}\n")
+            return
+
+        for filename in self.tool_files():
+            self.load_module(filename[:-3])
+
+    def load_module(self, module_name):
+        """Import one tools.<module_name> and register the tools it provides"""
+        try:
+            module = importlib.import_module(f"tools.{module_name}")
+            if hasattr(module, 'register_tool'):
+                registered_tools = module.register_tool()
+                self.tools.update(registered_tools)
+                for name in registered_tools:
+                    self.modules[name] = module_name
+                self._loaded_modules.add(module_name)
+                sys.stderr.write(f"Successfully loaded {module_name}: {list(registered_tools.keys())}\n")
+            else:
+                sys.stderr.write(f"{module_name} doesn't have a register_tool function\n")
+        except ImportError as e:
+            self._failed_modules.add(module_name)
+            sys.stderr.write(f"Failed to load {module_name}: {e}\n")
+        except Exception as e:
+            self._failed_modules.add(module_name)
+            sys.stderr.write(f"Error loading {module_name}: {e}\n")
+
+    def load_from_manifest(self):
+        """
+        Register tools from a precomputed manifest without importing them.
+
+        Returns False when the manifest is missing, unreadable or stale (a
+        module in the tools package was added, removed or modified since it
+        was written).
+        """
+        try:
+            with open(self.manifest_path) as handle:
+                manifest = json.load(handle)
+        except (OSError, ValueError):
+            return False
+
+        if not isinstance(manifest, dict):
+            return False
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("tools_dir") != self.tools_dir:
+            return False
+        if manifest.get("files") != self.source_files():
+            return False
+
+        try:
+            tools = {
+                name: (LazyTool(self, name, entry["schema"], entry.get("required_tool")), entry["module"])
+                for name, entry in manifest["tools"].items()
+            }
+        except (KeyError, TypeError, AttributeError):
+            return False
+        for name, (func, module_name) in tools.items():
+            self.tools[name] = func
+            self.modules[name] = module_name
+        sys.stderr.write(f"Loaded {len(self.tools)} tools from manifest {self.manifest_path}\n")
+        return True
+
+    def write_manifest(self):
+        """Persist tool names, schemas and modules for lazy startup next time"""
+        if self._failed_modules:
+            # Keep retrying a full import until every tool module loads cleanly
             return
-        
-        
-        for filename in os.listdir(tools_dir):
-           
-            if filename.endswith('_tool.py'):
-                tool_name = filename[:-3]  
-                
-                try:
-                   
-                    module = importlib.import_module(f"tools.{tool_name}")
-                    if hasattr(module, 'register_tool'):
-                        registered_tools = module.register_tool()
-                        self.tools.update(registered_tools)
-                        sys.stderr.write(f"Successfully loaded {tool_name}: {list(registered_tools.keys())}\n")
-                    else:
-                        sys.stderr.write(f"{tool_name} doesn't have a register_tool function\n")
-                except ImportError as e:
-                    sys.stderr.write(f"Failed to load {tool_name}: {e}\n")
-                except Exception as e:
-                    sys.stderr.write(f"Error loading {tool_name}: {e}\n")
-    
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "tools_dir": self.tools_dir,
+            "files": self.source_files(),
+            "tools": {
+                name: {
+                    "module": self.modules[name],
+                    "schema": getattr(func, '_mcp_schema', {}),
+                    "required_tool": getattr(func, '_required_tool', None),
+                }
+                for name, func in self.tools.items()
+            },
+        }
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, "w") as handle:
+                json.dump(manifest, handle)
+            os.replace(tmp_path, self.manifest_path)
+        except (OSError, TypeError, ValueError) as e:
+            # Non-serializable schema or read-only cache: just load eagerly next time
+            sys.stderr.write(f"Could not write tool manifest: {e}\n")
+
     def get_tool(self, name: str) -> Callable:
-        """Get a tool function by name"""
-        return self.tools.get(name)
-    
+        """Get a tool function by name, importing its module on first use"""
+        func = self.tools.get(name)
+        if isinstance(func, LazyTool):
+            module_name = self.modules[name]
+            if module_name not in self._loaded_modules:
+                self.load_module(module_name)
+            func = self.tools.get(name)
+        return func
+
     def list_tools(self) -> Dict[str, Any]:
         """Return all available tools with their schemas"""
         return {
@@ -1,26 +1,55 @@
-import asyncio
 import shlex
-import shutil
+from collections import deque
 from typing import AsyncGenerator, Dict, Any
 
+from tools import batch, binaries, executor, output_capture, progress
+
+STDERR_TAIL_LINES = 20
+# Inline share of a long name list; the complete list spills to disk behind a fetch_result handle
+RESULT_HEAD_BYTES = 32 * 1024
+RESULT_TAIL_BYTES = 8 * 1024
+
 def register_tool():
     """Register the Amass tool with its schema"""
 
-    async def amass_enum(target: str, kwargs: str = "") -> str:
+    async def amass_enum(
+        target: str = "",
+        kwargs: str = "",
+        timeout: int = 3600,
+        targets: list = None,
+        concurrency: int = 2,
+    ) -> str:
         """
         Perform subdomain enumeration using Amass.
 
         Args:
             target: The domain to scan (e.g., "example.com")
             kwargs: Extra Amass arguments (e.g., "--passive", "--brute", "-timeout 30")
+            timeout: Wall-clock limit in seconds (0 for no limit)
+            targets: Several domains to enumerate in one call, one section each
+            concurrency: Maximum Amass runs at once for a batch
+
+        Discovered subdomains are sent to the client as progress
+        notifications while Amass runs.
 
         Examples:
             - amass_enum("tesla.com")
             - amass_enum("tesla.com", "--passive")
             - amass_enum("google.com", "--active -timeout 30")
+            - amass_enum(targets=["tesla.com", "spacex.com"], kwargs="--passive")
         """
+        names = batch.merge_targets(target, targets)
+        if not names:
+            return "Error: target parameter is required"
+        if len(names) > 1:
+            return await batch.run_batch(
+                f"Amass enumeration with args [{kwargs or 'default'}]", names,
+                lambda name: amass_enum(name, kwargs, timeout), concurrency,
+            )
+        target = names[0]
+
         # Check if Amass is installed
-        if not shutil.which("amass"):
+        if not binaries.is_installed("amass"):
             return "Error: Amass is not installed or not in PATH. Please install Amass first."
 
         # Warn about placeholder domains
@@ -29,12 +58,28 @@ def register_tool():
                     "Amass typically finds limited or no subdomains for this domain. "
                     "Try a real domain like tesla.com or google.com.")
 
-        # Collect all output from streaming run
-        output_lines = []
-        async for line in stream_amass_enum(target, kwargs):
-            output_lines.append(line)
-
-        result = "\n".join(output_lines)
+        # Forward subdomains to the client as they arrive. Every name is kept:
+        # a long list spills to disk and the result carries its head, tail and
+        # a fetch_result handle for the rest.
+        names_capture = output_capture.OutputCapture(RESULT_HEAD_BYTES, RESULT_TAIL_BYTES)
+        found = 0
+        stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        try:
+            async for line in stream_amass_enum(target, kwargs, timeout):
+                if line.startswith("[stderr] "):
+                    stderr_tail.append(line)
+                    continue
+                if line.startswith("Running Amass command:"):
+                    continue
+                found += 1
+                await progress.report(line, progress=found)
+                names_capture.feed(line.encode() + b"\n")
+        except BaseException:
+            names_capture.discard()
+            raise
+        await names_capture.publish("amass_enum")
+
+        result = names_capture.text() + "\n".join(stderr_tail)
         if not result.strip():
             return (f"No subdomains found for {target}. Try:\n\n"
                     "- A different domain\n"
@@ -42,8 +87,8 @@ def register_tool():
                     "- Verify Amass is installed/configured correctly")
         return result
 
-    async def stream_amass_enum(target: str, kwargs: str = "") -> AsyncGenerator[str, None]:
-        """Run Amass and stream output line by line (no timeout)."""
+    async def stream_amass_enum(target: str, kwargs: str = "", timeout: int = 0) -> AsyncGenerator[str, None]:
+        """Run Amass and stream stdout/stderr lines as they are produced."""
         if not target:
             yield "Error: target parameter is required."
             return
@@ -63,31 +108,22 @@ def register_tool():
         yield f"Running Amass command: {' '.join(cmd)}\n"
 
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-
-            # Stream stdout
-            async for line in process.stdout:
-                decoded_line = line.decode().rstrip()
-                if decoded_line:
-                    yield decoded_line
-
-            # Stream stderr
-            async for line in process.stderr:
-                decoded_line = line.decode().rstrip()
-                if decoded_line:
-                    yield "[stderr] " + decoded_line
-
-            # Wait for exit
-            return_code = await process.wait()
-            if return_code != 0:
-                yield f"Amass exited with code: {return_code}"
+            # Both pipes are drained concurrently, so a full stderr buffer
+            # can no longer stall amass while we wait on stdout
+            async for stream, item in executor.stream_command(cmd, timeout=timeout or None):
+                if stream == "exit":
+                    if item.timed_out:
+                        yield f"[stderr] Amass stopped: {item.summary()}"
+                    elif item.returncode != 0:
+                        yield f"[stderr] Amass exited with code: {item.returncode}"
+                    continue
+                line = item.rstrip()
+                if not line:
+                    continue
+                yield line if stream == "stdout" else "[stderr] " + line
 
         except Exception as e:
-            yield f"Error executing Amass: {str(e)}"
+            yield f"[stderr] Error executing Amass: {str(e)}"
 
     # MCP schema (normalized: target + kwargs)
     amass_enum._mcp_schema = {
@@ -96,13 +132,28 @@ def register_tool():
         "parameters": {
             "target": {
                 "type": "string",
-                "description": "The target domain to scan (e.g., 'example.com').",
-                "required": True
+                "description": "The target domain to scan (e.g., 'example.com'); optional when targets is given",
+                "default": ""
             },
             "kwargs": {
                 "type": "string",
                 "description": "Additional Amass flags (e.g., '--passive', '--active', '--brute', '-timeout 30').",
                 "default": ""
+            },
+            "timeout": {
+                "type": "integer",
+                "description": "Wall-clock limit in seconds; the process group is killed when it expires (0 for no limit)",
+                "default": 3600
+            },
+            "targets": {
+                "type": "array",
+                "description": "Several domains to enumerate in one call; the response has one section per domain",
+                "default": []
+            },
+            "concurrency": {
+                "type": "integer",
+                "description": "Maximum Amass runs at once when targets holds several domains",
+                "default": 2
             }
         },
         "examples": [
@@ -0,0 +1,45 @@
+"""
+Multi-target calls shared by the tool modules.
+
+Every tool takes a `targets` list next to `target`. merge_targets() turns
+the two into one ordered, deduplicated list. Tools whose binary or client
+handles many targets itself pass the list on (nmap, whatweb, whois,
+bulk_resolve); the others call themselves once per target through
+run_batch(), under a concurrency limit, and answer with one response that
+has a section per target.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+from tools import progress
+
+
+def merge_targets(target: str = "", targets: Optional[list] = None) -> List[str]:
+    items = ([target] if target else []) + [str(item) for item in (targets or []) if item]
+    return list(dict.fromkeys(item.strip() for item in items if item.strip()))
+
+
+async def run_batch(title: str, names: List[str], run_one: Callable[[str], Awaitable[str]],
+                    concurrency: int) -> str:
+    """Run one call per target with at most `concurrency` in flight; sections keep input order"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    finished = 0
+
+    async def one(name: str) -> str:
+        nonlocal finished
+        async with semaphore:
+            try:
+                result = await run_one(name)
+            except Exception as e:
+                result = f"Error: {str(e)}"
+        finished += 1
+        await progress.report(f"finished {name}", progress=finished, total=len(names))
+        return result
+
+    results = await asyncio.gather(*(one(name) for name in names))
+    failed = sum(1 for result in results if result.startswith("Error"))
+    header = f"{title} for {len(names)} targets ({len(names) - failed} ok, {failed} failed):"
+    return header + "\n\n" + "\n\n".join(
+        f"=== {name} ===\n{result}" for name, result in zip(names, results)
+    )
@@ -0,0 +1,104 @@
+"""
+Cached index of external tool binaries.
+
+Each name is resolved against PATH once and remembered as an absolute
+path. An entry is only re-resolved when PATH changes or the binary's
+mtime no longer matches (reinstall/upgrade/removal), so the hot path
+costs a single stat() instead of a PATH scan or a `where` subprocess.
+"""
+
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Missing binaries are re-checked after this long, so a fresh install is noticed
+MISSING_RECHECK_SECONDS = 60.0
+
+
+class BinaryIndex:
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Optional[str], float]] = {}
+        self._path_env: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _check_path_env(self) -> None:
+        path_env = os.environ.get("PATH", "")
+        if path_env != self._path_env:
+            self._entries.clear()
+            self._path_env = path_env
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Absolute path for a binary name, or None if it is not installed"""
+        if os.path.isabs(name):
+            return name if os.access(name, os.X_OK) else None
+
+        with self._lock:
+            self._check_path_env()
+            entry = self._entries.get(name)
+            if entry is not None:
+                path, stamp = entry
+                if path is None:
+                    if time.monotonic() - stamp < MISSING_RECHECK_SECONDS:
+                        return None
+                else:
+                    try:
+                        if os.stat(path).st_mtime == stamp:
+                            return path
+                    except OSError:
+                        pass
+
+            path = shutil.which(name)
+            if path is None:
+                self._entries[name] = (None, time.monotonic())
+                return None
+            path = os.path.abspath(path)
+            try:
+                self._entries[name] = (path, os.stat(path).st_mtime)
+            except OSError:
+                self._entries[name] = (None, time.monotonic())
+                return None
+            return path
+
+    def warm(self, names: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Resolve a batch of names up front (server startup)"""
+        return {name: self.resolve(name) for name in names}
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def snapshot(self) -> Dict[str, Optional[str]]:
+        with self._lock:
+            return {name: path for name, (path, _) in self._entries.items()}
+
+
+index = BinaryIndex()
+
+
+def resolve(name: str) -> Optional[str]:
+    return index.resolve(name)
+
+
+def is_installed(name: str) -> bool:
+    return index.resolve(name) is not None
+
+
+def absolute_command(cmd: List[str]) -> List[str]:
+    """
+    Replace the program with its indexed absolute path. Unknown names are
+    left as-is so exec reports the usual "No such file or directory".
+
+    The program run by a leading sudo is left alone: sudo looks it up in
+    its own secure_path, and resolving it against the server's PATH would
+    let whatever comes first there run as root.
+    """
+    if not cmd:
+        return cmd
+    resolved = list(cmd)
+    resolved[0] = index.resolve(cmd[0]) or cmd[0]
+    return resolved
@@ -0,0 +1,166 @@
+import asyncio
+import re
+import time
+from typing import List
+
+from tools import output_capture
+from tools.resolver_pool import ResolverPool, parse_resolvers
+
+HOSTNAME_RE = re.compile(r"(?<![\w.-])(?:\*\.)?((?:[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9])?\.)+[a-z]{2,63})\.?(?![\w-])", re.IGNORECASE)
+
+
+def extract_hostnames(text: str) -> List[str]:
+    """Pull unique hostnames out of free text (e.g. a previous tool's output)"""
+    seen = {}
+    for match in HOSTNAME_RE.finditer(text or ""):
+        seen.setdefault(match.group(1).lower(), None)
+    return list(seen)
+
+
+def register_tool():
+    """Register the bulk DNS resolution tool with its schema"""
+
+    async def bulk_resolve(
+        target: str = "",
+        targets: list = None,
+        resolvers: str = "",
+        record_type: str = "A",
+        concurrency: int = 500,
+        detect_wildcards: bool = True,
+        handle: str = "",
+    ) -> str:
+        """
+        Resolve many hostnames at once with the built-in async resolver.
+
+        Args:
+            target: Hostnames separated by whitespace/commas, or the raw output of a
+                previous tool (subdomain_scan, amass_enum); hostnames are extracted
+            targets: List of hostnames to resolve
+            resolvers: Comma-separated resolver IPs to spread queries across
+            record_type: A or AAAA
+            concurrency: Maximum lookups in flight at once
+            detect_wildcards: Probe parent zones for wildcard DNS and drop matching answers
+            handle: fetch_result handle of an earlier result to extract hostnames from
+
+        Examples:
+            - bulk_resolve(targets=["www.example.com", "mail.example.com"])
+            - bulk_resolve("<output of subdomain_scan>", resolvers="8.8.8.8,1.1.1.1")
+            - bulk_resolve(handle="<handle from a large subdomain_scan result>")
+        """
+        text = " ".join([target or ""] + [str(t) for t in (targets or [])])
+        if handle:
+            try:
+                text += "\n" + await output_capture.read_published(handle)
+            except Exception as e:
+                return f"Error: cannot read result {handle}: {str(e)}"
+        names = extract_hostnames(text)
+        if not names:
+            return "Error: no hostnames found in target/targets/handle"
+
+        record_type = (record_type or "A").upper()
+        if record_type not in ("A", "AAAA"):
+            return "Error: record_type must be A or AAAA"
+
+        try:
+            servers = parse_resolvers(resolvers)
+        except ValueError as e:
+            return f"Error: {str(e)}"
+
+        pool = ResolverPool(servers, record_type, max(1, concurrency))
+        start = time.monotonic()
+
+        async def resolve(name: str, index: int):
+            ips = await pool.lookup(name, index)
+            if ips and detect_wildcards and await pool.is_wildcard(name, ips):
+                return None
+            return ips
+
+        try:
+            results = await asyncio.gather(*(resolve(name, i) for i, name in enumerate(names)))
+        finally:
+            pool.close()
+
+        live = []
+        dropped = 0
+        unresolved = 0
+        for name, ips in zip(names, results):
+            if ips is None:
+                dropped += 1
+                continue
+            if not ips:
+                unresolved += 1
+                continue
+            live.append((name, sorted(ips)))
+
+        elapsed = time.monotonic() - start
+        lines = [
+            f"Bulk resolution ({record_type}) of {len(names)} names via {', '.join(pool.servers)}: "
+            f"{len(live)} live, {dropped} wildcard matches dropped, {unresolved} unresolved "
+            f"in {elapsed:.1f}s"
+        ]
+        if pool.wildcards:
+            lines.append("Wildcard zones:")
+            lines.extend(f"  *.{zone} -> {', '.join(sorted(ips))}" for zone, ips in sorted(pool.wildcards.items()))
+        if live:
+            lines.append("")
+            lines.append("host\tips")
+            lines.extend(f"{name}\t{','.join(ips)}" for name, ips in live)
+        return "\n".join(lines)
+
+    bulk_resolve._mcp_schema = {
+        "name": "bulk_resolve",
+        "description": "Resolve large lists of hostnames (given directly, as raw tool output, or as a fetch_result handle) concurrently across several resolvers, dropping wildcard-DNS false positives; returns a compact host -> IPs table.",
+        "parameters": {
+            "target": {
+                "type": "string",
+                "description": "Hostnames separated by whitespace/commas, or raw output of subdomain_scan/amass_enum to extract hostnames from",
+                "default": ""
+            },
+            "targets": {
+                "type": "array",
+                "description": "List of hostnames to resolve",
+                "default": []
+            },
+            "resolvers": {
+                "type": "string",
+                "description": "Comma-separated resolver IPs (default: 8.8.8.8,1.1.1.1,9.9.9.9)",
+                "default": ""
+            },
+            "record_type": {
+                "type": "string",
+                "description": "Address record type to resolve: A or AAAA",
+                "default": "A"
+            },
+            "concurrency": {
+                "type": "integer",
+                "description": "Maximum lookups in flight at once",
+                "default": 500
+            },
+            "detect_wildcards": {
+                "type": "boolean",
+                "description": "Probe parent zones with random labels and drop answers matching a wildcard",
+                "default": True
+            },
+            "handle": {
+                "type": "string",
+                "description": "fetch_result handle of an earlier oversized result (e.g. subdomain_scan, amass_enum) to take hostnames from",
+                "default": ""
+            }
+        },
+        "examples": [
+            {
+                "input": {"targets": ["www.example.com", "mail.example.com"]},
+                "description": "Resolve two hostnames"
+            },
+            {
+                "input": {"target": "a.example.com b.example.com", "resolvers": "8.8.8.8,1.1.1.1"},
+                "description": "Resolve names spread across two public resolvers"
+            },
+            {
+                "input": {"handle": "3f2a9c0d1b7e4a56"},
+                "description": "Resolve every hostname in a stored subdomain_scan result"
+            }
+        ]
+    }
+
+    return {"bulk_resolve": bulk_resolve}
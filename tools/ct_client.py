@@ -0,0 +1,77 @@
+"""
+Async certificate-transparency (crt.sh) client.
+
+A single keep-alive connection pool is shared by every caller, and the JSON
+response is parsed as it streams in so names are yielded incrementally
+instead of materialising the whole crt.sh array in memory.
+"""
+
+import os
+from typing import AsyncGenerator, Optional
+
+import httpx
+
+from tools.json_stream import JSONArrayStream, JSONStreamError
+
+# Override with RECON_CRTSH_URL to point the client at a local fixture server
+DEFAULT_BASE_URL = os.environ.get("RECON_CRTSH_URL", "https://crt.sh")
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+class CTLogError(Exception):
+    """Raised when the CT log endpoint returns an unusable response"""
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared pooled client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            headers={"User-Agent": "recon-agent"},
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def aclose() -> None:
+    """Close the shared client (used on server shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def iter_names(domain: str, base_url: Optional[str] = None) -> AsyncGenerator[str, None]:
+    """
+    Query crt.sh for certificates under a domain and yield names as they stream in.
+
+    Args:
+        domain: Domain to search (e.g., example.com); queried as %.domain
+        base_url: CT log endpoint, defaults to RECON_CRTSH_URL or https://crt.sh
+
+    Each certificate's name_value may hold several newline-separated names;
+    they are yielded individually.
+    """
+    url = (base_url or DEFAULT_BASE_URL).rstrip("/") + "/"
+    params = {"q": f"%.{domain}", "output": "json"}
+
+    async with get_client().stream("GET", url, params=params) as response:
+        if response.status_code != 200:
+            raise CTLogError(f"CT log returned HTTP {response.status_code}")
+
+        parser = JSONArrayStream()
+        try:
+            async for chunk in response.aiter_text():
+                for entry in parser.feed(chunk):
+                    if not isinstance(entry, dict):
+                        continue
+                    for name in entry.get("name_value", "").splitlines():
+                        name = name.strip()
+                        if name:
+                            yield name
+            parser.close()
+        except JSONStreamError as e:
+            raise CTLogError(f"{str(e)} from CT log")
@@ -1,53 +1,159 @@
 import asyncio
 import shlex
 import shutil
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
+
+from tools import batch, dns_client, executor
+
+# dig display flags the native resolver can honour; anything else falls back to dig
+NATIVE_DISPLAY_FLAGS = {"+short", "+noall", "+answer", "+nocmd", "+nocomments", "+nostats", "+noquestion"}
+
+
+def parse_native_args(args_list) -> Optional[Dict[str, Any]]:
+    """
+    Map dig arguments onto the native resolver.
+
+    Returns None when the arguments use dig features the resolver doesn't
+    implement (+trace, -x, unusual classes, ...), so the caller can fall
+    back to the dig binary.
+    """
+    options = {"rtype": "A", "server": None, "port": 53, "short": False, "answer_only": False}
+    tokens = list(args_list)
+    while tokens:
+        token = tokens.pop(0)
+        lowered = token.lower()
+        if token.startswith("@") and len(token) > 1:
+            options["server"] = token[1:]
+        elif token.upper() in dns_client.RECORD_TYPES:
+            options["rtype"] = token.upper()
+        elif token.upper() == "IN":
+            continue
+        elif token == "-t" and tokens and tokens[0].upper() in dns_client.RECORD_TYPES:
+            options["rtype"] = tokens.pop(0).upper()
+        elif token == "-p" and tokens and tokens[0].isdigit():
+            options["port"] = int(tokens.pop(0))
+        elif lowered in NATIVE_DISPLAY_FLAGS:
+            if lowered == "+short":
+                options["short"] = True
+            elif lowered in ("+noall", "+answer"):
+                options["answer_only"] = True
+        else:
+            return None
+    return options
+
+
+def format_dig_response(target: str, options: Dict[str, Any], response) -> str:
+    """Render a native answer in dig's presentation format"""
+    if options["short"]:
+        return "\n".join(record.data for record in response.answers)
+
+    sections = []
+    if not options["answer_only"]:
+        sections.append(
+            f"; <<>> recon-agent resolver <<>> {target} {options['rtype']}\n"
+            f";; ->>HEADER<<- status: {response.status}, id: {response.id}\n"
+            f";; flags:{' aa' if response.authoritative else ''}; "
+            f"ANSWER: {len(response.answers)}, AUTHORITY: {len(response.authority)}, "
+            f"ADDITIONAL: {len(response.additional)}\n\n"
+            f";; QUESTION SECTION:\n;{response.question[0]}\t\tIN\t{response.question[1]}"
+        )
+    if response.answers:
+        lines = "\n".join(record.to_text() for record in response.answers)
+        sections.append(lines if options["answer_only"] else f";; ANSWER SECTION:\n{lines}")
+    if not options["answer_only"]:
+        if response.authority:
+            sections.append(";; AUTHORITY SECTION:\n" + "\n".join(r.to_text() for r in response.authority))
+        if response.additional:
+            sections.append(";; ADDITIONAL SECTION:\n" + "\n".join(r.to_text() for r in response.additional))
+        sections.append(
+            f";; Query time: {int(response.elapsed * 1000)} msec\n"
+            f";; SERVER: {response.server} ({'TCP' if response.via_tcp else 'UDP'})"
+        )
+    return "\n\n".join(sections)
+
 
 def register_tool():
     """Register the dig tool with its schema"""
     
-    async def dig_query(target: str, kwargs: str = "") -> str:
+    async def dig_query(
+        target: str = "",
+        kwargs: str = "",
+        timeout: int = 30,
+        targets: list = None,
+        concurrency: int = 50,
+    ) -> str:
         """
         Perform DNS queries using dig.
 
+        Common queries (record type, @server, -p port, +short) are answered by
+        the built-in async resolver; other dig options run the dig binary.
+
         Args:
             target: Domain or hostname to query (e.g., example.com)
             kwargs: Extra dig flags (e.g., "A", "MX", "TXT +short @8.8.8.8")
+            timeout: Wall-clock limit in seconds (0 for no limit)
+            targets: Several names to query with the same flags, one section each
+            concurrency: Maximum queries in flight for a batch
 
         Examples:
             - dig_query("example.com", "A")
             - dig_query("example.com", "MX +short")
             - dig_query("example.com", "TXT @1.1.1.1")
+            - dig_query(targets=["example.com", "example.org"], kwargs="MX +short")
         """
-        if not target:
+        names = batch.merge_targets(target, targets)
+        if not names:
             return "Error: target parameter is required"
+        if len(names) > 1:
+            return await batch.run_batch(
+                f"Dig queries with args [{kwargs or 'default'}]", names,
+                lambda name: dig_query(name, kwargs, timeout), concurrency,
+            )
+        target = names[0]
+
+        try:
+            args_list = shlex.split(kwargs) if kwargs else []
+        except Exception as e:
+            return f"Error parsing arguments: {str(e)}"
+
+        # Answer in-process when possible; only exotic dig features spawn dig
+        options = parse_native_args(args_list)
+        if options is not None:
+            return await native_query(target, options, timeout)
 
         # Base command
         cmd = ["dig", target]
-
-        # Add extra args if provided
-        if kwargs:
-            try:
-                args_list = shlex.split(kwargs)
-                cmd.extend(args_list)
-            except Exception as e:
-                return f"Error parsing arguments: {str(e)}"
+        cmd.extend(args_list)
 
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-
-            stdout, stderr = await process.communicate()
-            result = stdout.decode() if stdout else stderr.decode()
+            process_result = await executor.run_command(cmd, timeout=timeout or None)
+            result = process_result.output()
 
-            return f"Dig query for {target}:\n\n{result}"
+            return f"Dig query for {target}:\n\n{result}\n\n[{process_result.summary()}]"
 
         except Exception as e:
             return f"Error executing dig: {str(e)}"
 
+    async def native_query(target, options, timeout):
+        """Resolve with the built-in DNS client and format like dig"""
+        start = time.monotonic()
+        try:
+            resolver = dns_client.get_resolver(options["server"], options["port"])
+            response = await asyncio.wait_for(
+                resolver.query(target, options["rtype"]), timeout=timeout or None
+            )
+        except (dns_client.DNSTimeout, asyncio.TimeoutError):
+            return (f"Dig query for {target}:\n\n"
+                    ";; connection timed out; no servers could be reached\n\n"
+                    f"[native resolver: timeout after {time.monotonic() - start:.1f}s]")
+        except Exception as e:
+            return f"Error executing DNS query: {str(e)}"
+
+        result = format_dig_response(target, options, response)
+        return (f"Dig query for {target}:\n\n{result}\n\n"
+                f"[native resolver: {response.status} in {int(response.elapsed * 1000)} ms]")
+
     # MCP schema (normalized)
     dig_query._mcp_schema = {
         "name": "dig_query",
@@ -55,13 +161,28 @@ def register_tool():
         "parameters": {
             "target": {
                 "type": "string",
-                "description": "Domain or hostname to query (e.g., example.com)",
-                "required": True
+                "description": "Domain or hostname to query (e.g., example.com); optional when targets is given",
+                "default": ""
             },
             "kwargs": {
                 "type": "string",
                 "description": "Additional dig flags (e.g., 'A', 'MX +short', 'TXT @8.8.8.8')",
                 "default": ""
+            },
+            "timeout": {
+                "type": "integer",
+                "description": "Wall-clock limit in seconds; the process group is killed when it expires (0 for no limit)",
+                "default": 30
+            },
+            "targets": {
+                "type": "array",
+                "description": "Several names to query with the same flags in one call; the response has one section per name",
+                "default": []
+            },
+            "concurrency": {
+                "type": "integer",
+                "description": "Maximum queries in flight when targets holds several names",
+                "default": 50
             }
         },
         "examples": [
@@ -0,0 +1,410 @@
+"""
+In-process asyncio DNS client.
+
+Builds and parses RFC 1035 wire-format messages itself, so dig_query and
+nslookup_query no longer fork a process per question. One UDP socket per
+resolver carries many in-flight queries at once (matched by message id);
+truncated answers are retried over TCP. Point it at any server/port,
+including a local stub server for testing.
+"""
+
+import asyncio
+import ipaddress
+import os
+import random
+import socket
+import struct
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+RECORD_TYPES = {
+    "A": 1,
+    "NS": 2,
+    "CNAME": 5,
+    "SOA": 6,
+    "PTR": 12,
+    "MX": 15,
+    "TXT": 16,
+    "AAAA": 28,
+}
+TYPE_NAMES = {value: name for name, value in RECORD_TYPES.items()}
+
+RCODE_NAMES = {
+    0: "NOERROR",
+    1: "FORMERR",
+    2: "SERVFAIL",
+    3: "NXDOMAIN",
+    4: "NOTIMP",
+    5: "REFUSED",
+}
+
+CLASS_IN = 1
+FALLBACK_NAMESERVER = "8.8.8.8"
+# Queries outstanding per resolver socket; bursts beyond this overflow
+# socket buffers on typical servers and just turn into retries
+MAX_IN_FLIGHT = 256
+SOCKET_BUFFER_SIZE = 1 << 20
+
+
+class DNSError(Exception):
+    """Raised for malformed messages or when no answer could be obtained"""
+
+
+class DNSTimeout(DNSError):
+    """Raised when a server does not answer within the retry budget"""
+
+
+@dataclass
+class DNSRecord:
+    name: str
+    rtype: str
+    ttl: int
+    data: str
+
+    def to_text(self) -> str:
+        """Zone-file style line, as dig prints it"""
+        return f"{self.name}\t{self.ttl}\tIN\t{self.rtype}\t{self.data}"
+
+
+@dataclass
+class DNSResponse:
+    id: int
+    rcode: int
+    truncated: bool
+    authoritative: bool
+    question: Tuple[str, str]
+    answers: List[DNSRecord] = field(default_factory=list)
+    authority: List[DNSRecord] = field(default_factory=list)
+    additional: List[DNSRecord] = field(default_factory=list)
+    server: str = ""
+    elapsed: float = 0.0
+    via_tcp: bool = False
+
+    @property
+    def status(self) -> str:
+        return RCODE_NAMES.get(self.rcode, f"RCODE{self.rcode}")
+
+
+def type_code(rtype: str) -> int:
+    rtype = rtype.upper()
+    if rtype not in RECORD_TYPES:
+        raise DNSError(f"Unsupported record type: {rtype}")
+    return RECORD_TYPES[rtype]
+
+
+def reverse_name(address: str) -> str:
+    """in-addr.arpa / ip6.arpa name for an IP address"""
+    return ipaddress.ip_address(address).reverse_pointer + "."
+
+
+def is_ip_address(value: str) -> bool:
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+def encode_name(name: str) -> bytes:
+    name = name.rstrip(".")
+    if not name:
+        return b"\x00"
+    encoded = b""
+    for label in name.split("."):
+        raw = label.encode("idna") if not label.isascii() else label.encode()
+        if not raw or len(raw) > 63:
+            raise DNSError(f"Invalid label in name: {name}")
+        encoded += bytes([len(raw)]) + raw
+    if len(encoded) + 1 > 255:
+        raise DNSError(f"Name too long: {name}")
+    return encoded + b"\x00"
+
+
+def build_query(name: str, rtype: str, query_id: int, recursion: bool = True) -> bytes:
+    flags = 0x0100 if recursion else 0
+    header = struct.pack("!HHHHHH", query_id, flags, 1, 0, 0, 0)
+    return header + encode_name(name) + struct.pack("!HH", type_code(rtype), CLASS_IN)
+
+
+def read_name(message: bytes, offset: int) -> Tuple[str, int]:
+    """Decode a possibly-compressed name; returns (name, offset after it)"""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(message):
+            raise DNSError("Truncated name in DNS message")
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(message):
+                raise DNSError("Truncated compression pointer")
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | message[offset + 1]
+            jumps += 1
+            if jumps > 64:
+                raise DNSError("Compression pointer loop")
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(message[offset:offset + length].decode("ascii", errors="replace"))
+        offset += length
+    return ".".join(labels) + ".", (end if end is not None else offset)
+
+
+def _render_rdata(message: bytes, rtype: int, start: int, length: int) -> str:
+    rdata = message[start:start + length]
+    if rtype == 1 and length == 4:
+        return str(ipaddress.IPv4Address(rdata))
+    if rtype == 28 and length == 16:
+        return str(ipaddress.IPv6Address(rdata))
+    if rtype in (2, 5, 12):
+        return read_name(message, start)[0]
+    if rtype == 15:
+        if length < 3:
+            raise DNSError("Truncated MX record")
+        preference = struct.unpack("!H", rdata[:2])[0]
+        return f"{preference} {read_name(message, start + 2)[0]}"
+    if rtype == 16:
+        strings = []
+        pos = 0
+        while pos < length:
+            size = rdata[pos]
+            text = rdata[pos + 1:pos + 1 + size].decode("utf-8", errors="replace")
+            strings.append('"' + text.replace('"', '\\"') + '"')
+            pos += 1 + size
+        return " ".join(strings)
+    if rtype == 6:
+        mname, pos = read_name(message, start)
+        rname, pos = read_name(message, pos)
+        if pos + 20 > start + length:
+            raise DNSError("Truncated SOA record")
+        serial, refresh, retry, expire, minimum = struct.unpack("!IIIII", message[pos:pos + 20])
+        return f"{mname} {rname} {serial} {refresh} {retry} {expire} {minimum}"
+    return f"\\# {length} {rdata.hex()}"
+
+
+def parse_response(message: bytes) -> DNSResponse:
+    if len(message) < 12:
+        raise DNSError("DNS message shorter than header")
+    query_id, flags, qdcount, ancount, nscount, arcount = struct.unpack("!HHHHHH", message[:12])
+    offset = 12
+    question = ("", "")
+    for _ in range(qdcount):
+        qname, offset = read_name(message, offset)
+        if offset + 4 > len(message):
+            raise DNSError("Truncated question")
+        qtype, _qclass = struct.unpack("!HH", message[offset:offset + 4])
+        offset += 4
+        question = (qname, TYPE_NAMES.get(qtype, f"TYPE{qtype}"))
+
+    sections: List[List[DNSRecord]] = [[], [], []]
+    for section, count in zip(sections, (ancount, nscount, arcount)):
+        for _ in range(count):
+            name, offset = read_name(message, offset)
+            if offset + 10 > len(message):
+                raise DNSError("Truncated resource record")
+            rtype, _rclass, ttl, rdlength = struct.unpack("!HHIH", message[offset:offset + 10])
+            offset += 10
+            if offset + rdlength > len(message):
+                raise DNSError("Truncated record data")
+            if rtype == 41:
+                # EDNS OPT pseudo-record carries no answer data
+                offset += rdlength
+                continue
+            data = _render_rdata(message, rtype, offset, rdlength)
+            offset += rdlength
+            section.append(DNSRecord(name, TYPE_NAMES.get(rtype, f"TYPE{rtype}"), ttl, data))
+
+    return DNSResponse(
+        id=query_id,
+        rcode=flags & 0x000F,
+        truncated=bool(flags & 0x0200),
+        authoritative=bool(flags & 0x0400),
+        question=question,
+        answers=sections[0],
+        authority=sections[1],
+        additional=sections[2],
+    )
+
+
+def system_nameserver() -> str:
+    """First nameserver from /etc/resolv.conf, or a public fallback"""
+    try:
+        with open("/etc/resolv.conf") as handle:
+            for line in handle:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    return parts[1].split("%")[0]
+    except OSError:
+        pass
+    return FALLBACK_NAMESERVER
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, resolver: "DNSResolver"):
+        self.resolver = resolver
+
+    def datagram_received(self, data, addr):
+        self.resolver._on_datagram(data)
+
+    def error_received(self, exc):
+        # ICMP errors (e.g. port unreachable) surface here; let queries time out/retry
+        pass
+
+    def connection_lost(self, exc):
+        self.resolver._on_connection_lost()
+
+
+class DNSResolver:
+    """
+    Pipelining stub resolver bound to one upstream server.
+
+    Any number of concurrent query() calls share a single UDP socket;
+    responses are matched back to callers by message id and question.
+    """
+
+    def __init__(self, server: Optional[str] = None, port: int = 53, timeout: float = 3.0, retries: int = 2):
+        self.server = server or system_nameserver()
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._connecting: Optional[asyncio.Lock] = None
+        self._pending: Dict[int, Tuple[asyncio.Future, str, str]] = {}
+        self._slots = asyncio.Semaphore(MAX_IN_FLIGHT)
+
+    async def _ensure_transport(self) -> asyncio.DatagramTransport:
+        if self._connecting is None:
+            self._connecting = asyncio.Lock()
+        async with self._connecting:
+            if self._transport is None or self._transport.is_closing():
+                loop = asyncio.get_running_loop()
+                self._transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _UDPProtocol(self), remote_addr=(self.server, self.port)
+                )
+                sock = self._transport.get_extra_info("socket")
+                if sock is not None:
+                    try:
+                        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+                    except OSError:
+                        pass
+        return self._transport
+
+    def _on_datagram(self, data: bytes) -> None:
+        if len(data) < 2:
+            return
+        query_id = struct.unpack("!H", data[:2])[0]
+        pending = self._pending.get(query_id)
+        if pending is None:
+            return
+        future, qname, qtype = pending
+        try:
+            response = parse_response(data)
+        except DNSError:
+            return
+        # Ignore answers whose question doesn't match what we asked
+        if response.question[0].lower() != qname.lower() or response.question[1] != qtype:
+            return
+        if not future.done():
+            future.set_result(response)
+
+    def _on_connection_lost(self) -> None:
+        self._transport = None
+
+    def _allocate_id(self) -> int:
+        while True:
+            query_id = random.randrange(0, 0x10000)
+            if query_id not in self._pending:
+                return query_id
+
+    async def query(self, name: str, rtype: str = "A") -> DNSResponse:
+        """Resolve one question, retrying over UDP and falling back to TCP on truncation"""
+        rtype = rtype.upper()
+        qname = name if name.endswith(".") else name + "."
+        start = time.monotonic()
+
+        async with self._slots:
+            transport = await self._ensure_transport()
+            query_id = self._allocate_id()
+            packet = build_query(qname, rtype, query_id)
+            future = asyncio.get_running_loop().create_future()
+            self._pending[query_id] = (future, qname, rtype)
+            try:
+                response = None
+                # Retransmit quickly at first, backing off up to the full timeout
+                wait = min(1.0, self.timeout)
+                for _ in range(self.retries + 1):
+                    transport.sendto(packet)
+                    try:
+                        response = await asyncio.wait_for(asyncio.shield(future), wait)
+                        break
+                    except asyncio.TimeoutError:
+                        wait = min(wait * 2, self.timeout)
+            finally:
+                self._pending.pop(query_id, None)
+                if not future.done():
+                    future.cancel()
+
+        if response is None:
+            raise DNSTimeout(f"No response from {self.server}#{self.port} after {self.retries + 1} attempts")
+
+        if response.truncated:
+            response = await self._query_tcp(packet)
+            response.via_tcp = True
+
+        response.server = f"{self.server}#{self.port}"
+        response.elapsed = time.monotonic() - start
+        return response
+
+    async def _query_tcp(self, packet: bytes) -> DNSResponse:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.server, self.port), self.timeout
+            )
+        except asyncio.TimeoutError:
+            raise DNSTimeout(f"TCP connect to {self.server}#{self.port} timed out")
+        except OSError as e:
+            raise DNSError(f"TCP connect to {self.server}#{self.port} failed: {e}")
+        try:
+            writer.write(struct.pack("!H", len(packet)) + packet)
+            await writer.drain()
+            length_bytes = await asyncio.wait_for(reader.readexactly(2), self.timeout)
+            length = struct.unpack("!H", length_bytes)[0]
+            data = await asyncio.wait_for(reader.readexactly(length), self.timeout)
+        except asyncio.TimeoutError:
+            raise DNSTimeout(f"TCP answer from {self.server}#{self.port} timed out")
+        except asyncio.IncompleteReadError:
+            raise DNSError(f"TCP connection to {self.server}#{self.port} closed early")
+        except OSError as e:
+            raise DNSError(f"TCP connection to {self.server}#{self.port} failed: {e}")
+        finally:
+            writer.close()
+        return parse_response(data)
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+
+# Keyed on the loop object itself: a new loop can reuse a dead loop's id()
+_resolvers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, int], DNSResolver]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_resolver(server: Optional[str] = None, port: int = 53) -> DNSResolver:
+    """Shared resolver per (server, port) on the running loop"""
+    server = server or os.environ.get("RECON_DNS_SERVER") or system_nameserver()
+    resolvers = _resolvers.setdefault(asyncio.get_running_loop(), {})
+    if (server, port) not in resolvers:
+        resolvers[(server, port)] = DNSResolver(server, port)
+    return resolvers[(server, port)]
+
+
+async def resolve(name: str, rtype: str = "A", server: Optional[str] = None, port: int = 53) -> DNSResponse:
+    return await get_resolver(server, port).query(name, rtype)
@@ -0,0 +1,403 @@
+"""
+Shared async subprocess engine used by every tool module.
+
+- A global semaphore caps how many external processes run at once, and
+  per-binary semaphores cap the expensive ones (nmap, amass, ...).
+- Each call gets a wall-clock timeout and an optional idle-output timeout.
+- Children are started in their own process group; the whole group is
+  terminated when the call times out or the awaiting MCP request is
+  cancelled, so no orphaned scanners are left behind.
+- Exit code, duration and captured output come back as a ProcessResult.
+  Captured streams are bounded: past a size limit only head and tail stay
+  in memory and the full stream spills to disk (tools.output_capture).
+- Every process is reported to tools.metrics: time spent waiting for a
+  slot, run time, output volume and exit code.
+- Inside a background job, each process's command line, output lines and
+  exit status are also copied to tools.progress.output() for tail_job.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import signal
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple
+
+from tools import binaries, metrics, output_capture, progress
+
+MAX_CONCURRENT_PROCESSES = int(os.environ.get("RECON_MAX_PROCESSES", "16"))
+
+# Binaries not listed here are only bound by the global cap
+BINARY_CONCURRENCY: Dict[str, int] = {
+    "nmap": int(os.environ.get("RECON_MAX_NMAP", "4")),
+    "amass": int(os.environ.get("RECON_MAX_AMASS", "2")),
+    "subfinder": int(os.environ.get("RECON_MAX_SUBFINDER", "4")),
+    "whatweb": int(os.environ.get("RECON_MAX_WHATWEB", "4")),
+}
+
+# Seconds to wait after SIGTERM before escalating to SIGKILL
+KILL_GRACE_PERIOD = 5.0
+
+READ_CHUNK_SIZE = 65536
+
+logger = logging.getLogger("recon-agent")
+
+_global_semaphore: Optional[asyncio.Semaphore] = None
+_binary_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+@dataclass
+class ProcessResult:
+    """Structured outcome of one external command"""
+
+    cmd: List[str]
+    returncode: Optional[int]
+    stdout: bytes
+    stderr: bytes
+    duration: float
+    timed_out: bool = False
+    timeout_reason: str = ""
+    # Seconds spent waiting for a concurrency slot before the process started
+    wait: float = 0.0
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+    # Set when a stream was captured; stdout/stderr then hold only head + tail if it spilled
+    stdout_capture: Optional[output_capture.OutputCapture] = field(default=None, repr=False)
+    stderr_capture: Optional[output_capture.OutputCapture] = field(default=None, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def _output_capture(self) -> Optional[output_capture.OutputCapture]:
+        return self.stdout_capture if self.stdout else self.stderr_capture
+
+    def output(self) -> str:
+        """Decoded stdout, falling back to stderr like the tools always have"""
+        capture = self._output_capture()
+        if capture is not None and capture.spilled:
+            return capture.text()
+        data = self.stdout if self.stdout else self.stderr
+        return data.decode(errors="replace")
+
+    async def full_output(self) -> str:
+        """Like output(), but the complete stream even when it spilled to disk"""
+        capture = self._output_capture()
+        if capture is not None and capture.spilled:
+            return await output_capture.read_all(capture)
+        return self.output()
+
+    def summary(self) -> str:
+        if self.timed_out:
+            text = f"{self.timeout_reason} timeout after {self.duration:.1f}s, process group killed"
+        else:
+            text = f"exit code {self.returncode} in {self.duration:.1f}s"
+        capture = self._output_capture()
+        if capture is not None and capture.spilled:
+            text += (f"; output truncated to head and tail, full "
+                     f"{output_capture.format_size(capture.size)} in {capture.pointer or capture.path}")
+        return text
+
+
+def binary_name(cmd: List[str]) -> str:
+    """Name used for per-binary limits; looks through a leading sudo"""
+    args = cmd[1:] if cmd and os.path.basename(cmd[0]) == "sudo" else cmd
+    for arg in args:
+        if not arg.startswith("-"):
+            return os.path.basename(arg)
+    return os.path.basename(cmd[0]) if cmd else ""
+
+
+def _get_semaphores(binary: str) -> List[asyncio.Semaphore]:
+    global _global_semaphore
+    if _global_semaphore is None:
+        _global_semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROCESSES)
+    semaphores = [_global_semaphore]
+    limit = BINARY_CONCURRENCY.get(binary)
+    if limit:
+        if binary not in _binary_semaphores:
+            _binary_semaphores[binary] = asyncio.Semaphore(limit)
+        semaphores.insert(0, _binary_semaphores[binary])
+    return semaphores
+
+
+def _signal_group(process: asyncio.subprocess.Process, sig: int) -> bool:
+    """Signal the child's process group; False if the signal could not be delivered"""
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, sig)
+        elif sig == signal.SIGTERM:
+            process.terminate()
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        # Already gone, or a privileged child we may only reach via its parent
+        try:
+            process.send_signal(sig)
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            # e.g. a root-owned child under sudo
+            logger.warning(f"Could not send signal {sig} to process {process.pid}: permission denied")
+            return False
+    return True
+
+
+async def kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """SIGTERM the child's process group, then SIGKILL it after a grace period"""
+    if process.returncode is not None:
+        return
+    _signal_group(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), timeout=KILL_GRACE_PERIOD)
+    except asyncio.TimeoutError:
+        if not _signal_group(process, getattr(signal, "SIGKILL", signal.SIGTERM)):
+            # Waiting would hang the caller forever; the process is left behind
+            logger.error(f"Process {process.pid} could not be killed and is still running")
+            return
+        await process.wait()
+
+
+async def _drain(stream, capture: output_capture.OutputCapture, on_line: Optional[Callable[[str], None]],
+                 activity: List[float], counts: List[int], index: int, forward: Optional[str] = None) -> None:
+    """
+    Read a pipe to EOF, recording activity and volume and optionally splitting
+    lines. With forward set, captured lines are also copied (with forward as
+    a prefix) to the progress output sink, for tailing background jobs.
+    A line longer than READ_CHUNK_SIZE is passed on in pieces, so output
+    without newlines never accumulates in memory.
+    """
+    pending = b""
+
+    async def emit(line: bytes) -> None:
+        if on_line is not None:
+            await _deliver(on_line, line)
+        else:
+            await progress.output(forward + line.decode(errors="replace").rstrip("\r"))
+
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        activity[0] = time.monotonic()
+        counts[index] += len(chunk)
+        if on_line is None:
+            capture.feed(chunk)
+            if forward is None:
+                continue
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > READ_CHUNK_SIZE:
+            lines.append(pending)
+            pending = b""
+        for line in lines:
+            await emit(line)
+    if pending and (on_line is not None or forward is not None):
+        await emit(pending)
+
+
+async def _deliver(on_line: Callable, line: bytes) -> None:
+    outcome = on_line(line.decode(errors="replace").rstrip("\r"))
+    if inspect.isawaitable(outcome):
+        # Async consumers apply backpressure to the pipe reader
+        await outcome
+
+
+async def run_command(
+    cmd: List[str],
+    timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    stdin_data: Optional[bytes] = None,
+    on_stdout_line: Optional[Callable[[str], None]] = None,
+    on_stderr_line: Optional[Callable[[str], None]] = None,
+) -> ProcessResult:
+    """
+    Run an external command under the shared concurrency limits.
+
+    Args:
+        cmd: Command and arguments, exec'd directly (no shell)
+        timeout: Wall-clock limit in seconds (None or 0 for no limit)
+        idle_timeout: Kill the process if neither pipe produces output for this long
+        stdin_data: Bytes written to the child's stdin, which is then closed
+        on_stdout_line / on_stderr_line: If given, called per decoded line instead
+            of buffering that stream into the result; may be async
+
+    Both pipes are drained concurrently so a chatty stderr can never block
+    the child. Cancelling the awaiting task kills the child's process group.
+    """
+    binary = binary_name(cmd)
+    semaphores = _get_semaphores(binary)
+    queued = time.monotonic()
+    acquired: List[asyncio.Semaphore] = []
+    metrics.process_waiting(1)
+    try:
+        for semaphore in semaphores:
+            await semaphore.acquire()
+            acquired.append(semaphore)
+    except BaseException:
+        for semaphore in reversed(acquired):
+            semaphore.release()
+        raise
+    finally:
+        metrics.process_waiting(-1)
+    wait = time.monotonic() - queued
+    metrics.process_running(1)
+    try:
+        return await _run(cmd, timeout, idle_timeout, stdin_data, on_stdout_line, on_stderr_line, binary, wait)
+    finally:
+        metrics.process_running(-1)
+        for semaphore in reversed(semaphores):
+            semaphore.release()
+
+
+async def _run(cmd, timeout, idle_timeout, stdin_data, on_stdout_line, on_stderr_line, binary, wait) -> ProcessResult:
+    start = time.monotonic()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *binaries.absolute_command(cmd),
+            stdin=asyncio.subprocess.PIPE if stdin_data is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=(os.name == "posix"),
+        )
+    except BaseException:
+        metrics.record_process(binary, wait, time.monotonic() - start, None, 0, 0, False)
+        raise
+
+    stdout_capture = output_capture.OutputCapture()
+    stderr_capture = output_capture.OutputCapture()
+    activity = [start]
+    counts = [0, 0]
+    returncode = None
+    timed_out = False
+    timeout_reason = ""
+
+    # A background job is tailing this call: copy captured lines to its output too
+    tailed = progress.current_output() is not None
+    if tailed:
+        await progress.output(f"$ {' '.join(cmd)}")
+    readers = asyncio.gather(
+        _drain(process.stdout, stdout_capture, on_stdout_line, activity, counts, 0, "" if tailed else None),
+        _drain(process.stderr, stderr_capture, on_stderr_line, activity, counts, 1, "[stderr] " if tailed else None),
+    )
+    try:
+        if stdin_data is not None:
+            process.stdin.write(stdin_data)
+            try:
+                await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            process.stdin.close()
+
+        while True:
+            now = time.monotonic()
+            waits = []
+            if timeout:
+                waits.append(start + timeout - now)
+            if idle_timeout:
+                waits.append(activity[0] + idle_timeout - now)
+            wait_for = max(0.0, min(waits)) if waits else None
+
+            done, _ = await asyncio.wait({readers}, timeout=wait_for)
+            if done:
+                break
+
+            now = time.monotonic()
+            if timeout and now - start >= timeout:
+                timed_out, timeout_reason = True, "wall-clock"
+            elif idle_timeout and now - activity[0] >= idle_timeout:
+                timed_out, timeout_reason = True, "idle-output"
+            if timed_out:
+                await kill_process_group(process)
+                # Grandchildren may still hold the pipes open; stop reading
+                readers.cancel()
+                break
+
+        returncode = await process.wait()
+    except BaseException:
+        # Cancelled MCP request (or any other failure): take the group down with us
+        readers.cancel()
+        stdout_capture.discard()
+        stderr_capture.discard()
+        await asyncio.shield(kill_process_group(process))
+        raise
+    finally:
+        if not readers.done():
+            readers.cancel()
+        try:
+            await readers
+        except (asyncio.CancelledError, Exception):
+            pass
+        duration = time.monotonic() - start
+        metrics.record_process(binary, wait, duration, returncode, counts[0], counts[1], timed_out)
+
+    for capture in (stdout_capture, stderr_capture):
+        await capture.publish(binary)
+    result = ProcessResult(
+        cmd=list(cmd),
+        returncode=returncode,
+        stdout=stdout_capture.getvalue(),
+        stderr=stderr_capture.getvalue(),
+        duration=duration,
+        timed_out=timed_out,
+        timeout_reason=timeout_reason,
+        wait=wait,
+        stdout_bytes=counts[0],
+        stderr_bytes=counts[1],
+        stdout_capture=stdout_capture,
+        stderr_capture=stderr_capture,
+    )
+    if tailed:
+        await progress.output(f"[{binary}: {result.summary()}]")
+    return result
+
+
+async def stream_command(
+    cmd: List[str],
+    timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    queue_size: int = 1000,
+) -> AsyncGenerator[Tuple[str, Any], None]:
+    """
+    Run a command and yield its output line by line as it is produced.
+
+    Yields ("stdout", line) and ("stderr", line) tuples in arrival order,
+    then a final ("exit", ProcessResult) whose stdout/stderr are empty.
+    stdout and stderr are drained concurrently into a bounded queue, so a
+    slow consumer throttles the child instead of growing memory. Closing
+    the generator early kills the process group.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def put_stdout(line: str) -> None:
+        await queue.put(("stdout", line))
+
+    async def put_stderr(line: str) -> None:
+        await queue.put(("stderr", line))
+
+    runner = asyncio.create_task(
+        run_command(cmd, timeout, idle_timeout, on_stdout_line=put_stdout, on_stderr_line=put_stderr)
+    )
+    try:
+        while True:
+            if not queue.empty():
+                yield queue.get_nowait()
+                continue
+            if runner.done():
+                break
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, runner}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        yield ("exit", runner.result())
+    finally:
+        if not runner.done():
+            runner.cancel()
+            try:
+                await runner
+            except (asyncio.CancelledError, Exception):
+                pass
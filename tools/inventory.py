@@ -0,0 +1,231 @@
+"""
+Persistent asset inventory shared by the scanning tools.
+
+Every structured result (subdomains, open ports, technologies, name -> IP
+links) is recorded with first-seen/last-seen timestamps, which lets a
+tool report only what changed since the previous run (delta mode) and
+skip assets that were confirmed recently.
+
+Assets are grouped by kind and scope: a domain's subdomains, a host's
+open ports, a host's technologies. `context` is the scan profile (e.g.
+the nmap flags) an observation was made with; an asset only counts as
+gone when a complete run with the same profile no longer sees it.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".cache", "recon-agent", "inventory.sqlite")
+
+KIND_LABELS = {"domain": "subdomains", "port": "open ports", "technology": "technologies", "ip": "addresses"}
+
+
+@dataclass
+class Delta:
+    """Differences between one observation and the inventory before it"""
+    kind: str
+    scope: str
+    new: List[Tuple[str, str]] = field(default_factory=list)
+    changed: List[Tuple[str, str, str]] = field(default_factory=list)
+    gone: List[Tuple[str, str, float]] = field(default_factory=list)
+    unchanged: int = 0
+    previous_run: Optional[float] = None
+
+    @property
+    def empty(self) -> bool:
+        return not (self.new or self.changed or self.gone)
+
+    def format(self) -> str:
+        since = (time.strftime("%Y-%m-%d %H:%M", time.localtime(self.previous_run))
+                 if self.previous_run else "never")
+        lines = [f"{self.scope} ({KIND_LABELS.get(self.kind, self.kind)}, last run {since}): {len(self.new)} new, "
+                 f"{len(self.changed)} changed, {len(self.gone)} gone, {self.unchanged} unchanged"]
+        lines.extend(f"  + {key}" + (f"  {value}" if value else "") for key, value in self.new)
+        lines.extend(f"  ~ {key}  {old or '-'} -> {new or '-'}" for key, old, new in self.changed)
+        lines.extend(
+            f"  - {key}" + (f"  {value}" if value else "")
+            + f"  (last seen {time.strftime('%Y-%m-%d %H:%M', time.localtime(last_seen))})"
+            for key, value, last_seen in self.gone
+        )
+        return "\n".join(lines)
+
+
+class Inventory:
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.environ.get("RECON_INVENTORY_DB", DEFAULT_DB_PATH)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.db_path:
+            try:
+                directory = os.path.dirname(self.db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                db = sqlite3.connect(self.db_path, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS assets ("
+                    "kind TEXT, scope TEXT, key TEXT, value TEXT, context TEXT, "
+                    "first_seen REAL, last_seen REAL, gone_since REAL, PRIMARY KEY (kind, scope, key))"
+                )
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS runs ("
+                    "kind TEXT, scope TEXT, context TEXT, finished REAL, PRIMARY KEY (kind, scope, context))"
+                )
+                db.commit()
+                self._db = db
+            except sqlite3.Error:
+                # Inventory is an optimisation; scans work without it
+                self.db_path = None
+                self._db = None
+        return self._db
+
+    def observe(self, kind: str, scope: str, items: Dict[str, str], context: str = "",
+                complete: bool = True) -> Delta:
+        """
+        Record the assets one run saw for (kind, scope) and return the delta.
+
+        complete means the run covered the whole scope, so previously known
+        assets it did not see (under the same context) are marked gone.
+        """
+        now = time.time()
+        delta = Delta(kind, scope)
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                delta.new = sorted(items.items())
+                return delta
+            row = db.execute(
+                "SELECT finished FROM runs WHERE kind = ? AND scope = ? AND context = ?",
+                (kind, scope, context),
+            ).fetchone()
+            delta.previous_run = row[0] if row else None
+            existing = {
+                key: (value, ctx, last_seen, gone_since)
+                for key, value, ctx, last_seen, gone_since in db.execute(
+                    "SELECT key, value, context, last_seen, gone_since FROM assets WHERE kind = ? AND scope = ?",
+                    (kind, scope),
+                )
+            }
+            for key, value in items.items():
+                value = value or ""
+                known = existing.get(key)
+                if known is None or known[3] is not None:
+                    delta.new.append((key, value))
+                    db.execute(
+                        "INSERT INTO assets (kind, scope, key, value, context, first_seen, last_seen, gone_since) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, NULL) ON CONFLICT (kind, scope, key) DO UPDATE SET "
+                        "value = excluded.value, context = excluded.context, last_seen = excluded.last_seen, "
+                        "gone_since = NULL",
+                        (kind, scope, key, value, context, now, now),
+                    )
+                    continue
+                if known[0] != value:
+                    delta.changed.append((key, known[0], value))
+                else:
+                    delta.unchanged += 1
+                db.execute(
+                    "UPDATE assets SET value = ?, context = ?, last_seen = ? WHERE kind = ? AND scope = ? AND key = ?",
+                    (value, context, now, kind, scope, key),
+                )
+            if complete:
+                for key, (value, ctx, last_seen, gone_since) in existing.items():
+                    if key in items or gone_since is not None or ctx != context:
+                        continue
+                    delta.gone.append((key, value, last_seen))
+                    db.execute(
+                        "UPDATE assets SET gone_since = ? WHERE kind = ? AND scope = ? AND key = ?",
+                        (now, kind, scope, key),
+                    )
+            db.execute(
+                "INSERT OR REPLACE INTO runs (kind, scope, context, finished) VALUES (?, ?, ?, ?)",
+                (kind, scope, context, now),
+            )
+            db.commit()
+        delta.new.sort()
+        delta.changed.sort()
+        delta.gone.sort()
+        return delta
+
+    def recently_observed(self, kind: str, scopes: Iterable[str], max_age: float,
+                          context: str = "") -> Set[str]:
+        """Scopes with a run of this kind and context within the last max_age seconds"""
+        scopes = list(scopes)
+        if not scopes or max_age <= 0:
+            return set()
+        cutoff = time.time() - max_age
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return set()
+            fresh = set()
+            for start in range(0, len(scopes), 500):
+                batch = scopes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                fresh.update(row[0] for row in db.execute(
+                    f"SELECT scope FROM runs WHERE kind = ? AND context = ? AND finished >= ? "
+                    f"AND scope IN ({placeholders})",
+                    (kind, context, cutoff, *batch),
+                ))
+            return fresh
+
+    def assets(self, kind: str, scope: str) -> List[Tuple[str, str]]:
+        """Current (not gone) assets of one kind and scope"""
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return []
+            return db.execute(
+                "SELECT key, value FROM assets WHERE kind = ? AND scope = ? AND gone_since IS NULL ORDER BY key",
+                (kind, scope),
+            ).fetchall()
+
+
+_inventory: Optional[Inventory] = None
+
+
+def get_inventory() -> Inventory:
+    global _inventory
+    if _inventory is None:
+        _inventory = Inventory()
+    return _inventory
+
+
+async def observe(kind: str, scope: str, items: Dict[str, str], context: str = "",
+                  complete: bool = True) -> Optional[Delta]:
+    """Record one observation; None if the inventory database is unusable"""
+    try:
+        return await asyncio.to_thread(get_inventory().observe, kind, scope, items, context, complete)
+    except sqlite3.Error:
+        return None
+
+
+async def recently_observed(kind: str, scopes: Iterable[str], max_age: float, context: str = "") -> Set[str]:
+    try:
+        return await asyncio.to_thread(get_inventory().recently_observed, kind, list(scopes), max_age, context)
+    except sqlite3.Error:
+        return set()
+
+
+async def assets(kind: str, scope: str) -> List[Tuple[str, str]]:
+    try:
+        return await asyncio.to_thread(get_inventory().assets, kind, scope)
+    except sqlite3.Error:
+        return []
+
+
+def format_deltas(deltas: List[Optional[Delta]]) -> str:
+    """Changed scopes in full, unchanged ones as a count"""
+    recorded = [delta for delta in deltas if delta is not None]
+    if len(recorded) < len(deltas):
+        return "Asset inventory unavailable; delta could not be computed"
+    changed = [delta for delta in recorded if not delta.empty]
+    lines = [f"Delta since last run: {len(changed)} of {len(recorded)} scopes changed"]
+    lines.extend(delta.format() for delta in changed)
+    return "\n".join(lines)
@@ -0,0 +1,59 @@
+"""
+Incremental parsing of a top-level JSON array (crt.sh responses, WhatWeb
+--log-json output) as it streams in.
+"""
+
+import json
+
+
+class JSONStreamError(ValueError):
+    """Raised when the stream is not (or stops being) a JSON array"""
+
+
+class JSONArrayStream:
+    """
+    Incremental parser for a top-level JSON array of objects.
+
+    Feed text chunks as they arrive; each call returns the elements that
+    became complete. Only the unparsed tail is kept in memory.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+
+    def feed(self, chunk: str) -> list:
+        self._buffer += chunk
+        items = []
+        pos = 0
+        buf = self._buffer
+        while not self._finished:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if not self._started:
+                if buf[pos] != "[":
+                    raise JSONStreamError("Expected a JSON array")
+                self._started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                self._finished = True
+                pos += 1
+                break
+            try:
+                item, end = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Element is split across chunks; wait for more data
+                break
+            items.append(item)
+            pos = end
+        self._buffer = buf[pos:]
+        return items
+
+    def close(self) -> None:
+        if not self._finished:
+            raise JSONStreamError("Truncated JSON array")
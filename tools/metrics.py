@@ -0,0 +1,328 @@
+"""
+In-process metrics for tool calls and the subprocesses they spawn.
+
+The server wraps every tool call in track(); the executor reports each
+subprocess it runs (queue wait, run time, output bytes, exit code) and
+those numbers are attributed to the tool call that is running, through a
+ContextVar, as well as to the binary. Everything is kept as counters and
+fixed-bucket histograms, so memory does not grow with traffic.
+
+snapshot() feeds the server_stats tool; render_prometheus() produces the
+text exposition format, which start_exporter() can write to a file on an
+interval for node_exporter's textfile collector or a plain scrape.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Seconds; wide enough for a DNS answer and an hour-long nmap sweep
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if empty)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+@dataclass
+class ProcessStats:
+    """Subprocess counters shared by per-tool and per-binary metrics"""
+    processes: int = 0
+    timeouts: int = 0
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+    exit_codes: Dict[str, int] = field(default_factory=dict)
+    wait: Histogram = field(default_factory=Histogram)
+    exec: Histogram = field(default_factory=Histogram)
+
+    def add(self, wait: float, duration: float, returncode, stdout_bytes: int, stderr_bytes: int,
+            timed_out: bool) -> None:
+        self.processes += 1
+        self.timeouts += int(timed_out)
+        self.stdout_bytes += stdout_bytes
+        self.stderr_bytes += stderr_bytes
+        code = "killed" if returncode is None else str(returncode)
+        self.exit_codes[code] = self.exit_codes.get(code, 0) + 1
+        self.wait.observe(wait)
+        self.exec.observe(duration)
+
+
+@dataclass
+class ToolStats(ProcessStats):
+    calls: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    in_flight: int = 0
+    latency: Histogram = field(default_factory=Histogram)
+
+
+_lock = threading.Lock()
+_tools: Dict[str, ToolStats] = {}
+_binaries: Dict[str, ProcessStats] = {}
+_gauges = {"processes_running": 0, "processes_waiting": 0}
+_started = time.time()
+
+_current_tool: ContextVar[Optional[str]] = ContextVar("recon_metrics_tool", default=None)
+
+
+def _tool(name: str) -> ToolStats:
+    stats = _tools.get(name)
+    if stats is None:
+        stats = _tools[name] = ToolStats()
+    return stats
+
+
+@contextmanager
+def track(tool_name: str):
+    """Time one tool call and attribute subprocesses started inside it"""
+    token = _current_tool.set(tool_name)
+    start = time.monotonic()
+    with _lock:
+        _tool(tool_name).in_flight += 1
+    try:
+        yield
+    finally:
+        elapsed = time.monotonic() - start
+        with _lock:
+            stats = _tool(tool_name)
+            stats.in_flight -= 1
+            stats.calls += 1
+            stats.latency.observe(elapsed)
+        _current_tool.reset(token)
+
+
+def record_error(tool_name: str) -> None:
+    with _lock:
+        _tool(tool_name).errors += 1
+
+
+def record_cache_hit(tool_name: str) -> None:
+    """A call answered from the result cache (also counted as a call)"""
+    with _lock:
+        stats = _tool(tool_name)
+        stats.cache_hits += 1
+        stats.calls += 1
+        stats.latency.observe(0.0)
+
+
+def record_coalesced(tool_name: str, elapsed: float) -> None:
+    """A call that joined an identical in-flight run instead of starting its own"""
+    with _lock:
+        stats = _tool(tool_name)
+        stats.coalesced += 1
+        stats.calls += 1
+        stats.latency.observe(elapsed)
+
+
+def process_waiting(delta: int) -> None:
+    with _lock:
+        _gauges["processes_waiting"] += delta
+
+
+def process_running(delta: int) -> None:
+    with _lock:
+        _gauges["processes_running"] += delta
+
+
+def record_process(binary: str, wait: float, duration: float, returncode, stdout_bytes: int,
+                   stderr_bytes: int, timed_out: bool) -> None:
+    """Called by the executor once per finished (or killed) subprocess"""
+    args = (wait, duration, returncode, stdout_bytes, stderr_bytes, timed_out)
+    with _lock:
+        if binary not in _binaries:
+            _binaries[binary] = ProcessStats()
+        _binaries[binary].add(*args)
+        tool_name = _current_tool.get()
+        if tool_name:
+            _tool(tool_name).add(*args)
+
+
+def reset() -> None:
+    global _started
+    with _lock:
+        _tools.clear()
+        _binaries.clear()
+        _started = time.time()
+
+
+def _quantiles(histogram: Histogram) -> str:
+    if not histogram.count:
+        return "-"
+    p50, p95 = histogram.quantile(0.5), histogram.quantile(0.95)
+    return f"p50<={p50:g}s p95<={p95:g}s mean={histogram.mean:.2f}s"
+
+
+def snapshot() -> str:
+    """Human-readable summary for the server_stats tool"""
+    with _lock:
+        lines = [
+            f"Uptime {time.time() - _started:.0f}s; subprocesses running {_gauges['processes_running']}, "
+            f"waiting for a slot {_gauges['processes_waiting']}",
+        ]
+        if not _tools and not _binaries:
+            lines.append("No tool calls recorded yet.")
+        for name in sorted(_tools):
+            stats = _tools[name]
+            lines.extend([
+                "",
+                f"{name}: {stats.calls} calls ({stats.errors} errors, {stats.cache_hits} cache hits, "
+                f"{stats.coalesced} coalesced, {stats.in_flight} in flight)",
+                f"  latency    {_quantiles(stats.latency)}",
+            ])
+            if stats.processes:
+                lines.extend([
+                    f"  wait       {_quantiles(stats.wait)}",
+                    f"  exec       {_quantiles(stats.exec)}",
+                    f"  processes  {stats.processes} ({stats.timeouts} timed out), exit codes "
+                    + ", ".join(f"{code}:{count}" for code, count in sorted(stats.exit_codes.items())),
+                    f"  output     {stats.stdout_bytes} stdout / {stats.stderr_bytes} stderr bytes",
+                ])
+        if _binaries:
+            lines.extend(["", "Per binary:"])
+            for name in sorted(_binaries):
+                stats = _binaries[name]
+                lines.append(
+                    f"  {name}: {stats.processes} runs, wait {_quantiles(stats.wait)}, "
+                    f"exec {_quantiles(stats.exec)}, {stats.timeouts} timed out"
+                )
+        return "\n".join(lines)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(metric: str, labels: str, histogram: Histogram) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{metric}_sum{{{labels}}} {histogram.sum:.6f}")
+    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def _family(out: List[str], metric: str, kind: str, samples: List[str]) -> None:
+    """One metric family: its TYPE line and all of its samples, which must stay contiguous"""
+    out.append(f"# TYPE {metric} {kind}")
+    out.extend(samples)
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    out: List[str] = []
+    with _lock:
+        tools = [(f'tool="{_escape(name)}"', stats) for name, stats in sorted(_tools.items())]
+        binaries = [(f'binary="{_escape(name)}"', stats) for name, stats in sorted(_binaries.items())]
+        for metric, attribute in (
+            ("recon_tool_calls_total", "calls"),
+            ("recon_tool_errors_total", "errors"),
+            ("recon_tool_cache_hits_total", "cache_hits"),
+            ("recon_tool_coalesced_total", "coalesced"),
+            ("recon_tool_subprocesses_total", "processes"),
+        ):
+            _family(out, metric, "counter", [
+                f"{metric}{{{labels}}} {getattr(stats, attribute)}" for labels, stats in tools
+            ])
+        _family(out, "recon_tool_in_flight", "gauge", [
+            f"recon_tool_in_flight{{{labels}}} {stats.in_flight}" for labels, stats in tools
+        ])
+        _family(out, "recon_tool_output_bytes_total", "counter", [
+            f'recon_tool_output_bytes_total{{{labels},stream="{stream}"}} {getattr(stats, stream + "_bytes")}'
+            for labels, stats in tools for stream in ("stdout", "stderr")
+        ])
+        _family(out, "recon_tool_exit_codes_total", "counter", [
+            f'recon_tool_exit_codes_total{{{labels},code="{code}"}} {count}'
+            for labels, stats in tools for code, count in sorted(stats.exit_codes.items())
+        ])
+        for metric, attribute in (
+            ("recon_tool_duration_seconds", "latency"),
+            ("recon_tool_wait_seconds", "wait"),
+            ("recon_tool_exec_seconds", "exec"),
+        ):
+            _family(out, metric, "histogram", [
+                line for labels, stats in tools
+                for line in _histogram_lines(metric, labels, getattr(stats, attribute))
+            ])
+        for metric, attribute in (
+            ("recon_binary_processes_total", "processes"),
+            ("recon_binary_timeouts_total", "timeouts"),
+        ):
+            _family(out, metric, "counter", [
+                f"{metric}{{{labels}}} {getattr(stats, attribute)}" for labels, stats in binaries
+            ])
+        for metric, attribute in (("recon_binary_wait_seconds", "wait"), ("recon_binary_exec_seconds", "exec")):
+            _family(out, metric, "histogram", [
+                line for labels, stats in binaries
+                for line in _histogram_lines(metric, labels, getattr(stats, attribute))
+            ])
+        for gauge in ("processes_running", "processes_waiting"):
+            _family(out, f"recon_{gauge}", "gauge", [f"recon_{gauge} {_gauges[gauge]}"])
+    return "\n".join(out) + "\n"
+
+
+def write_prometheus(path: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as handle:
+        handle.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def start_exporter(path: Optional[str] = None, interval: Optional[float] = None) -> Optional[threading.Thread]:
+    """
+    Write the Prometheus text file every `interval` seconds from a daemon
+    thread. Configured by RECON_METRICS_FILE / RECON_METRICS_INTERVAL;
+    does nothing when no path is set.
+    """
+    path = path or os.environ.get("RECON_METRICS_FILE")
+    if not path:
+        return None
+    interval = interval or float(os.environ.get("RECON_METRICS_INTERVAL", "15"))
+
+    def loop():
+        while True:
+            try:
+                write_prometheus(path)
+            except OSError:
+                pass
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="recon-metrics-exporter", daemon=True)
+    thread.start()
+    return thread
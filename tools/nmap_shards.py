@@ -0,0 +1,111 @@
+"""
+Target sharding and resumable checkpoints for large nmap sweeps.
+
+Big networks are split into fixed-size subnets and loose host lists into
+chunks, so several nmap workers can run side by side. Finished shards are
+appended to a JSON-lines checkpoint; re-running the same sweep skips them.
+"""
+
+import hashlib
+import ipaddress
+import json
+import os
+import re
+from typing import Any, Dict, List
+
+CHECKPOINT_DIR = os.environ.get(
+    "RECON_NMAP_CHECKPOINTS",
+    os.path.join(os.path.expanduser("~"), ".cache", "recon-agent", "nmap-checkpoints"),
+)
+
+# Upper bound on shards per sweep; checked before any subnet is enumerated
+MAX_SHARDS = int(os.environ.get("RECON_NMAP_MAX_SHARDS", "4096"))
+
+
+class ShardError(ValueError):
+    """Target specification that would need more than MAX_SHARDS shards"""
+
+
+def split_targets(target: str, shard_size: int, max_shards: int = MAX_SHARDS) -> List[List[str]]:
+    """
+    Split an nmap target specification into shards of at most ~shard_size hosts.
+
+    CIDR networks larger than shard_size become equal subnets; everything
+    else (single IPs, hostnames, nmap ranges) is grouped in order. Raises
+    ShardError if the sweep would need more than max_shards shards.
+    """
+    shard_size = max(1, shard_size)
+    # Largest power of two not above shard_size, so subnets stay aligned
+    subnet_bits = shard_size.bit_length() - 1
+    networks = []
+    loose: List[str] = []
+
+    for token in re.split(r"[\s,]+", target.strip()):
+        if not token:
+            continue
+        try:
+            network = ipaddress.ip_network(token, strict=False)
+        except ValueError:
+            network = None
+        if network is not None and network.num_addresses > shard_size:
+            networks.append((network, max(network.prefixlen, network.max_prefixlen - subnet_bits)))
+            continue
+        loose.append(token)
+
+    # Count first: a huge IPv6 network would otherwise be enumerated subnet by subnet
+    count = sum(1 << (new_prefix - network.prefixlen) for network, new_prefix in networks)
+    count += -(-len(loose) // shard_size)
+    if count > max_shards:
+        raise ShardError(
+            f"{target} would need {count} shards of {shard_size} hosts (limit {max_shards}); "
+            f"raise shard_size or split the sweep"
+        )
+
+    shards: List[List[str]] = []
+    for network, new_prefix in networks:
+        shards.extend([str(subnet)] for subnet in network.subnets(new_prefix=new_prefix))
+    for start in range(0, len(loose), shard_size):
+        shards.append(loose[start:start + shard_size])
+    return shards
+
+
+class Checkpoint:
+    """Append-only record of finished shards for one (target, flags) sweep"""
+
+    def __init__(self, target: str, kwargs: str, shard_size: int, directory: str = None):
+        identity = json.dumps([target, kwargs, shard_size])
+        self.sweep_id = hashlib.sha256(identity.encode()).hexdigest()[:16]
+        self.path = os.path.join(directory or CHECKPOINT_DIR, f"{self.sweep_id}.jsonl")
+
+    def load(self) -> Dict[int, Dict[str, Any]]:
+        """Completed shards by index; a torn last line from a crash is ignored"""
+        completed: Dict[int, Dict[str, Any]] = {}
+        try:
+            with open(self.path) as handle:
+                for line in handle:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    completed[entry["shard"]] = entry
+        except OSError:
+            pass
+        return completed
+
+    def record(self, shard_index: int, targets: List[str], hosts: List[Dict[str, Any]], summary: str) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        entry = {"shard": shard_index, "targets": targets, "hosts": hosts, "summary": summary}
+        with open(self.path, "ab+") as handle:
+            # Start on a fresh line after a torn write, or this entry would be glued to it
+            if handle.seek(0, os.SEEK_END):
+                handle.seek(-1, os.SEEK_END)
+                if handle.read(1) != b"\n":
+                    handle.write(b"\n")
+            handle.write(json.dumps(entry).encode() + b"\n")
+            handle.flush()
+
+    def clear(self) -> None:
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
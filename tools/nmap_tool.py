@@ -1,24 +1,62 @@
 import asyncio
+import ipaddress
+import os
 import shlex
+import tempfile
+import time
+
+from tools import batch, executor, inventory, nmap_shards, nmap_xml, progress
+
+# Output options that would clash with the XML pipe used by structured mode
+OUTPUT_FLAGS = ("-oX", "-oN", "-oG", "-oA", "-oS")
 
 def register_tool():
     """Register the Nmap tool with a normalized schema"""
     
-    async def nmap_scan(target: str, kwargs: str = "") -> str:
+    async def nmap_scan(
+        target: str = "",
+        kwargs: str = "",
+        timeout: int = 3600,
+        structured: bool = False,
+        include_raw: bool = False,
+        workers: int = 0,
+        shard_size: int = 256,
+        resume: bool = True,
+        delta: bool = False,
+        skip_recent: int = 0,
+        targets: list = None,
+    ) -> str:
         """
         Perform a network scan using Nmap.
 
         Args:
             target: Host or network to scan (e.g., 192.168.1.1, example.com, 10.0.0.0/24)
             kwargs: Extra Nmap flags (e.g., '-sS -T4 -p 80,443 -A')
+            timeout: Wall-clock limit in seconds (0 for no limit)
+            structured: Parse nmap's XML output into a condensed per-host table
+            include_raw: With structured, also append nmap's normal text output
+            workers: Run a sharded sweep with this many parallel nmap processes (0 = single process)
+            shard_size: Hosts per shard in sharded mode
+            resume: Skip shards already finished by an interrupted run of the same sweep
+            delta: Only report ports that opened, closed or changed service since the last scan
+                with the same flags (implies structured output)
+            skip_recent: Skip IP targets scanned with the same flags within this many seconds
+            targets: More hosts/networks to scan; nmap takes them all in one run and reports each host
 
         Examples:
             - nmap_scan("scanme.nmap.org", "-sV -p 80,443")
             - nmap_scan("192.168.1.0/24", "-sS -T4")
+            - nmap_scan("192.168.1.0/24", "-sV", structured=True)
+            - nmap_scan("10.0.0.0/16", "-sS -p 22,80,443", workers=4)
+            - nmap_scan("10.0.0.5 10.0.0.6", "-sV", delta=True, skip_recent=86400)
+            - nmap_scan(targets=["10.0.0.5", "10.0.0.6", "scanme.nmap.org"], kwargs="-F", structured=True)
         """
         
-        if not target:
+        # nmap scans many targets natively, so a batch is one process, not one call per host
+        names = batch.merge_targets(target, targets)
+        if not names:
             return "Error: target parameter is required"
+        target = " ".join(names)
         
         # Build command
         cmd = ["sudo", "nmap"]
@@ -31,23 +69,207 @@ def register_tool():
             except ValueError as e:
                 return f"Error parsing Nmap flags: {str(e)}"
         
+        # The inventory needs parsed hosts, so delta/skip runs are always structured
+        structured = structured or delta or skip_recent > 0
+        if structured or workers > 0:
+            if any(arg.startswith(OUTPUT_FLAGS) for arg in cmd):
+                return "Error: structured and sharded modes manage nmap output themselves; remove -oX/-oN/-oG/-oA flags"
+            profile = " ".join(cmd[2:])
+            target, skipped = await skip_fresh_targets(target, profile, skip_recent)
+            if not target:
+                return f"Nmap scan with args [{kwargs}]: nothing to scan\n\n{skipped}"
+            if workers > 0:
+                result = await sharded_scan(cmd, target, kwargs, timeout, workers, shard_size, resume, delta, profile)
+            else:
+                result = await structured_scan(cmd, target, kwargs, timeout, include_raw, delta, profile)
+            return result + (f"\n\n{skipped}" if skipped else "")
+        
         # Add target last
-        cmd.append(target)
+        cmd.extend(target.split())
         
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            process_result = await executor.run_command(cmd, timeout=timeout or None)
+            result = process_result.output()
             
-            stdout, stderr = await process.communicate()
-            result = stdout.decode() if stdout else stderr.decode()
+            return f"Nmap scan on {target} with args [{kwargs}]:\n\n{result}\n\n[{process_result.summary()}]"
             
-            return f"Nmap scan on {target} with args [{kwargs}]:\n\n{result}"
+        except Exception as e:
+            return f"Error executing Nmap: {str(e)}"
+    
+    async def run_xml_scan(cmd, targets, timeout, raw_path=None):
+        """Run nmap with XML to a pipe and parse hosts as they complete"""
+        stream = nmap_xml.NmapXMLStream()
+        cmd = list(cmd)
+        if raw_path:
+            cmd.extend(["-oN", raw_path])
+        cmd.extend(["-oX", "-"])
+        cmd.extend(targets)
+        tailed = progress.current_output() is not None
+        
+        async def feed(line):
+            seen = len(stream.hosts)
+            stream.feed(line + "\n")
+            if tailed:
+                # A background job tails hosts as they complete, not raw XML
+                for host in stream.hosts[seen:]:
+                    table = nmap_xml.format_table([host])
+                    if table:
+                        await progress.output(table)
+        
+        process_result = await executor.run_command(cmd, timeout=timeout or None, on_stdout_line=feed)
+        return stream, process_result
+    
+    async def skip_fresh_targets(target, profile, skip_recent):
+        """Drop IP targets the inventory saw with the same flags within skip_recent seconds"""
+        if skip_recent <= 0:
+            return target, ""
+        tokens = target.split()
+        addresses = []
+        for token in tokens:
+            try:
+                addresses.append(str(ipaddress.ip_address(token)))
+            except ValueError:
+                continue
+        fresh = await inventory.recently_observed("port", addresses, skip_recent, context=profile)
+        if not fresh:
+            return target, ""
+        lines = [f"Skipped {len(fresh)} hosts scanned with the same flags in the last {skip_recent}s (known open ports):"]
+        for address in sorted(fresh):
+            ports = await inventory.assets("port", address)
+            lines.append(f"  {address}: " + (", ".join(f"{port} {service}".strip() for port, service in ports) or "none"))
+        return " ".join(token for token in tokens if token not in fresh), "\n".join(lines)
+    
+    async def record_hosts(hosts, profile, complete):
+        """Store open ports (and name -> IP links) in the asset inventory"""
+        changes = []
+        for host in hosts:
+            if host["state"] != "up":
+                continue
+            address = next((a["addr"] for a in host["addresses"] if a["type"] in ("ipv4", "ipv6")), None)
+            if not address:
+                continue
+            ports = {f"{port['port']}/{port['protocol']}": port["service"] for port in host["ports"]}
+            changes.append(await inventory.observe("port", address, ports, context=profile, complete=complete))
+            for hostname in host["hostnames"]:
+                if hostname:
+                    await inventory.observe("ip", hostname.lower(), {address: ""}, complete=False)
+        return changes
+    
+    async def structured_scan(cmd, target, kwargs, timeout, include_raw, delta=False, profile=""):
+        """Single nmap process, condensed per-host table"""
+        raw_path = None
+        if include_raw:
+            handle, raw_path = tempfile.mkstemp(prefix="recon-nmap-", suffix=".txt")
+            os.close(handle)
+        
+        try:
+            stream, process_result = await run_xml_scan(cmd, target.split(), timeout, raw_path)
+            changes = await record_hosts(stream.hosts, profile, process_result.ok and not stream.error)
             
+            up = sum(1 for host in stream.hosts if host["state"] == "up")
+            scanned = stream.stats.get("hosts_total", str(len(stream.hosts)))
+            elapsed = stream.stats.get("elapsed", f"{process_result.duration:.1f}")
+            sections = [
+                f"Nmap structured scan on {target} with args [{kwargs}]: "
+                f"{up} hosts up of {scanned} scanned in {elapsed}s"
+            ]
+            table = inventory.format_deltas(changes) if delta else nmap_xml.format_table(stream.hosts)
+            if table:
+                sections.append(table)
+            if stream.error:
+                sections.append(stream.error)
+            if not stream.hosts and process_result.stderr:
+                sections.append(process_result.stderr.decode(errors="replace").strip())
+            if raw_path:
+                with open(raw_path, errors="replace") as raw:
+                    sections.append("Raw nmap output:\n" + raw.read())
+            sections.append(f"[{process_result.summary()}]")
+            return "\n\n".join(sections)
+        
         except Exception as e:
             return f"Error executing Nmap: {str(e)}"
+        finally:
+            if raw_path:
+                try:
+                    os.unlink(raw_path)
+                except OSError:
+                    pass
+    
+    async def sharded_scan(cmd, target, kwargs, timeout, workers, shard_size, resume, delta=False, profile=""):
+        """Split the target into shards, scan them in parallel and merge the results"""
+        try:
+            shards = nmap_shards.split_targets(target, shard_size)
+        except nmap_shards.ShardError as e:
+            return f"Error: {str(e)}"
+        if not shards:
+            return "Error: no scan targets found"
+        
+        checkpoint = nmap_shards.Checkpoint(target, kwargs, shard_size)
+        if not resume:
+            checkpoint.clear()
+        completed = checkpoint.load()
+        resumed = len(completed)
+        pending = [index for index in range(len(shards)) if index not in completed]
+        failures = {}
+        semaphore = asyncio.Semaphore(max(1, workers))
+        finished = [resumed]
+        start = time.monotonic()
+        
+        async def run_shard(index):
+            shard = shards[index]
+            async with semaphore:
+                try:
+                    stream, process_result = await run_xml_scan(cmd, shard, timeout)
+                except Exception as e:
+                    failures[index] = str(e)
+                    stream = process_result = None
+            
+            if process_result is not None:
+                live = [host for host in stream.hosts if host["state"] == "up"]
+                if process_result.ok and not stream.error:
+                    summary = f"{len(live)} hosts up in {process_result.duration:.1f}s"
+                    entry = {"shard": index, "targets": shard, "hosts": live, "summary": summary}
+                    completed[index] = entry
+                    checkpoint.record(index, shard, live, summary)
+                else:
+                    failures[index] = stream.error or process_result.summary()
+            
+            finished[0] += 1
+            status = completed[index]["summary"] if index in completed else f"failed: {failures[index]}"
+            await progress.report(
+                f"shard {index + 1}/{len(shards)} [{' '.join(shard)}]: {status}",
+                progress=finished[0],
+                total=len(shards),
+            )
+        
+        await asyncio.gather(*(run_shard(index) for index in pending))
+        
+        hosts = [host for index in sorted(completed) for host in completed[index]["hosts"]]
+        lines = [
+            f"Nmap sharded scan on {target} with args [{kwargs}]: {len(shards)} shards, "
+            f"{workers} workers, {resumed} resumed from checkpoint, {len(failures)} failed; "
+            f"{len(hosts)} hosts up in {time.monotonic() - start:.1f}s",
+            "",
+            "Shards:",
+        ]
+        for index, shard in enumerate(shards):
+            if index in completed:
+                status = completed[index]["summary"] + ("" if index in pending else " (from checkpoint)")
+            else:
+                status = f"failed: {failures.get(index, 'not run')}"
+            lines.append(f"  {index + 1}. {' '.join(shard)}: {status}")
+        
+        changes = await record_hosts(hosts, profile, True)
+        table = inventory.format_deltas(changes) if delta else nmap_xml.format_table(hosts)
+        if table:
+            lines.extend(["", table])
+        
+        if failures:
+            lines.extend(["", f"{len(failures)} shards failed; re-run the same call to retry only those "
+                              f"(checkpoint: {checkpoint.path})"])
+        else:
+            checkpoint.clear()
+        return "\n".join(lines)
     
     # MCP schema (normalized)
     nmap_scan._mcp_schema = {
@@ -56,13 +278,58 @@ def register_tool():
         "parameters": {
             "target": {
                 "type": "string",
-                "description": "Host or network to scan (e.g., 192.168.1.1, example.com, 10.0.0.0/24)",
-                "required": True
+                "description": "Host or network to scan (e.g., 192.168.1.1, example.com, 10.0.0.0/24); optional when targets is given",
+                "default": ""
             },
             "kwargs": {
                 "type": "string",
                 "description": "Extra Nmap flags (e.g., '-sS -T4 -p 80,443 -A')",
                 "default": ""
+            },
+            "timeout": {
+                "type": "integer",
+                "description": "Wall-clock limit in seconds; the process group is killed when it expires (0 for no limit)",
+                "default": 3600
+            },
+            "structured": {
+                "type": "boolean",
+                "description": "Run with XML output and return a condensed per-host table of open ports, services, versions and scripts",
+                "default": False
+            },
+            "include_raw": {
+                "type": "boolean",
+                "description": "In structured mode, also append nmap's normal human-readable output",
+                "default": False
+            },
+            "workers": {
+                "type": "integer",
+                "description": "Sharded mode: split large networks/host lists and run this many nmap processes in parallel (0 = single process). Timeout applies per shard; output is structured.",
+                "default": 0
+            },
+            "shard_size": {
+                "type": "integer",
+                "description": "Sharded mode: maximum hosts per shard (networks are split into aligned subnets); a sweep may have at most 4096 shards",
+                "default": 256
+            },
+            "resume": {
+                "type": "boolean",
+                "description": "Sharded mode: skip shards already completed by an interrupted run of the same sweep",
+                "default": True
+            },
+            "delta": {
+                "type": "boolean",
+                "description": "Only report ports that are new, closed or changed since the last scan of each host with the same flags (local asset inventory; implies structured)",
+                "default": False
+            },
+            "skip_recent": {
+                "type": "integer",
+                "description": "Skip IP targets already scanned with the same flags within this many seconds and list their known ports instead (0 = scan everything)",
+                "default": 0
+            },
+            "targets": {
+                "type": "array",
+                "description": "Several hosts/networks to scan in one nmap run (combined with target); results are reported per host",
+                "default": []
             }
         },
         "examples": [
@@ -73,6 +340,18 @@ def register_tool():
             {
                 "input": {"target": "192.168.1.0/24", "kwargs": "-sS -T4"},
                 "description": "Stealth scan of a subnet with aggressive timing"
+            },
+            {
+                "input": {"target": "192.168.1.0/24", "kwargs": "-sV", "structured": True},
+                "description": "Version scan of a subnet returned as a compact per-host table"
+            },
+            {
+                "input": {"target": "10.0.0.0/16", "kwargs": "-sS -p 22,80,443", "workers": 4},
+                "description": "Sweep a /16 as 256 shards of /24 with four parallel nmap workers"
+            },
+            {
+                "input": {"target": "10.0.0.5 10.0.0.6", "kwargs": "-sV", "delta": True, "skip_recent": 86400},
+                "description": "Daily monitoring: report only port changes, skipping hosts checked in the last day"
             }
         ]
     }
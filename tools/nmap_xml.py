@@ -0,0 +1,121 @@
+"""
+Incremental parser for nmap's XML output (-oX -).
+
+Lines are fed as nmap writes them; every completed <host> element is
+turned into a compact record and then discarded, so memory stays flat no
+matter how many hosts a scan covers.
+"""
+
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+
+# Script output can be pages long; the table only needs the gist
+SCRIPT_OUTPUT_LIMIT = 200
+
+
+def _service_text(service: Optional[ET.Element]) -> str:
+    if service is None:
+        return ""
+    parts = [service.get("name", "")]
+    for attr in ("product", "version", "extrainfo"):
+        value = service.get(attr)
+        if value:
+            parts.append(f"({value})" if attr == "extrainfo" else value)
+    return " ".join(part for part in parts if part)
+
+
+def _script_records(parent: Optional[ET.Element]) -> List[Dict[str, str]]:
+    if parent is None:
+        return []
+    scripts = []
+    for script in parent.findall("script"):
+        output = " ".join((script.get("output") or "").split())
+        if len(output) > SCRIPT_OUTPUT_LIMIT:
+            output = output[:SCRIPT_OUTPUT_LIMIT] + "..."
+        scripts.append({"id": script.get("id", ""), "output": output})
+    return scripts
+
+
+def host_record(host: ET.Element) -> Dict[str, Any]:
+    """Reduce one <host> element to the fields agents actually use"""
+    status = host.find("status")
+    record: Dict[str, Any] = {
+        "addresses": [
+            {"addr": a.get("addr", ""), "type": a.get("addrtype", "")}
+            for a in host.findall("address")
+        ],
+        "hostnames": [h.get("name", "") for h in host.findall("hostnames/hostname")],
+        "state": status.get("state", "unknown") if status is not None else "unknown",
+        "ports": [],
+        "scripts": _script_records(host.find("hostscript")),
+        "os": "",
+    }
+    for port in host.findall("ports/port"):
+        state = port.find("state")
+        port_state = state.get("state", "") if state is not None else ""
+        if not port_state.startswith("open"):
+            continue
+        record["ports"].append({
+            "port": int(port.get("portid", "0")),
+            "protocol": port.get("protocol", ""),
+            "state": port_state,
+            "service": _service_text(port.find("service")),
+            "scripts": _script_records(port),
+        })
+    osmatch = host.find("os/osmatch")
+    if osmatch is not None:
+        record["os"] = f"{osmatch.get('name', '')} ({osmatch.get('accuracy', '?')}%)"
+    return record
+
+
+class NmapXMLStream:
+    """Feed nmap XML line by line; collects compact host records and run stats"""
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root: Optional[ET.Element] = None
+        self.hosts: List[Dict[str, Any]] = []
+        self.stats: Dict[str, str] = {}
+        self.error: Optional[str] = None
+
+    def feed(self, data: str) -> None:
+        if self.error:
+            return
+        try:
+            self._parser.feed(data)
+            for event, element in self._parser.read_events():
+                if event == "start" and self._root is None:
+                    self._root = element
+                elif event == "end" and element.tag == "host":
+                    self.hosts.append(host_record(element))
+                    # Drop the parsed subtree so the document never accumulates
+                    if self._root is not None:
+                        self._root.clear()
+                elif event == "end" and element.tag == "finished":
+                    self.stats.update(element.attrib)
+                elif event == "end" and element.tag == "hosts":
+                    self.stats.update({f"hosts_{k}": v for k, v in element.attrib.items()})
+        except ET.ParseError as e:
+            self.error = f"Malformed nmap XML: {e}"
+
+
+def format_table(hosts: List[Dict[str, Any]]) -> str:
+    """Condensed per-host listing of open ports, services and scripts"""
+    lines = []
+    for host in hosts:
+        if host["state"] != "up":
+            continue
+        addresses = ", ".join(a["addr"] for a in host["addresses"] if a["type"] != "mac")
+        names = f" ({', '.join(host['hostnames'])})" if host["hostnames"] else ""
+        os_text = f" os: {host['os']}" if host["os"] else ""
+        lines.append(f"{addresses}{names}{os_text}")
+        if not host["ports"]:
+            lines.append("  no open ports")
+        for port in host["ports"]:
+            state = "" if port["state"] == "open" else f" [{port['state']}]"
+            lines.append(f"  {port['port']}/{port['protocol']}{state}\t{port['service']}".rstrip())
+            for script in port["scripts"]:
+                lines.append(f"    {script['id']}: {script['output']}")
+        for script in host["scripts"]:
+            lines.append(f"  {script['id']}: {script['output']}")
+    return "\n".join(lines)
@@ -1,55 +1,166 @@
 import asyncio
 import shlex
+import time
+from typing import Any, Dict, Optional
+
+from tools import batch, dns_client, executor
+
+NSLOOKUP_LABELS = {
+    "MX": "mail exchanger",
+    "TXT": "text",
+    "NS": "nameserver",
+    "CNAME": "canonical name",
+    "PTR": "name",
+}
+
+
+def parse_native_args(args_list) -> Optional[Dict[str, Any]]:
+    """
+    Map nslookup arguments onto the native resolver.
+
+    Understands -type=/-query=/-q=, -port= and a positional server. Returns
+    None for anything else so the caller falls back to the nslookup binary.
+    """
+    options = {"rtype": None, "server": None, "port": 53}
+    for token in args_list:
+        if token.startswith("-") and "=" in token:
+            key, value = token[1:].split("=", 1)
+            key = key.lower()
+            if key in ("type", "query", "querytype", "q") and value.upper() in dns_client.RECORD_TYPES:
+                options["rtype"] = value.upper()
+            elif key == "port" and value.isdigit():
+                options["port"] = int(value)
+            else:
+                return None
+        elif not token.startswith("-") and options["server"] is None:
+            options["server"] = token
+        else:
+            return None
+    return options
+
+
+def format_record(record) -> str:
+    name = record.name.rstrip(".")
+    if record.rtype in ("A", "AAAA"):
+        return f"Name:\t{name}\nAddress: {record.data}"
+    if record.rtype == "SOA":
+        mname, rname, serial, refresh, retry, expire, minimum = record.data.split()
+        return (f"{name}\n\torigin = {mname.rstrip('.')}\n\tmail addr = {rname.rstrip('.')}\n"
+                f"\tserial = {serial}\n\trefresh = {refresh}\n\tretry = {retry}\n"
+                f"\texpire = {expire}\n\tminimum = {minimum}")
+    label = NSLOOKUP_LABELS.get(record.rtype, record.rtype)
+    return f"{name}\t{label} = {record.data}"
+
 
 def register_tool():
     """Register the NSLOOKUP tool with a normalized schema"""
     
-    async def nslookup_query(target: str, kwargs: str = "") -> str:
+    async def nslookup_query(
+        target: str = "",
+        kwargs: str = "",
+        timeout: int = 30,
+        targets: list = None,
+        concurrency: int = 50,
+    ) -> str:
         """
         Perform DNS lookups using nslookup.
 
+        Common lookups (-type=, -port=, a custom server) are answered by the
+        built-in async resolver; other options run the nslookup binary.
+
         Args:
             target: Domain or IP to look up (e.g., example.com or 8.8.8.8)
             kwargs: Extra nslookup flags (e.g., '-type=MX 8.8.8.8')
+            timeout: Wall-clock limit in seconds (0 for no limit)
+            targets: Several domains or IPs to look up with the same flags, one section each
+            concurrency: Maximum lookups in flight for a batch
 
         Examples:
             - nslookup_query("example.com", "-type=MX")
             - nslookup_query("8.8.8.8", "")
             - nslookup_query("openai.com", "-type=TXT 1.1.1.1")
+            - nslookup_query(targets=["example.com", "example.org"], kwargs="-type=NS")
         """
         
-        if not target:
+        names = batch.merge_targets(target, targets)
+        if not names:
             return "Error: target parameter is required"
+        if len(names) > 1:
+            return await batch.run_batch(
+                f"NSLOOKUP with args [{kwargs or 'default'}]", names,
+                lambda name: nslookup_query(name, kwargs, timeout), concurrency,
+            )
+        target = names[0]
+        
+        try:
+            args_list = shlex.split(kwargs) if kwargs else []
+        except ValueError as e:
+            return f"Error parsing nslookup flags: {str(e)}"
+        
+        # Answer in-process when possible; only unusual options spawn nslookup
+        options = parse_native_args(args_list)
+        if options is not None:
+            return await native_lookup(target, kwargs, options, timeout)
         
         # Build command
         cmd = ["nslookup"]
-        
-        # Add kwargs if provided
-        if kwargs:
-            try:
-                args_list = shlex.split(kwargs)
-                cmd.extend(args_list)
-            except ValueError as e:
-                return f"Error parsing nslookup flags: {str(e)}"
+        cmd.extend(args_list)
         
         # Add target last
         cmd.append(target)
         
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            result = stdout.decode() if stdout else stderr.decode()
+            process_result = await executor.run_command(cmd, timeout=timeout or None)
+            result = process_result.output()
             
-            return f"NSLOOKUP for {target} with args [{kwargs or 'default'}]:\n\n{result}"
+            return f"NSLOOKUP for {target} with args [{kwargs or 'default'}]:\n\n{result}\n\n[{process_result.summary()}]"
             
         except Exception as e:
             return f"Error executing nslookup: {str(e)}"
     
+    async def native_lookup(target, kwargs, options, timeout):
+        """Resolve with the built-in DNS client and format like nslookup"""
+        header = f"NSLOOKUP for {target} with args [{kwargs or 'default'}]:\n\n"
+        start = time.monotonic()
+        
+        if dns_client.is_ip_address(target) and options["rtype"] in (None, "PTR"):
+            # Like nslookup, an address is looked up by its in-addr.arpa/ip6.arpa name
+            questions = [(dns_client.reverse_name(target), "PTR")]
+        elif options["rtype"]:
+            questions = [(target, options["rtype"])]
+        else:
+            # nslookup's default lookup asks for both address families
+            questions = [(target, "A"), (target, "AAAA")]
+        
+        try:
+            resolver = dns_client.get_resolver(options["server"], options["port"])
+            responses = await asyncio.wait_for(
+                asyncio.gather(*(resolver.query(name, rtype) for name, rtype in questions)),
+                timeout=timeout or None,
+            )
+        except (dns_client.DNSTimeout, asyncio.TimeoutError):
+            return (header + ";; connection timed out; no servers could be reached\n\n"
+                    f"[native resolver: timeout after {time.monotonic() - start:.1f}s]")
+        except Exception as e:
+            return f"Error executing DNS lookup: {str(e)}"
+        
+        server, _, port = responses[0].server.rpartition("#")
+        lines = [f"Server:\t\t{server}", f"Address:\t{server}#{port}", ""]
+        answers = [record for response in responses for record in response.answers]
+        failed = [response for response in responses if response.rcode != 0]
+        if failed and not answers:
+            lines.append(f"** server can't find {target}: {failed[0].status}")
+        else:
+            if not all(response.authoritative for response in responses):
+                lines.append("Non-authoritative answer:")
+            lines.extend(format_record(record) for record in answers)
+            if not answers:
+                lines.append(f"*** Can't find {target}: No answer")
+        
+        status = failed[0].status if failed else "NOERROR"
+        elapsed_ms = int((time.monotonic() - start) * 1000)
+        return header + "\n".join(lines) + f"\n\n[native resolver: {status} in {elapsed_ms} ms]"
+    
     # MCP schema (normalized)
     nslookup_query._mcp_schema = {
         "name": "nslookup_query",
@@ -57,13 +168,28 @@ def register_tool():
         "parameters": {
             "target": {
                 "type": "string", 
-                "description": "Domain or IP to look up (e.g., example.com or 8.8.8.8)",
-                "required": True
+                "description": "Domain or IP to look up (e.g., example.com or 8.8.8.8); optional when targets is given",
+                "default": ""
             },
             "kwargs": {
                 "type": "string", 
                 "description": "Extra nslookup flags (e.g., '-type=MX 8.8.8.8' or '-type=TXT 1.1.1.1')",
                 "default": ""
+            },
+            "timeout": {
+                "type": "integer",
+                "description": "Wall-clock limit in seconds; the process group is killed when it expires (0 for no limit)",
+                "default": 30
+            },
+            "targets": {
+                "type": "array",
+                "description": "Several domains or IPs to look up with the same flags in one call; the response has one section per target",
+                "default": []
+            },
+            "concurrency": {
+                "type": "integer",
+                "description": "Maximum lookups in flight when targets holds several names",
+                "default": 50
             }
         },
         "examples": [
@@ -0,0 +1,197 @@
+"""
+Bounded-memory capture of one subprocess output stream.
+
+Small outputs are kept in memory exactly as before. Once a stream grows
+past head_limit + tail_limit bytes, only its first head_limit and last
+tail_limit bytes stay in memory; the complete stream is written to a
+spill file, which callers that need every byte read back through mmap.
+
+A spilled file is handed to the registered publisher (the server moves it
+into the result store, so the pointer is a fetch_result handle). Without
+a publisher the file stays in the spill directory and the pointer is its
+path; files older than SPILL_MAX_AGE are pruned on the next spill. The
+registered reader goes the other way, so tools can take a handle as input.
+"""
+
+import asyncio
+import codecs
+import mmap
+import os
+import tempfile
+import time
+from typing import Awaitable, Callable, Iterator, Optional, Tuple
+
+HEAD_LIMIT = int(os.environ.get("RECON_CAPTURE_HEAD_BYTES", str(1024 * 1024)))
+TAIL_LIMIT = int(os.environ.get("RECON_CAPTURE_TAIL_BYTES", str(256 * 1024)))
+SPILL_DIR = os.environ.get("RECON_SPILL_DIR", os.path.join(tempfile.gettempdir(), "recon-agent-spill"))
+SPILL_MAX_AGE = 24 * 3600
+
+# (label, path) -> (pointer text such as 'fetch_result(handle="...")', new path); the publisher owns the file afterwards
+Publisher = Callable[[str, str], Awaitable[Tuple[str, str]]]
+
+# handle -> complete text of the stored result
+Reader = Callable[[str], Awaitable[str]]
+
+_publisher: Optional[Publisher] = None
+_reader: Optional[Reader] = None
+_pruned = False
+
+
+def set_publisher(publisher: Optional[Publisher]) -> None:
+    global _publisher
+    _publisher = publisher
+
+
+def set_reader(reader: Optional[Reader]) -> None:
+    global _reader
+    _reader = reader
+
+
+async def read_published(handle: str) -> str:
+    """Text behind a fetch_result handle; raises if no store is registered or the handle is unknown"""
+    if _reader is None:
+        raise RuntimeError("result handles are only available when running under the server")
+    return await _reader(handle)
+
+
+def _prune_spill_dir() -> None:
+    global _pruned
+    if _pruned:
+        return
+    _pruned = True
+    cutoff = time.time() - SPILL_MAX_AGE
+    try:
+        for name in os.listdir(SPILL_DIR):
+            path = os.path.join(SPILL_DIR, name)
+            if os.stat(path).st_mtime < cutoff:
+                os.unlink(path)
+    except OSError:
+        pass
+
+
+def format_size(size: float) -> str:
+    if size < 1024:
+        return f"{int(size)} bytes"
+    for unit in ("KiB", "MiB", "GiB"):
+        size /= 1024
+        if size < 1024 or unit == "GiB":
+            return f"{size:.1f} {unit}"
+
+
+class OutputCapture:
+    def __init__(self, head_limit: int = HEAD_LIMIT, tail_limit: int = TAIL_LIMIT):
+        self.head_limit = head_limit
+        self.tail_limit = tail_limit
+        self.size = 0
+        self.path: Optional[str] = None
+        self.pointer = ""
+        self._buffer = bytearray()
+        self._tail = bytearray()
+        self._file = None
+
+    @property
+    def spilled(self) -> bool:
+        return self.path is not None
+
+    def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self._file is not None:
+            self._file.write(chunk)
+            self._tail += chunk
+            if len(self._tail) > self.tail_limit * 2:
+                # Trim in batches so the ring costs amortised O(1) per byte
+                self._trim_tail()
+            return
+        self._buffer += chunk
+        if len(self._buffer) > self.head_limit + self.tail_limit:
+            self._spill()
+
+    def _spill(self) -> None:
+        os.makedirs(SPILL_DIR, exist_ok=True)
+        _prune_spill_dir()
+        handle, self.path = tempfile.mkstemp(prefix="capture-", suffix=".txt", dir=SPILL_DIR)
+        self._file = os.fdopen(handle, "wb")
+        self._file.write(self._buffer)
+        self._tail = bytearray(self._buffer[self.head_limit:])
+        self._trim_tail()
+        del self._buffer[self.head_limit:]
+
+    def _trim_tail(self) -> None:
+        del self._tail[:max(0, len(self._tail) - self.tail_limit)]
+
+    def finish(self) -> None:
+        """Flush the spill file; call once the stream hit EOF"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._trim_tail()
+
+    def discard(self) -> None:
+        self.finish()
+        if self.path and not self.pointer:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    async def publish(self, label: str) -> None:
+        """Hand the spill file to the publisher and remember the pointer it returns"""
+        self.finish()
+        if not self.spilled or self.pointer:
+            return
+        if _publisher is not None:
+            try:
+                self.pointer, self.path = await _publisher(label, self.path)
+                return
+            except Exception:
+                pass
+        self.pointer = self.path
+
+    def getvalue(self) -> bytes:
+        """Everything if it fit in memory, otherwise just head + tail"""
+        if not self.spilled:
+            return bytes(self._buffer)
+        return bytes(self._buffer) + bytes(self._tail)
+
+    def text(self) -> str:
+        """Decoded view: the whole stream, or head and tail cut at line breaks around an omission note"""
+        if not self.spilled:
+            return self._buffer.decode(errors="replace")
+        head = bytes(self._buffer)
+        cut = head.rfind(b"\n")
+        head = head[:cut + 1] if cut != -1 else head
+        tail = bytes(self._tail)
+        cut = tail.find(b"\n")
+        tail = tail[cut + 1:] if cut != -1 else tail
+        omitted = self.size - len(head) - len(tail)
+        # The incremental decoder drops a multi-byte character split by the head cut instead of mangling it
+        head_text = codecs.getincrementaldecoder("utf-8")(errors="replace").decode(head, final=False)
+        note = (f"[... {format_size(omitted)} omitted; full output ({format_size(self.size)}) "
+                f"in {self.pointer or self.path} ...]")
+        return f"{head_text}{note}\n{tail.decode(errors='replace')}"
+
+    def iter_text(self, block_size: int = 1024 * 1024) -> Iterator[str]:
+        """The complete stream as decoded blocks ending on line breaks, read through mmap when spilled"""
+        if not self.spilled:
+            if self._buffer:
+                yield self._buffer.decode(errors="replace")
+            return
+        if not os.path.exists(self.path) or self.size == 0:
+            return
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with open(self.path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            while start < len(data):
+                end = min(len(data), start + block_size)
+                if end < len(data):
+                    newline = data.find(b"\n", end)
+                    end = len(data) if newline == -1 else newline + 1
+                yield decoder.decode(data[start:end], final=end >= len(data))
+                start = end
+
+
+async def read_all(capture: OutputCapture) -> str:
+    """Full decoded stream; for parsers that need every line of a spilled output"""
+    if not capture.spilled:
+        return capture.text()
+    return await asyncio.to_thread(lambda: "".join(capture.iter_text()))
@@ -0,0 +1,76 @@
+"""
+Per-call progress reporting for long-running tools.
+
+The server binds a reporter for the duration of each MCP request (it
+forwards to the client's progress notifications); tools just call
+report() and never need to know about MCP. Outside a request, or when
+the client did not ask for progress, report() is a no-op.
+
+Background jobs also bind an output sink: the executor forwards every
+line its subprocesses print (plus a start and a finish line per process)
+to output(), so a running job can be tailed. Direct calls bind no sink
+and pay nothing for it.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional
+
+Reporter = Callable[[str, float, Optional[float]], Awaitable[None]]
+OutputSink = Callable[[str], Awaitable[None]]
+
+_reporter: ContextVar[Optional[Reporter]] = ContextVar("recon_progress_reporter", default=None)
+_output_sink: ContextVar[Optional[OutputSink]] = ContextVar("recon_output_sink", default=None)
+
+
+@contextmanager
+def bind(reporter: Optional[Reporter]):
+    """Install a reporter for the current task (and tasks it spawns)"""
+    token = _reporter.set(reporter)
+    try:
+        yield
+    finally:
+        _reporter.reset(token)
+
+
+def current() -> Optional[Reporter]:
+    """Reporter bound for the current task, if any"""
+    return _reporter.get()
+
+
+async def report(message: str, progress: float = 0, total: Optional[float] = None) -> None:
+    """Send a progress update to the calling client, if anyone is listening"""
+    reporter = _reporter.get()
+    if reporter is None:
+        return
+    try:
+        await reporter(message, progress, total)
+    except Exception:
+        # Progress is best effort; never fail a scan because a notification did
+        pass
+
+
+@contextmanager
+def bind_output(sink: Optional[OutputSink]):
+    """Install a sink for raw subprocess output lines for the current task"""
+    token = _output_sink.set(sink)
+    try:
+        yield
+    finally:
+        _output_sink.reset(token)
+
+
+def current_output() -> Optional[OutputSink]:
+    """Output sink bound for the current task, if any"""
+    return _output_sink.get()
+
+
+async def output(line: str) -> None:
+    """Forward one line of tool output to whoever is tailing it"""
+    sink = _output_sink.get()
+    if sink is None:
+        return
+    try:
+        await sink(line)
+    except Exception:
+        pass
@@ -0,0 +1,343 @@
+import asyncio
+import time
+from typing import Dict, List
+
+from tools import batch, binaries, ct_client, executor, progress, subdomain_merge, whatweb_batch
+from tools.resolver_pool import ResolverPool, parse_resolvers
+
+PIPELINE_SOURCES = ("amass", "subfinder", "crtsh")
+
+# Live hosts handed to one whatweb process; a worker takes whatever is queued, up to this many
+FINGERPRINT_BATCH_SIZE = 8
+FINGERPRINT_TIMEOUT = 120
+
+
+def register_tool():
+    """Register the streaming enumerate -> resolve -> fingerprint pipeline"""
+
+    async def recon_pipeline(
+        target: str = "",
+        sources: str = "amass,subfinder,crtsh",
+        resolvers: str = "",
+        fingerprint: bool = True,
+        resolve_concurrency: int = 200,
+        fingerprint_concurrency: int = 4,
+        queue_size: int = 1000,
+        source_timeout: int = 600,
+        timeout: int = 3600,
+        targets: list = None,
+        concurrency: int = 1,
+    ) -> str:
+        """
+        Enumerate subdomains, resolve them and fingerprint live hosts in one call.
+
+        The stages are connected by bounded queues: names flow into DNS
+        resolution as soon as any source reports them, and live hosts flow
+        into WhatWeb while enumeration is still running. Each stage has its
+        own concurrency limit; a full queue pauses the stage feeding it
+        (down to the enumeration subprocess itself).
+
+        Args:
+            target: Root domain (e.g., example.com)
+            sources: Comma-separated enumeration sources (amass, subfinder, crtsh)
+            resolvers: Comma-separated resolver IP addresses to spread queries across
+            fingerprint: Run WhatWeb against live hosts
+            resolve_concurrency: DNS lookups in flight at once
+            fingerprint_concurrency: WhatWeb processes at once (each takes a small batch of live hosts)
+            queue_size: Capacity of each inter-stage queue
+            source_timeout: Deadline in seconds for each enumeration source (0 for none)
+            timeout: Overall deadline in seconds; partial results are reported (0 for none)
+            targets: Several root domains, each run through its own pipeline
+            concurrency: Pipelines run at once for a batch (each is already concurrent inside)
+
+        Examples:
+            - recon_pipeline("example.com")
+            - recon_pipeline("example.com", sources="crtsh,subfinder", fingerprint=False)
+            - recon_pipeline(targets=["example.com", "example.org"], fingerprint=False)
+        """
+        names = batch.merge_targets(target, targets)
+        if not names:
+            return "Error: target parameter is required"
+        if len(names) > 1:
+            return await batch.run_batch(
+                "Recon pipeline", names,
+                lambda name: recon_pipeline(
+                    name, sources, resolvers, fingerprint, resolve_concurrency, fingerprint_concurrency,
+                    queue_size, source_timeout, timeout,
+                ),
+                concurrency,
+            )
+        target = names[0].lower().rstrip(".")
+
+        wanted = [s.strip().lower() for s in sources.split(",") if s.strip()]
+        unknown = [s for s in wanted if s not in PIPELINE_SOURCES]
+        if unknown:
+            return f"Error: unknown sources {', '.join(unknown)} (choose from {', '.join(PIPELINE_SOURCES)})"
+
+        try:
+            servers = parse_resolvers(resolvers)
+        except ValueError as e:
+            return f"Error: {str(e)}"
+
+        merger = subdomain_merge.SubdomainMerger([target])
+        resolve_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        fingerprint_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        source_status: Dict[str, str] = {}
+        live: Dict[str, List[str]] = {}
+        fingerprints: Dict[str, str] = {}
+        counters = {"unresolved": 0, "wildcard": 0, "failed": 0}
+        stage_done: Dict[str, float] = {}
+
+        pool = ResolverPool(servers)
+        run_fingerprint = fingerprint and binaries.is_installed("whatweb")
+        start = time.monotonic()
+
+        async def feed(text: str, source: str) -> None:
+            for name in merger.add_new(text, source):
+                await resolve_queue.put(name)
+
+        async def run_source(source: str) -> None:
+            """Stream one source into the resolve queue under its own deadline"""
+            source_start = time.monotonic()
+            status = "stopped"
+            try:
+                async with asyncio.timeout(source_timeout or None):
+                    if source == "crtsh":
+                        async for name in ct_client.iter_names(target):
+                            await feed(name, source)
+                        status = "ok"
+                    elif not binaries.is_installed(source):
+                        status = "not installed"
+                    else:
+                        cmd = ["amass", "enum", "-d", target] if source == "amass" else ["subfinder", "-silent", "-d", target]
+                        async for stream, item in executor.stream_command(cmd):
+                            if stream == "stdout":
+                                await feed(item, source)
+                            elif stream == "exit":
+                                status = "ok" if item.ok else f"failed: {item.summary()}"
+            except TimeoutError:
+                status = "timed out"
+            except Exception as e:
+                status = f"failed: {str(e)}"
+            finally:
+                # Also runs when the overall deadline cancels us, so partial counts are kept
+                found = merger.source_counts.get(source, 0)
+                source_status[source] = f"{status}, {found} names ({time.monotonic() - source_start:.1f}s)"
+
+        async def resolve_one(name: str, index: int) -> None:
+            ips = await pool.lookup(name, index)
+            if not ips:
+                counters["unresolved"] += 1
+                return
+            if await pool.is_wildcard(name, ips):
+                counters["wildcard"] += 1
+                return
+            live[name] = sorted(ips)
+            await progress.report(f"live {name} {','.join(live[name])}", progress=len(live))
+            if run_fingerprint:
+                await fingerprint_queue.put(name)
+
+        async def resolve_worker(worker: int) -> None:
+            index = worker
+            while True:
+                name = await resolve_queue.get()
+                if name is None:
+                    return
+                index += 1
+                try:
+                    await resolve_one(name, index)
+                except Exception:
+                    # A dead worker would leave its sentinel unread and stall the pipeline
+                    counters["failed"] += 1
+
+        async def fingerprint_batch(names: List[str]) -> None:
+            """One whatweb process over a small batch of live hosts"""
+            found: Dict[str, List[str]] = {}
+
+            async def on_record(record):
+                found.setdefault(whatweb_batch.host_of(record["target"]), []).append(brief(record))
+
+            summary = await whatweb_batch.run_process(
+                names, on_record, max_threads=len(names), timeout=FINGERPRINT_TIMEOUT,
+            )
+            for name in names:
+                fingerprints[name] = " | ".join(found[name]) if name in found else f"(no response; {summary})"
+            await progress.report(f"fingerprinted {', '.join(names)}", progress=len(fingerprints), total=len(live))
+
+        async def fingerprint_worker() -> None:
+            finished = False
+            while not finished:
+                names = []
+                name = await fingerprint_queue.get()
+                # Take what is already queued instead of waiting for a full batch
+                while name is not None:
+                    names.append(name)
+                    if len(names) >= FINGERPRINT_BATCH_SIZE or fingerprint_queue.empty():
+                        break
+                    name = fingerprint_queue.get_nowait()
+                finished = name is None
+                if names:
+                    await fingerprint_batch(names)
+
+        async def pipeline() -> None:
+            resolvers_tasks = [
+                asyncio.create_task(resolve_worker(i)) for i in range(max(1, resolve_concurrency))
+            ]
+            fingerprint_tasks = [
+                asyncio.create_task(fingerprint_worker())
+                for _ in range(max(1, fingerprint_concurrency) if run_fingerprint else 0)
+            ]
+            try:
+                await feed(target, "input")
+                await asyncio.gather(*(run_source(source) for source in wanted))
+                stage_done["enumerate"] = time.monotonic() - start
+                for _ in resolvers_tasks:
+                    await resolve_queue.put(None)
+                await asyncio.gather(*resolvers_tasks)
+                stage_done["resolve"] = time.monotonic() - start
+                for _ in fingerprint_tasks:
+                    await fingerprint_queue.put(None)
+                await asyncio.gather(*fingerprint_tasks)
+                stage_done["fingerprint"] = time.monotonic() - start
+            finally:
+                for task in resolvers_tasks + fingerprint_tasks:
+                    task.cancel()
+                await asyncio.gather(*resolvers_tasks, *fingerprint_tasks, return_exceptions=True)
+
+        runner = asyncio.create_task(pipeline())
+        try:
+            done, _ = await asyncio.wait({runner}, timeout=timeout or None)
+            if runner in done:
+                runner.result()
+                outcome = "completed"
+            else:
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
+                outcome = f"timed out after {timeout}s, partial results"
+        except asyncio.CancelledError:
+            runner.cancel()
+            raise
+        except Exception as e:
+            return f"Error executing recon pipeline: {str(e)}"
+        finally:
+            pool.close()
+
+        return format_report(
+            target, outcome, time.monotonic() - start, merger, source_status, stage_done,
+            live, fingerprints, pool.wildcards, counters, fingerprint, run_fingerprint,
+        )
+
+    def brief(record):
+        """One WhatWeb response as 'status title: technologies'"""
+        head = str(record.get("status") or "-")
+        if record.get("title"):
+            head += f" {record['title']}"
+        return f"{head}: {', '.join(record['technologies'])}" if record["technologies"] else head
+
+    def format_report(target, outcome, elapsed, merger, source_status, stage_done,
+                      live, fingerprints, wildcards, counters, fingerprint, run_fingerprint):
+        found = len(merger.sources)
+        lines = [
+            f"Recon pipeline for {target}: {outcome} in {elapsed:.1f}s",
+            f"{found} unique names -> {len(live)} live hosts "
+            f"({counters['unresolved']} unresolved, {counters['wildcard']} wildcard matches dropped"
+            + (f", {counters['failed']} lookups failed" if counters["failed"] else "") + ")"
+            + (f" -> {len(fingerprints)} fingerprinted" if run_fingerprint else ""),
+            "",
+            "Source status:",
+        ]
+        lines.extend(f"- {source}: {status}" for source, status in source_status.items())
+        if stage_done:
+            lines.append("Stages finished at: " + ", ".join(
+                f"{stage} {seconds:.1f}s" for stage, seconds in stage_done.items()
+            ))
+        if fingerprint and not run_fingerprint:
+            lines.append("Fingerprinting skipped: whatweb is not installed")
+        if wildcards:
+            lines.append("Wildcard zones:")
+            lines.extend(f"  *.{zone} -> {', '.join(sorted(ips))}" for zone, ips in sorted(wildcards.items()))
+
+        if live:
+            lines.append("")
+            header = "host\tips\tsources"
+            lines.append(header + ("\twhatweb" if run_fingerprint else ""))
+            for name in sorted(live, key=lambda n: n.split(".")[::-1]):
+                row = f"{name}\t{','.join(live[name])}\t{','.join(merger.sources.get(name, []))}"
+                if run_fingerprint:
+                    row += f"\t{fingerprints.get(name, '-')}"
+                lines.append(row)
+        return "\n".join(lines)
+
+    recon_pipeline._mcp_schema = {
+        "name": "recon_pipeline",
+        "description": "Enumerate subdomains (amass, subfinder, crt.sh), resolve them and fingerprint live hosts with WhatWeb in one streaming call; stages overlap through bounded queues and the result is one consolidated host table.",
+        "parameters": {
+            "target": {
+                "type": "string",
+                "description": "Root domain to run the pipeline against (e.g., example.com); optional when targets is given",
+                "default": ""
+            },
+            "sources": {
+                "type": "string",
+                "description": "Comma-separated enumeration sources: amass, subfinder, crtsh",
+                "default": "amass,subfinder,crtsh"
+            },
+            "resolvers": {
+                "type": "string",
+                "description": "Comma-separated resolver IPs (default: 8.8.8.8,1.1.1.1,9.9.9.9)",
+                "default": ""
+            },
+            "fingerprint": {
+                "type": "boolean",
+                "description": "Run WhatWeb against every live host",
+                "default": True
+            },
+            "resolve_concurrency": {
+                "type": "integer",
+                "description": "DNS lookups in flight at once",
+                "default": 200
+            },
+            "fingerprint_concurrency": {
+                "type": "integer",
+                "description": "WhatWeb processes at once; each fingerprints a small batch of live hosts",
+                "default": 4
+            },
+            "queue_size": {
+                "type": "integer",
+                "description": "Capacity of each inter-stage queue; a full queue pauses the stage feeding it",
+                "default": 1000
+            },
+            "source_timeout": {
+                "type": "integer",
+                "description": "Deadline in seconds for each enumeration source (0 disables the deadline)",
+                "default": 600
+            },
+            "timeout": {
+                "type": "integer",
+                "description": "Overall deadline in seconds; whatever finished is still reported (0 for no limit)",
+                "default": 3600
+            },
+            "targets": {
+                "type": "array",
+                "description": "Several root domains to run in one call, each through its own pipeline; the response has one section per domain",
+                "default": []
+            },
+            "concurrency": {
+                "type": "integer",
+                "description": "Pipelines run at once when targets holds several domains",
+                "default": 1
+            }
+        },
+        "examples": [
+            {
+                "input": {"target": "example.com"},
+                "description": "Full enumerate -> resolve -> fingerprint run for example.com"
+            },
+            {
+                "input": {"target": "example.com", "sources": "crtsh", "fingerprint": False},
+                "description": "Passive CT enumeration plus resolution only"
+            }
+        ]
+    }
+
+    return {"recon_pipeline": recon_pipeline}
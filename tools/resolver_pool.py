@@ -0,0 +1,94 @@
+"""
+A pool of DNS resolvers with wildcard-zone detection.
+
+Lookups are spread across several resolvers by index, and a lookup that
+times out on one resolver moves on to the next. A zone is probed with
+random labels the first time one of its names resolves. Answers that
+only repeat the zone's wildcard addresses can then be recognised and
+dropped. Each zone is probed at most once per pool, even when many
+lookups under it finish at the same time.
+"""
+
+import asyncio
+import uuid
+from typing import Dict, List, Optional, Set
+
+from tools import dns_client
+
+DEFAULT_RESOLVERS = ["8.8.8.8", "1.1.1.1", "9.9.9.9"]
+
+# Random labels probed per parent zone to detect wildcard answers
+WILDCARD_PROBES = 2
+
+
+def parent_zone(name: str) -> str:
+    return name.split(".", 1)[1] if name.count(".") >= 2 else ""
+
+
+def parse_resolvers(resolvers: str) -> List[str]:
+    """
+    Comma-separated resolver IPs, or the defaults when none are given.
+
+    Raises ValueError for anything that is not an IP address, before any
+    query is sent to it.
+    """
+    servers = [s.strip() for s in (resolvers or "").split(",") if s.strip()]
+    invalid = [server for server in servers if not dns_client.is_ip_address(server)]
+    if invalid:
+        raise ValueError(f"resolvers must be IP addresses, got {', '.join(invalid)}")
+    return servers or list(DEFAULT_RESOLVERS)
+
+
+class ResolverPool:
+    """Rotating resolvers plus a per-zone wildcard cache"""
+
+    def __init__(self, servers: List[str], record_type: str = "A", concurrency: int = 0,
+                 timeout: float = 2.0, retries: int = 1):
+        self.servers = servers
+        self.record_type = record_type
+        self.wildcards: Dict[str, Set[str]] = {}
+        self._resolvers = [dns_client.DNSResolver(server, timeout=timeout, retries=retries) for server in servers]
+        self._semaphore: Optional[asyncio.Semaphore] = asyncio.Semaphore(concurrency) if concurrency > 0 else None
+        self._probes: Dict[str, asyncio.Task] = {}
+
+    async def lookup(self, name: str, index: int = 0) -> Set[str]:
+        """Resolve one name, moving to the next resolver if one times out"""
+        if self._semaphore is None:
+            return await self._lookup(name, index)
+        async with self._semaphore:
+            return await self._lookup(name, index)
+
+    async def _lookup(self, name: str, index: int) -> Set[str]:
+        for attempt in range(len(self._resolvers)):
+            resolver = self._resolvers[(index + attempt) % len(self._resolvers)]
+            try:
+                response = await resolver.query(name, self.record_type)
+            except dns_client.DNSError:
+                continue
+            return {r.data for r in response.answers if r.rtype == self.record_type}
+        return set()
+
+    async def wildcard_ips(self, zone: str) -> Set[str]:
+        """Answers a zone gives for random labels, probed once per zone"""
+        if zone not in self._probes:
+            async def probe():
+                answers = await asyncio.gather(*(
+                    self.lookup(f"{uuid.uuid4().hex[:12]}.{zone}", i) for i in range(WILDCARD_PROBES)
+                ))
+                ips = set().union(*answers)
+                if ips:
+                    self.wildcards[zone] = ips
+                return ips
+            self._probes[zone] = asyncio.ensure_future(probe())
+        return await self._probes[zone]
+
+    async def is_wildcard(self, name: str, ips: Set[str]) -> bool:
+        """True when every address of name is one its parent zone's wildcard returns"""
+        zone = parent_zone(name)
+        return bool(zone) and ips <= await self.wildcard_ips(zone)
+
+    def close(self) -> None:
+        for task in self._probes.values():
+            task.cancel()
+        for resolver in self._resolvers:
+            resolver.close()
@@ -0,0 +1,151 @@
+"""
+Merge subdomain enumeration output from several sources.
+
+Every source's text is tokenized into canonical names (lowercase, no
+trailing dot, `*.` wildcards stripped and flagged). A name is kept only if
+it really sits under one of the scan roots, which is checked against a
+trie of reversed labels, so `notexample.com.evil.net` and
+`example.com.evil.net` are rejected for root `example.com`. Accepted names
+are deduplicated and remember which sources reported them.
+
+Building the merge is linear in the size of the input: one regex pass per
+text block, then a dict lookup per name and one trie walk (bounded by the
+label count) per unique name. Only the final listing is sorted.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+# Hostname-like tokens, including a leading wildcard label; labels are validated per unique name
+NAME_TOKEN_RE = re.compile(r"(?<![\w.*-])((?:\*\.)*(?:[\w-]+\.)+[a-z0-9-]{2,63})\.?(?![\w-])", re.IGNORECASE)
+
+_TERMINAL = ""
+
+
+def is_valid_hostname(name: str) -> bool:
+    if not name or len(name) > 253 or "." not in name:
+        return False
+    for label in name.split("."):
+        if not label or len(label) > 63 or label.startswith("-") or label.endswith("-"):
+            return False
+    return True
+
+
+def canonicalize(name: str) -> Optional[tuple]:
+    """
+    Canonical form of one name as (name, is_wildcard), or None if it is not
+    a usable hostname.
+    """
+    name = name.strip().lower().rstrip(".")
+    wildcard = False
+    while name.startswith("*."):
+        name = name[2:]
+        wildcard = True
+    if not is_valid_hostname(name):
+        return None
+    return name, wildcard
+
+
+class SuffixTrie:
+    """Trie over reversed labels: com -> example -> (terminal)"""
+
+    def __init__(self, roots: Iterable[str] = ()):
+        self._root: Dict[str, dict] = {}
+        for root in roots:
+            self.add(root)
+
+    def add(self, domain: str) -> None:
+        canonical = canonicalize(domain)
+        if canonical is None:
+            # Single-label roots (e.g. an internal TLD) are still valid scopes
+            domain = domain.strip().lower().rstrip(".")
+            if not domain:
+                return
+        else:
+            domain = canonical[0]
+        node = self._root
+        for label in reversed(domain.split(".")):
+            node = node.setdefault(label, {})
+        node[_TERMINAL] = domain
+
+    def match(self, name: str) -> Optional[str]:
+        """Root that `name` equals or sits under, or None"""
+        node = self._root
+        for label in reversed(name.split(".")):
+            node = node.get(label)
+            if node is None:
+                return None
+            if _TERMINAL in node:
+                return node[_TERMINAL]
+        return None
+
+
+class SubdomainMerger:
+    def __init__(self, roots: Iterable[str]):
+        self.trie = SuffixTrie(roots)
+        self.sources: Dict[str, List[str]] = {}
+        self.wildcards: Set[str] = set()
+        self.source_counts: Dict[str, int] = {}
+        self.seen = 0
+        self.out_of_scope = 0
+
+    def add(self, name: str, source: str) -> bool:
+        """Add one raw name; returns True if it was in scope"""
+        self.seen += 1
+        name = name.strip().lower().rstrip(".")
+        wildcard = False
+        while name.startswith("*."):
+            name = name[2:]
+            wildcard = True
+
+        seen_by = self.sources.get(name)
+        if seen_by is None:
+            # Validation and the scope walk only run once per unique name
+            if not is_valid_hostname(name) or self.trie.match(name) is None:
+                self.out_of_scope += 1
+                return False
+            self.sources[name] = [source]
+            self.source_counts[source] = self.source_counts.get(source, 0) + 1
+        elif source not in seen_by:
+            seen_by.append(source)
+            self.source_counts[source] = self.source_counts.get(source, 0) + 1
+        if wildcard:
+            self.wildcards.add(name)
+        return True
+
+    def add_text(self, text: str, source: str) -> int:
+        """Add every hostname found in a block of tool output; returns the in-scope count"""
+        self.source_counts.setdefault(source, 0)
+        added = 0
+        for token in NAME_TOKEN_RE.findall(text or ""):
+            if self.add(token, source):
+                added += 1
+        return added
+
+    def add_new(self, text: str, source: str) -> List[str]:
+        """Like add_text, but return the names no source had reported before"""
+        self.source_counts.setdefault(source, 0)
+        fresh = []
+        for token in NAME_TOKEN_RE.findall(text or ""):
+            before = len(self.sources)
+            if self.add(token, source) and len(self.sources) > before:
+                fresh.append(next(reversed(self.sources)))
+        return fresh
+
+    @property
+    def duplicates(self) -> int:
+        return self.seen - self.out_of_scope - len(self.sources)
+
+    def names(self) -> List[str]:
+        """Unique names, grouped by parent domain (sorted on reversed labels)"""
+        return sorted(self.sources, key=lambda name: name.split(".")[::-1])
+
+    def format(self) -> str:
+        names = self.names()
+        header = (f"{len(names)} unique subdomains ({self.seen} names seen, "
+                  f"{self.duplicates} duplicates, {self.out_of_scope} out of scope or invalid)")
+        lines = [header]
+        for name in names:
+            note = " (wildcard)" if name in self.wildcards else ""
+            lines.append(f"{name}\t{','.join(self.sources[name])}{note}")
+        return "\n".join(lines)
@@ -1,130 +1,190 @@
 import asyncio
 import shlex
+import time
+
+from tools import batch, ct_client, executor, inventory, output_capture, subdomain_merge
+
+# Short source names used in the merged list
+SOURCE_TAGS = {"Amass": "amass", "Subfinder": "subfinder", "Certificate Transparency": "crtsh"}
 
 def register_tool():
     """Register a subdomain enumeration tool with fallback options"""
     
-    async def subdomain_scan(target: str, kwargs: str = "") -> str:
+    async def subdomain_scan(
+        target: str = "",
+        kwargs: str = "",
+        amass_timeout: int = 600,
+        subfinder_timeout: int = 120,
+        crtsh_timeout: int = 60,
+        delta: bool = False,
+        targets: list = None,
+        concurrency: int = 2,
+    ) -> str:
         """
-        Perform subdomain enumeration using multiple methods with fallbacks.
+        Perform subdomain enumeration using multiple methods concurrently.
+
+        Amass, Subfinder and crt.sh run side by side, each under its own
+        deadline. Sources that finish in time are merged into one
+        deduplicated list of names under the target, each tagged with the
+        sources that found it; slow or failing sources are reported in the
+        status block instead of holding up the whole call.
 
         Args:
             target: Domain to scan for subdomains (e.g., example.com)
             kwargs: Extra flags for advanced users
+            amass_timeout: Deadline in seconds for Amass
+            subfinder_timeout: Deadline in seconds for Subfinder
+            crtsh_timeout: Deadline in seconds for crt.sh
+            delta: Only report names that appeared or disappeared since the last scan
+            targets: Several domains to enumerate in one call, one section each
+            concurrency: Maximum domains enumerated at once for a batch
 
         Examples:
             - subdomain_scan("example.com")
             - subdomain_scan("example.com", "--threads 50")
+            - subdomain_scan("example.com", amass_timeout=120)
+            - subdomain_scan("example.com", delta=True)
+            - subdomain_scan(targets=["example.com", "example.org"])
         """
         
-        if not target:
+        names = batch.merge_targets(target, targets)
+        if not names:
             return "Error: target parameter is required"
+        if len(names) > 1:
+            return await batch.run_batch(
+                "Subdomain enumeration", names,
+                lambda name: subdomain_scan(name, kwargs, amass_timeout, subfinder_timeout, crtsh_timeout, delta),
+                concurrency,
+            )
+        target = names[0]
         
-        # Try multiple methods with fallbacks
-        results = []
-        
-        # Method 1: Try using Amass if available
-        amass_result = await try_amass(target, kwargs)
-        if amass_result and "Error" not in amass_result:
-            results.append(f"Amass Results:\n{amass_result}")
+        sources = [
+            ("Amass", try_amass(target, kwargs), amass_timeout),
+            ("Subfinder", try_subfinder(target, kwargs), subfinder_timeout),
+            ("Certificate Transparency", try_crtsh(target), crtsh_timeout),
+        ]
+        outcomes = await asyncio.gather(
+            *(run_source(name, coro, timeout) for name, coro, timeout in sources)
+        )
         
-        # Method 2: Try using subfinder if available
-        subfinder_result = await try_subfinder(target, kwargs)
-        if subfinder_result and "Error" not in subfinder_result:
-            results.append(f"Subfinder Results:\n{subfinder_result}")
+        merger = subdomain_merge.SubdomainMerger([target])
+        status_lines = []
+        complete = True
+        for name, status, elapsed, output in outcomes:
+            complete = complete and status == "ok"
+            if status == "ok":
+                merger.add_text(output, SOURCE_TAGS[name])
+                status = f"ok, {merger.source_counts[SOURCE_TAGS[name]]} unique names"
+            status_lines.append(f"- {name}: {status} ({elapsed:.1f}s)")
         
-        # Method 3: Try using crt.sh certificate transparency
-        crtsh_result = await try_crtsh(target)
-        if crtsh_result:
-            results.append(f"Certificate Transparency Results:\n{crtsh_result}")
+        status_block = "Source status:\n" + "\n".join(status_lines)
         
-        if not results:
-            return "No subdomains found using available methods. This could be due to:\n1. Tools not installed\n2. Network restrictions\n3. Domain security measures\n4. Rate limiting\n\nTry manual methods or check tool installation."
+        if not merger.sources:
+            return status_block + "\n\nNo subdomains found using available methods. This could be due to:\n1. Tools not installed\n2. Network restrictions\n3. Domain security measures\n4. Rate limiting\n\nTry manual methods or check tool installation."
         
-        return "\n\n".join(results)
+        # Names only count as gone when every source finished
+        changes = await inventory.observe(
+            "domain", target.strip().lower().rstrip("."), {name: "" for name in merger.sources}, complete=complete
+        )
+        if delta:
+            return status_block + "\n\n" + inventory.format_deltas([changes])
+        return status_block + "\n\n" + merger.format()
+    
+    async def run_source(name, coro, timeout):
+        """Run one enumeration source under its deadline; it failed only if it raised"""
+        start = time.monotonic()
+        try:
+            output = await asyncio.wait_for(coro, timeout=timeout if timeout and timeout > 0 else None)
+        except asyncio.TimeoutError:
+            return name, "timed out", time.monotonic() - start, ""
+        except Exception as e:
+            return name, f"failed: {str(e)}", time.monotonic() - start, ""
+        return name, "ok", time.monotonic() - start, output
+    
+    async def run_enumerator(cmd):
+        """Run one enumeration binary; a failed exit raises instead of passing its output on"""
+        # The source deadline cancels this call, which kills the process group
+        process_result = await executor.run_command(cmd)
+        if not process_result.ok:
+            stderr = process_result.stderr.decode(errors="replace").strip().splitlines()
+            raise RuntimeError(process_result.summary() + (f": {stderr[-1]}" if stderr else ""))
+        # Every name matters to the merge, so read past the in-memory head/tail; stderr is never names
+        return await output_capture.read_all(process_result.stdout_capture)
     
     async def try_amass(target, kwargs):
         """Try to use Amass for subdomain enumeration"""
-        try:
-            cmd = ["amass", "enum", "-d", target]
-            if kwargs:
-                args_list = shlex.split(kwargs)
-                cmd.extend(args_list)
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            return stdout.decode() if stdout else stderr.decode()
-        except Exception:
-            return "Amass not available or failed"
+        cmd = ["amass", "enum", "-d", target]
+        if kwargs:
+            cmd.extend(shlex.split(kwargs))
+        return await run_enumerator(cmd)
     
     async def try_subfinder(target, kwargs):
         """Try to use Subfinder for subdomain enumeration"""
-        try:
-            cmd = ["subfinder", "-d", target]
-            if kwargs:
-                args_list = shlex.split(kwargs)
-                cmd.extend(args_list)
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            return stdout.decode() if stdout else stderr.decode()
-        except Exception:
-            return "Subfinder not available or failed"
+        cmd = ["subfinder", "-d", target]
+        if kwargs:
+            cmd.extend(shlex.split(kwargs))
+        return await run_enumerator(cmd)
     
     async def try_crtsh(target):
         """Try certificate transparency log search"""
-        try:
-            # This would use a Python implementation instead of external tool
-            import requests
-            import json
-            
-            url = f"https://crt.sh/?q=%.{target}&output=json"
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-                subdomains = set()
-                for entry in data:
-                    name = entry.get('name_value', '')
-                    if name and target in name:
-                        subdomains.add(name)
-                
-                if subdomains:
-                    return "\n".join(sorted(subdomains))
-                return "No subdomains found in certificate transparency logs"
-            return "Failed to query certificate transparency logs"
-        except Exception as e:
-            return f"Certificate transparency search failed: {str(e)}"
+        # Scope checks, wildcards and duplicates are left to the merge step
+        names = [name async for name in ct_client.iter_names(target)]
+        return "\n".join(names)
     
     # MCP schema
     subdomain_scan._mcp_schema = {
         "name": "subdomain_scan",
-        "description": "Perform subdomain enumeration using multiple methods with fallback options.",
+        "description": "Perform subdomain enumeration using Amass, Subfinder and crt.sh concurrently, each with its own deadline; results are merged into one deduplicated list with the sources that found each name, plus a per-source status.",
         "parameters": {
             "target": {
                 "type": "string", 
-                "description": "Domain to scan for subdomains (e.g., example.com)",
-                "required": True
+                "description": "Domain to scan for subdomains (e.g., example.com); optional when targets is given",
+                "default": ""
             },
             "kwargs": {
                 "type": "string", 
                 "description": "Extra flags for advanced users (e.g., '--threads 50')",
                 "default": ""
+            },
+            "amass_timeout": {
+                "type": "integer",
+                "description": "Deadline in seconds for the Amass source (0 disables the deadline)",
+                "default": 600
+            },
+            "subfinder_timeout": {
+                "type": "integer",
+                "description": "Deadline in seconds for the Subfinder source (0 disables the deadline)",
+                "default": 120
+            },
+            "crtsh_timeout": {
+                "type": "integer",
+                "description": "Deadline in seconds for the crt.sh source (0 disables the deadline)",
+                "default": 60
+            },
+            "delta": {
+                "type": "boolean",
+                "description": "Only return names that are new or gone since the previous scan of this domain (from the local asset inventory)",
+                "default": False
+            },
+            "targets": {
+                "type": "array",
+                "description": "Several domains to enumerate in one call; the response has one section per domain",
+                "default": []
+            },
+            "concurrency": {
+                "type": "integer",
+                "description": "Maximum domains enumerated at once when targets holds several",
+                "default": 2
             }
         },
         "examples": [
             {
                 "input": {"target": "example.com"},
                 "description": "Perform subdomain enumeration on example.com"
+            },
+            {
+                "input": {"target": "example.com", "amass_timeout": 120},
+                "description": "Enumerate example.com, giving Amass at most two minutes"
             }
         ]
     }
@@ -0,0 +1,65 @@
+"""
+One whatweb process fingerprinting a list of hosts.
+
+The hosts go to whatweb through an input file (-i) instead of one Ruby
+process per host, and the --log-json=- output is parsed while it streams.
+whatweb_scan splits large batches across a few of these; recon_pipeline
+runs one per small batch of live hosts.
+"""
+
+import os
+import tempfile
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+from tools import executor, whatweb_json
+from tools.json_stream import JSONArrayStream, JSONStreamError
+
+# JSON goes to stdout for streaming; brief output and per-host errors are suppressed
+BATCH_ARGS = ["--color=never", "--quiet", "--no-errors", "--log-json=-"]
+
+RecordSink = Callable[[Dict], Awaitable[None]]
+
+
+def host_of(url: str) -> str:
+    """Hostname of a target given with or without a scheme"""
+    parsed = urlparse(url if "://" in url else f"http://{url}")
+    return (parsed.hostname or url).lower()
+
+
+async def run_process(hosts: List[str], on_record: RecordSink, args: Sequence[str] = (),
+                      max_threads: int = 25, timeout: Optional[float] = None) -> str:
+    """
+    Fingerprint hosts with one whatweb process.
+
+    Every compact host record (whatweb_json.host_record) is passed to
+    on_record as soon as it is parsed. Returns the process summary, with
+    the last stderr lines appended when whatweb failed; errors are
+    returned the same way instead of raised.
+    """
+    handle, input_path = tempfile.mkstemp(prefix="recon-whatweb-", suffix=".txt")
+    try:
+        with os.fdopen(handle, "w") as input_file:
+            input_file.write("\n".join(hosts) + "\n")
+        cmd = ["whatweb", *BATCH_ARGS, f"--max-threads={max(1, max_threads)}", "-i", input_path, *args]
+        parser = JSONArrayStream()
+        stderr_tail = []
+        async for stream, item in executor.stream_command(cmd, timeout=timeout):
+            if stream == "stdout":
+                for entry in parser.feed(item + "\n"):
+                    if isinstance(entry, dict) and entry.get("target"):
+                        await on_record(whatweb_json.host_record(entry))
+            elif stream == "stderr":
+                stderr_tail = (stderr_tail + [item.strip()])[-3:]
+            else:
+                summary = item.summary()
+                if not item.ok and stderr_tail:
+                    summary += f": {' / '.join(line for line in stderr_tail if line)}"
+                return summary
+        return "whatweb ended without an exit status"
+    except JSONStreamError as e:
+        return f"could not parse --log-json output: {str(e)}"
+    except Exception as e:
+        return f"Error executing WhatWeb scan: {str(e)}"
+    finally:
+        os.unlink(input_path)
@@ -0,0 +1,61 @@
+"""
+Compact records from WhatWeb's --log-json output.
+
+WhatWeb writes one JSON object per fetched URL, holding every plugin hit
+with all of its matches. Agents only need the status, title, address and
+a short "Technology[version]" list per host.
+"""
+
+from typing import Any, Dict, List
+
+# Plugins reported as their own fields instead of as technologies
+FIELD_PLUGINS = {"IP": "ip", "Country": "country", "Title": "title", "RedirectLocation": "redirect"}
+
+VALUE_LIMIT = 60
+MAX_VALUES = 3
+
+
+def _plugin_values(match: Any) -> List[str]:
+    if not isinstance(match, dict):
+        return []
+    values = []
+    for key in ("version", "string", "os", "module", "model", "firmware"):
+        for value in match.get(key) or []:
+            value = " ".join(str(value).split())
+            if len(value) > VALUE_LIMIT:
+                value = value[:VALUE_LIMIT] + "..."
+            if value and value not in values:
+                values.append(value)
+    return values[:MAX_VALUES]
+
+
+def host_record(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce one --log-json object to target, status, fields and technologies"""
+    record: Dict[str, Any] = {
+        "target": entry.get("target", ""),
+        "status": entry.get("http_status"),
+        "technologies": [],
+        # Technology name -> matched versions/strings, for the asset inventory
+        "versions": {},
+    }
+    for name, match in (entry.get("plugins") or {}).items():
+        values = _plugin_values(match)
+        field = FIELD_PLUGINS.get(name)
+        if field:
+            if values:
+                record[field] = values[0]
+            continue
+        record["technologies"].append(f"{name}[{', '.join(values)}]" if values else name)
+        record["versions"][name] = ", ".join(values)
+    return record
+
+
+def format_record(record: Dict[str, Any]) -> str:
+    parts = [record["target"], str(record.get("status") or "-")]
+    for field in ("title", "ip", "country", "redirect"):
+        if record.get(field):
+            parts.append(f"{field}={record[field]}")
+    line = "\t".join(parts)
+    if record["technologies"]:
+        line += "\n    " + ", ".join(record["technologies"])
+    return line
@@ -1,72 +1,189 @@
 import asyncio
+import math
 import shlex
 
+from tools import batch, executor, inventory, progress, whatweb_batch, whatweb_json
+from tools.whatweb_batch import host_of
+
+# Batch mode: targets per whatweb process before another process is started, and the cap
+TARGETS_PER_PROCESS = 100
+MAX_BATCH_PROCESSES = 4
+
 def register_tool():
     """Register the WhatWeb tool with a normalized schema"""
     
-    async def whatweb_scan(target: str, kwargs: str = "") -> str:
+    async def whatweb_scan(
+        target: str = "",
+        kwargs: str = "",
+        timeout: int = 300,
+        targets: list = None,
+        max_threads: int = 25,
+        processes: int = 0,
+        delta: bool = False,
+        skip_recent: int = 0,
+    ) -> str:
         """
         Perform web technology detection using WhatWeb.
 
+        With several targets, they are fed to whatweb through an input file
+        instead of starting one Ruby process per host, and the --log-json
+        output is parsed as it streams into one compact record per host.
+        Large batches are split across a few whatweb processes.
+
         Args:
             target: URL or domain to scan (e.g., example.com)
             kwargs: Extra WhatWeb flags (optional, e.g., '--color=never --aggression=3')
+            timeout: Wall-clock limit in seconds (0 for no limit)
+            targets: List of URLs/domains to scan as one batch
+            max_threads: Concurrent requests per whatweb process in batch mode
+            processes: whatweb processes for a batch (0 picks one per 100 targets, at most 4)
+            delta: Only report technologies that appeared, changed or disappeared since the last scan
+            skip_recent: Skip hosts fingerprinted within this many seconds
 
         Examples:
             - whatweb_scan("example.com")
             - whatweb_scan("https://example.com", "--color=never --aggression=3")
+            - whatweb_scan(targets=["a.example.com", "b.example.com"], max_threads=50)
+            - whatweb_scan(targets=["a.example.com", "b.example.com"], delta=True, skip_recent=86400)
         """
         
-        if not target:
+        hosts = batch.merge_targets(target, targets)
+        if not hosts:
             return "Error: target parameter is required"
         
+        try:
+            args_list = shlex.split(kwargs) if kwargs else []
+        except ValueError as e:
+            return f"Error parsing WhatWeb flags: {str(e)}"
+        
+        # Delta and skip need parsed records, which only the batch path produces
+        if len(hosts) > 1 or delta or skip_recent > 0:
+            return await batch_scan(hosts, args_list, kwargs, timeout, max_threads, processes, delta, skip_recent)
+        target = hosts[0]
+        
         # Build command
         cmd = ["whatweb"]
-        
-        # Add kwargs if provided
-        if kwargs:
-            try:
-                args_list = shlex.split(kwargs)
-                cmd.extend(args_list)
-            except ValueError as e:
-                return f"Error parsing WhatWeb flags: {str(e)}"
+        cmd.extend(args_list)
         
         # Add target at the end
         cmd.append(target)
         
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            result = stdout.decode() if stdout else stderr.decode()
+            process_result = await executor.run_command(cmd, timeout=timeout or None)
+            result = process_result.output()
             
             # Check if WhatWeb is installed
             if "command not found" in result or "not found" in result.lower():
                 return "Error: WhatWeb is not installed. Please install it using:\n\n- macOS: `brew install whatweb`\n- Linux: `sudo apt install whatweb` or from https://github.com/urbanadventurer/WhatWeb\n- Windows: Download from https://github.com/urbanadventurer/WhatWeb"
             
-            return f"WhatWeb scan for {target} with args [{kwargs or 'default'}]:\n\n{result}"
+            return f"WhatWeb scan for {target} with args [{kwargs or 'default'}]:\n\n{result}\n\n[{process_result.summary()}]"
             
         except Exception as e:
             return f"Error executing WhatWeb scan: {str(e)}"
     
+    async def batch_scan(hosts, args_list, kwargs, timeout, max_threads, processes, delta=False, skip_recent=0):
+        """Scan many targets with a few whatweb processes fed from input files"""
+        skipped = []
+        if skip_recent > 0:
+            fresh = await inventory.recently_observed(
+                "technology", [host_of(host) for host in hosts], skip_recent, context=" ".join(args_list)
+            )
+            skipped = [host for host in hosts if host_of(host) in fresh]
+            hosts = [host for host in hosts if host_of(host) not in fresh]
+            if not hosts:
+                return (f"WhatWeb batch scan with args [{kwargs or 'default'}]: all {len(skipped)} targets "
+                        f"were fingerprinted in the last {skip_recent}s; nothing to scan")
+        
+        count = processes or min(MAX_BATCH_PROCESSES, math.ceil(len(hosts) / TARGETS_PER_PROCESS))
+        count = max(1, min(count, len(hosts)))
+        chunks = [hosts[i::count] for i in range(count)]
+        records = []
+        
+        async def on_record(record):
+            records.append(record)
+            await progress.report(f"fingerprinted {record['target']}", progress=len(records))
+        
+        summaries = await asyncio.gather(*(
+            whatweb_batch.run_process(chunk, on_record, args_list, max_threads, timeout or None)
+            for chunk in chunks
+        ))
+        
+        answered = {host_of(record["target"]) for record in records}
+        missing = [host for host in hosts if host_of(host) not in answered]
+        records.sort(key=lambda record: record["target"])
+        
+        # A redirect chain yields several records per host; the inventory keeps their union
+        technologies = {}
+        for record in records:
+            technologies.setdefault(host_of(record["target"]), {}).update(record["versions"])
+        changes = [
+            await inventory.observe("technology", host, found, context=" ".join(args_list))
+            for host, found in sorted(technologies.items())
+        ]
+        
+        lines = [
+            f"WhatWeb batch scan of {len(hosts)} targets with args [{kwargs or 'default'}] "
+            f"({count} processes x {max(1, max_threads)} threads): {len(records)} responses",
+            "",
+        ]
+        if delta:
+            lines.append(inventory.format_deltas(changes))
+        else:
+            lines.extend(whatweb_json.format_record(record) for record in records)
+        if skipped:
+            lines.append("")
+            lines.append(f"Skipped ({len(skipped)} fingerprinted in the last {skip_recent}s): {', '.join(skipped)}")
+        if missing:
+            lines.append("")
+            lines.append(f"No response ({len(missing)}): {', '.join(missing)}")
+        lines.append("")
+        lines.append("[" + "; ".join(f"process {i + 1}: {summary}" for i, summary in enumerate(summaries)) + "]")
+        return "\n".join(lines)
+    
     # MCP schema (normalized)
     whatweb_scan._mcp_schema = {
         "name": "whatweb_scan",
-        "description": "Perform web technology detection using WhatWeb to identify websites, CMS, JavaScript libraries, and other technologies.",
+        "description": "Perform web technology detection using WhatWeb to identify websites, CMS, JavaScript libraries, and other technologies; pass targets for a batched scan with compact per-host records.",
         "parameters": {
             "target": {
                 "type": "string", 
                 "description": "URL or domain to scan (e.g., example.com or https://example.com)",
-                "required": True
+                "default": ""
             },
             "kwargs": {
                 "type": "string", 
                 "description": "Extra WhatWeb flags (e.g., '--color=never', '--aggression=3', '--log-json=-')",
                 "default": ""
+            },
+            "timeout": {
+                "type": "integer",
+                "description": "Wall-clock limit in seconds; the process group is killed when it expires (0 for no limit)",
+                "default": 300
+            },
+            "targets": {
+                "type": "array",
+                "description": "List of URLs/domains to scan as one batch through whatweb input files, with parsed per-host records",
+                "default": []
+            },
+            "max_threads": {
+                "type": "integer",
+                "description": "Concurrent requests per whatweb process in batch mode (--max-threads)",
+                "default": 25
+            },
+            "processes": {
+                "type": "integer",
+                "description": "whatweb processes to split a batch across (0 picks one per 100 targets, at most 4)",
+                "default": 0
+            },
+            "delta": {
+                "type": "boolean",
+                "description": "Only report technologies that are new, changed or gone per host since the previous scan (local asset inventory)",
+                "default": False
+            },
+            "skip_recent": {
+                "type": "integer",
+                "description": "Skip hosts already fingerprinted within this many seconds (0 = scan everything)",
+                "default": 0
             }
         },
         "examples": [
@@ -81,6 +198,10 @@ def register_tool():
             {
                 "input": {"target": "example.com", "kwargs": "--log-json=-"},
                 "description": "Perform WhatWeb scan with JSON output format"
+            },
+            {
+                "input": {"targets": ["a.example.com", "b.example.com"], "max_threads": 50},
+                "description": "Fingerprint a list of hosts in one batch"
             }
         ]
     }
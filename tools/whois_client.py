@@ -0,0 +1,247 @@
+"""
+In-process async WHOIS client (RFC 3912, TCP port 43).
+
+- TLD -> registry WHOIS server map seeded with common TLDs, learned from
+  IANA referrals on first use and cached on disk.
+- Registry answers that name a registrar WHOIS server are followed.
+- Each server gets its own concurrency limit and request spacing so large
+  batches don't get us rate-limited or banned.
+- Host/port are configurable so a local TCP fixture can stand in for the
+  whole referral chain.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+IANA_SERVER = os.environ.get("RECON_WHOIS_IANA", "whois.iana.org")
+
+SERVER_CACHE_PATH = os.path.join(
+    os.environ.get("RECON_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "recon-agent")),
+    "whois_servers.json",
+)
+
+# Well-known registries, so the common cases never need the IANA hop
+KNOWN_SERVERS = {
+    "com": "whois.verisign-grs.com",
+    "net": "whois.verisign-grs.com",
+    "org": "whois.publicinterestregistry.org",
+    "info": "whois.nic.info",
+    "io": "whois.nic.io",
+    "ai": "whois.nic.ai",
+    "co": "whois.nic.co",
+    "dev": "whois.nic.google",
+    "app": "whois.nic.google",
+    "uk": "whois.nic.uk",
+    "de": "whois.denic.de",
+    "fr": "whois.nic.fr",
+    "nl": "whois.domain-registry.nl",
+    "eu": "whois.eu",
+    "in": "whois.registry.in",
+    "au": "whois.auda.org.au",
+    "ca": "whois.cira.ca",
+    "us": "whois.nic.us",
+}
+
+# Minimum seconds between queries to the same server, and parallel queries per server
+DEFAULT_MIN_INTERVAL = float(os.environ.get("RECON_WHOIS_MIN_INTERVAL", "0.2"))
+DEFAULT_SERVER_CONCURRENCY = int(os.environ.get("RECON_WHOIS_SERVER_CONCURRENCY", "4"))
+SERVER_MIN_INTERVALS = {
+    "whois.iana.org": 0.5,
+    "whois.denic.de": 1.0,
+}
+
+MAX_RESPONSE_BYTES = 1 << 20
+MAX_REFERRALS = 2
+
+_REFERRAL_RE = re.compile(
+    r"^[ \t]*(?:Registrar WHOIS Server|Whois Server|ReferralServer|refer):[ \t]*(?:r?whois://)?([A-Za-z0-9.-]+)",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+class WhoisError(Exception):
+    """Raised when no WHOIS server could answer a query"""
+
+
+@dataclass
+class WhoisResult:
+    query: str
+    text: str
+    servers: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+def find_referral(text: str, current_server: str) -> Optional[str]:
+    for match in _REFERRAL_RE.finditer(text):
+        server = match.group(1).strip().rstrip(".").lower()
+        if server and server != current_server.lower():
+            return server
+    return None
+
+
+class _ServerGate:
+    """Concurrency cap plus minimum spacing between requests to one server"""
+
+    def __init__(self, concurrency: int, min_interval: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+class WhoisClient:
+    def __init__(self, port: int = 43, timeout: float = 15.0, iana_server: Optional[str] = None,
+                 server_cache_path: Optional[str] = SERVER_CACHE_PATH):
+        self.port = port
+        self.timeout = timeout
+        self.iana_server = iana_server or IANA_SERVER
+        self.server_cache_path = server_cache_path
+        self._tld_servers: Dict[str, str] = dict(KNOWN_SERVERS)
+        self._gates: Dict[str, _ServerGate] = {}
+        self._load_server_cache()
+
+    def _load_server_cache(self) -> None:
+        if not self.server_cache_path:
+            return
+        try:
+            with open(self.server_cache_path) as handle:
+                self._tld_servers.update(json.load(handle))
+        except (OSError, ValueError):
+            pass
+
+    def _save_server_cache(self) -> None:
+        if not self.server_cache_path:
+            return
+        learned = {tld: server for tld, server in self._tld_servers.items() if KNOWN_SERVERS.get(tld) != server}
+        try:
+            os.makedirs(os.path.dirname(self.server_cache_path), exist_ok=True)
+            with open(self.server_cache_path, "w") as handle:
+                json.dump(learned, handle)
+        except OSError:
+            pass
+
+    def _gate(self, server: str) -> _ServerGate:
+        if server not in self._gates:
+            self._gates[server] = _ServerGate(
+                DEFAULT_SERVER_CONCURRENCY, SERVER_MIN_INTERVALS.get(server, DEFAULT_MIN_INTERVAL)
+            )
+        return self._gates[server]
+
+    async def raw_query(self, server: str, query: str) -> str:
+        """Send one query to one server and read the answer to EOF"""
+        async with self._gate(server):
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(server, self.port), self.timeout
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                raise WhoisError(f"Could not connect to {server}:{self.port}: {e}")
+            try:
+                writer.write(query.encode("idna" if not query.isascii() else "ascii") + b"\r\n")
+                await writer.drain()
+                chunks = []
+                size = 0
+                while size < MAX_RESPONSE_BYTES:
+                    chunk = await asyncio.wait_for(reader.read(65536), self.timeout)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    size += len(chunk)
+            except asyncio.TimeoutError:
+                raise WhoisError(f"Timed out reading from {server}")
+            except OSError as e:
+                raise WhoisError(f"Connection to {server} failed: {e}")
+            finally:
+                writer.close()
+        return b"".join(chunks).decode("utf-8", errors="replace")
+
+    async def server_for(self, query: str) -> str:
+        """Registry WHOIS server for a domain's TLD, asking IANA when unknown"""
+        tld = query.rstrip(".").rsplit(".", 1)[-1].lower()
+        server = self._tld_servers.get(tld)
+        if server:
+            return server
+        answer = await self.raw_query(self.iana_server, tld)
+        server = find_referral(answer, self.iana_server)
+        if not server:
+            raise WhoisError(f"IANA has no WHOIS server for .{tld}")
+        self._tld_servers[tld] = server
+        self._save_server_cache()
+        return server
+
+    async def lookup(self, query: str, server: Optional[str] = None, follow_referrals: bool = True) -> WhoisResult:
+        """
+        Look up a domain (or IP), following registry -> registrar referrals.
+
+        Args:
+            query: Domain name or IP address
+            server: Start at this WHOIS server instead of the TLD's registry
+            follow_referrals: Also query the registrar server the registry points at
+        """
+        start = time.monotonic()
+        query = query.strip()
+        if server is None:
+            is_ip = re.fullmatch(r"[0-9.]+|[0-9a-fA-F:]+:[0-9a-fA-F:.]*", query) is not None
+            server = self.iana_server if is_ip else await self.server_for(query)
+
+        servers = [server]
+        text = await self.raw_query(server, query)
+        sections = [text]
+
+        for _ in range(MAX_REFERRALS if follow_referrals else 0):
+            referral = find_referral(text, servers[-1])
+            if not referral or referral in servers:
+                break
+            try:
+                text = await self.raw_query(referral, query)
+            except WhoisError:
+                # Registrar servers are flaky; the registry answer still stands
+                break
+            servers.append(referral)
+            sections.append(text)
+
+        # Most specific (registrar) answer first, registry data after it
+        combined = "\n".join(
+            f"# {srv}\n{section.strip()}" for srv, section in reversed(list(zip(servers, sections)))
+        )
+        return WhoisResult(query, combined, servers, time.monotonic() - start)
+
+    async def batch(self, queries: List[str], concurrency: int = 20) -> Dict[str, object]:
+        """Look up many domains concurrently; values are WhoisResult or the error string"""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def one(query):
+            async with semaphore:
+                try:
+                    return query, await self.lookup(query)
+                except WhoisError as e:
+                    return query, str(e)
+
+        return dict(await asyncio.gather(*(one(query) for query in queries)))
+
+
+_clients: Dict[int, WhoisClient] = {}
+
+
+def get_client(port: int = 43) -> WhoisClient:
+    """Shared client per port, so server maps and rate limits are process-wide"""
+    if port not in _clients:
+        _clients[port] = WhoisClient(port=port)
+    return _clients[port]
@@ -0,0 +1,198 @@
+"""
+Reduce raw WHOIS text to a compact record.
+
+Registry and registrar answers run to many kilobytes of legal notices;
+agents only need a handful of fields. Key names and date formats differ
+between registries, so both are normalized here.
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+FIELD_ALIASES = {
+    "domain": ["domain name", "domain", "domainname"],
+    "registrar": ["registrar", "sponsoring registrar", "registrar name", "registrar organization"],
+    "created": [
+        "creation date", "created on", "created", "registered on", "registration time",
+        "domain registration date", "registered", "created date", "registration date",
+    ],
+    "updated": [
+        "updated date", "last updated on", "last-modified", "last updated", "changed",
+        "modified", "last modified", "updated",
+    ],
+    "expires": [
+        "registry expiry date", "registrar registration expiration date", "expiration date",
+        "expiry date", "paid-till", "expires on", "expires", "expire", "expiration time",
+        "renewal date",
+    ],
+    "registrant_org": [
+        "registrant organization", "registrant organisation", "registrant org", "org", "registrant",
+    ],
+}
+NAME_SERVER_KEYS = {"name server", "nserver", "name servers", "nameservers", "nameserver", "dns"}
+STATUS_KEYS = {"domain status", "status", "state", "epp status"}
+
+_KEY_TO_FIELD = {alias: name for name, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+NOT_FOUND_PATTERNS = re.compile(
+    r"no match for|not found|no data found|no entries found|status:\s*free|domain not found|is available",
+    re.IGNORECASE,
+)
+
+_DATE_FORMATS = [
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%Y.%m.%d %H:%M:%S",
+    "%Y.%m.%d",
+    "%Y/%m/%d",
+    "%d-%b-%Y",
+    "%d-%B-%Y",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y",
+    "%d/%m/%Y",
+    "%a %b %d %Y",
+    "%a %b %d %H:%M:%S %Z %Y",
+    "%B %d %Y",
+    "%Y%m%d",
+]
+
+
+def normalize_date(value: str) -> str:
+    """Best-effort conversion of registry date strings to ISO YYYY-MM-DD"""
+    text = value.strip()
+    text = re.sub(r"\s*\((?:UTC|GMT)?[^)]*\)$", "", text)
+    text = re.sub(r"\s+(?:UTC|GMT)$", "", text, flags=re.IGNORECASE)
+    candidate = text.replace("Z", "+0000") if text.endswith("Z") else text
+    candidate = re.sub(r"([+-]\d{2}):(\d{2})$", r"\1\2", candidate)
+    for fmt in _DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(candidate, fmt)
+        except ValueError:
+            continue
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc)
+        return parsed.strftime("%Y-%m-%d")
+    return text
+
+
+def _split_status(value: str) -> List[str]:
+    """EPP codes carry an explanatory URL; some registries list several per line"""
+    if "://" in value:
+        return [value.split()[0]]
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def _store(record: Dict[str, object], field: str, value: str) -> None:
+    if field in record:
+        return
+    if field in ("created", "updated", "expires"):
+        value = normalize_date(value)
+    elif field == "domain":
+        value = value.lower()
+    record[field] = value
+
+
+def parse_whois(text: str) -> Dict[str, object]:
+    """
+    Extract registrar, dates, name servers, statuses and registrant org.
+
+    When the text holds several answers (registrar first, then registry),
+    the first value seen for a single-valued field wins and list fields
+    are merged.
+    """
+    record: Dict[str, object] = {}
+    name_servers: List[str] = []
+    statuses: List[str] = []
+    pending_list: Optional[List[str]] = None
+    pending_field: Optional[str] = None
+
+    for raw_line in text.splitlines():
+        line = raw_line.rstrip()
+        stripped = line.strip()
+        if not stripped or stripped.startswith(("%", "#", ">>>", "NOTICE", "TERMS OF USE")):
+            pending_list = None
+            pending_field = None
+            continue
+
+        # Nominet-style blocks: a "Name servers:" header followed by indented values
+        if pending_list is not None and ":" not in stripped:
+            value = stripped.split()[0].lower().rstrip(".")
+            if value not in pending_list:
+                pending_list.append(value)
+            continue
+        if pending_field is not None and ":" not in stripped:
+            _store(record, pending_field, stripped)
+            pending_field = None
+            continue
+        pending_list = None
+        pending_field = None
+
+        if ":" not in stripped:
+            continue
+        key, _, value = stripped.partition(":")
+        key = key.strip().lower()
+        value = value.strip()
+
+        if key in NAME_SERVER_KEYS:
+            if value:
+                server = value.split()[0].lower().rstrip(".")
+                if server not in name_servers:
+                    name_servers.append(server)
+            else:
+                pending_list = name_servers
+            continue
+        if key in STATUS_KEYS:
+            if value:
+                for status in _split_status(value):
+                    if status not in statuses:
+                        statuses.append(status)
+            else:
+                pending_list = statuses
+            continue
+
+        field = _KEY_TO_FIELD.get(key)
+        if field:
+            if value:
+                _store(record, field, value)
+            else:
+                pending_field = field
+
+    if name_servers:
+        record["name_servers"] = name_servers
+    if statuses:
+        record["status"] = statuses
+    if not record and NOT_FOUND_PATTERNS.search(text):
+        record["status"] = ["not registered"]
+    return record
+
+
+FIELD_ORDER = ["domain", "registrar", "registrant_org", "created", "updated", "expires", "name_servers", "status"]
+
+
+def format_record(record: Dict[str, object]) -> str:
+    lines = []
+    for name in FIELD_ORDER:
+        value = record.get(name)
+        if not value:
+            continue
+        if isinstance(value, list):
+            value = ", ".join(value)
+        lines.append(f"{name}: {value}")
+    return "\n".join(lines)
+
+
+def compact(text: str, fallback_lines: int = 15) -> str:
+    """Compact record text, or the first meaningful lines if nothing parsed"""
+    record = parse_whois(text)
+    if record:
+        return format_record(record)
+    meaningful = [
+        line.strip() for line in text.splitlines()
+        if line.strip() and not line.strip().startswith(("%", "#"))
+    ]
+    return "\n".join(meaningful[:fallback_lines])
@@ -1,68 +1,176 @@
 import asyncio
 import shlex
+from typing import Any, Dict, Optional
+
+from tools import batch, executor, whois_client, whois_parser
+
+
+def parse_native_args(args_list) -> Optional[Dict[str, Any]]:
+    """
+    Map whois(1) flags onto the native client: -h HOST, -p PORT and -H.
+    Returns None for anything else so the caller falls back to the binary.
+    """
+    options = {"server": None, "port": 43}
+    tokens = list(args_list)
+    while tokens:
+        token = tokens.pop(0)
+        if token == "-h" and tokens:
+            options["server"] = tokens.pop(0)
+        elif token == "-p" and tokens and tokens[0].isdigit():
+            options["port"] = int(tokens.pop(0))
+        elif token == "-H":
+            continue
+        else:
+            return None
+    return options
+
 
 def register_tool():
     """Register the WHOIS tool with a normalized schema"""
     
-    async def whois_lookup(target: str, kwargs: str = "") -> str:
+    async def whois_lookup(
+        target: str = "",
+        kwargs: str = "",
+        timeout: int = 60,
+        targets: list = None,
+        concurrency: int = 20,
+        raw: bool = False,
+    ) -> str:
         """
         Perform WHOIS lookup on a domain.
 
+        By default the answer is reduced to a compact record (registrar,
+        normalized dates, name servers, status codes, registrant org).
+
+        Lookups go through the built-in port-43 client, which caches the
+        TLD -> registry server map, follows registrar referrals and rate
+        limits each server. Unsupported whois flags run the whois binary.
+
         Args:
             target: Domain name to look up (e.g., example.com)
             kwargs: Extra WHOIS flags (optional, e.g., '-h whois.verisign-grs.com')
+            timeout: Wall-clock limit in seconds (0 for no limit)
+            targets: Several domains to look up concurrently in one call
+            concurrency: Maximum lookups in flight for a batch
+            raw: Return the full WHOIS text instead of the compact parsed record
 
         Examples:
             - whois_lookup("example.com")
             - whois_lookup("example.com", "-h whois.verisign-grs.com")
+            - whois_lookup(targets=["example.com", "example.org"])
+            - whois_lookup("example.com", raw=True)
         """
         
-        if not target:
+        domains = batch.merge_targets(target, targets)
+        if not domains:
             return "Error: target parameter is required"
         
+        try:
+            args_list = shlex.split(kwargs) if kwargs else []
+        except ValueError as e:
+            return f"Error parsing WHOIS flags: {str(e)}"
+        
+        options = parse_native_args(args_list)
+        if len(domains) > 1:
+            if options is None:
+                # Flags only the whois binary understands: one process per domain
+                return await batch.run_batch(
+                    f"WHOIS batch lookup with args [{kwargs or 'default'}]", domains,
+                    lambda domain: whois_lookup(domain, kwargs, timeout, raw=raw), concurrency,
+                )
+            return await native_batch(domains, kwargs, options, timeout, concurrency, raw)
+        if options is not None:
+            return await native_lookup(domains[0], kwargs, options, timeout, raw)
+        
         # Build command
         cmd = ["whois"]
-        
-        # Add kwargs if provided
-        if kwargs:
-            try:
-                args_list = shlex.split(kwargs)
-                cmd.extend(args_list)
-            except ValueError as e:
-                return f"Error parsing WHOIS flags: {str(e)}"
+        cmd.extend(args_list)
         
         # Add target at the end
-        cmd.append(target)
+        cmd.append(domains[0])
         
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            process_result = await executor.run_command(cmd, timeout=timeout or None)
+            result = process_result.output()
+            if not raw and process_result.stdout:
+                result = whois_parser.compact(result)
             
-            stdout, stderr = await process.communicate()
-            result = stdout.decode() if stdout else stderr.decode()
-            
-            return f"WHOIS lookup for {target} with args [{kwargs or 'default'}]:\n\n{result}"
+            return f"WHOIS lookup for {domains[0]} with args [{kwargs or 'default'}]:\n\n{result}\n\n[{process_result.summary()}]"
             
         except Exception as e:
             return f"Error executing WHOIS lookup: {str(e)}"
     
+    async def native_query(domain, options, timeout):
+        client = whois_client.get_client(options["port"])
+        return await asyncio.wait_for(
+            client.lookup(domain, server=options["server"]), timeout=timeout or None
+        )
+    
+    async def native_lookup(domain, kwargs, options, timeout, raw):
+        """Single lookup through the built-in client"""
+        try:
+            result = await native_query(domain, options, timeout)
+        except asyncio.TimeoutError:
+            return f"Error: WHOIS lookup for {domain} timed out after {timeout}s"
+        except whois_client.WhoisError as e:
+            return f"Error executing WHOIS lookup: {str(e)}"
+        text = result.text if raw else whois_parser.compact(result.text)
+        return (f"WHOIS lookup for {domain} with args [{kwargs or 'default'}]:\n\n{text}\n\n"
+                f"[native client: {' -> '.join(result.servers)} in {int(result.elapsed * 1000)} ms]")
+    
+    async def native_batch(domains, kwargs, options, timeout, concurrency, raw):
+        """Concurrent lookups; per-server rate limits live in the shared client"""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def one(domain):
+            async with semaphore:
+                try:
+                    result = await native_query(domain, options, timeout)
+                    text = result.text if raw else whois_parser.compact(result.text)
+                    return (f"=== {domain} ({' -> '.join(result.servers)}, "
+                            f"{int(result.elapsed * 1000)} ms) ===\n{text}")
+                except asyncio.TimeoutError:
+                    return f"=== {domain} ===\nError: timed out after {timeout}s"
+                except whois_client.WhoisError as e:
+                    return f"=== {domain} ===\nError: {str(e)}"
+        
+        sections = await asyncio.gather(*(one(domain) for domain in dict.fromkeys(domains)))
+        return f"WHOIS batch lookup for {len(sections)} domains with args [{kwargs or 'default'}]:\n\n" + "\n\n".join(sections)
+    
     # MCP schema (normalized)
     whois_lookup._mcp_schema = {
         "name": "whois_lookup",
-        "description": "Perform WHOIS lookup to get domain registration info (registrar, contacts, expiration, etc.).",
+        "description": "Perform WHOIS lookup to get domain registration info as a compact record (registrar, dates, name servers, status, registrant org); set raw for the full text.",
         "parameters": {
             "target": {
                 "type": "string", 
-                "description": "Domain name to look up (e.g., example.com)",
-                "required": True
+                "description": "Domain name to look up (e.g., example.com); optional when targets is given",
+                "default": ""
             },
             "kwargs": {
                 "type": "string", 
                 "description": "Extra WHOIS flags (e.g., '-h whois.verisign-grs.com')",
                 "default": ""
+            },
+            "timeout": {
+                "type": "integer",
+                "description": "Wall-clock limit in seconds; the process group is killed when it expires (0 for no limit)",
+                "default": 60
+            },
+            "targets": {
+                "type": "array",
+                "description": "Batch of domains to look up concurrently in one call",
+                "default": []
+            },
+            "concurrency": {
+                "type": "integer",
+                "description": "Maximum lookups in flight for a batch (per-server rate limits still apply)",
+                "default": 20
+            },
+            "raw": {
+                "type": "boolean",
+                "description": "Return the full WHOIS text instead of the compact parsed record",
+                "default": False
             }
         },
         "examples": [
@@ -73,6 +181,10 @@ def register_tool():
             {
                 "input": {"target": "example.com", "kwargs": "-h whois.verisign-grs.com"},
                 "description": "Perform WHOIS lookup using a specific WHOIS server"
+            },
+            {
+                "input": {"targets": ["example.com", "example.org", "example.net"]},
+                "description": "Look up several domains concurrently"
             }
         ]
     }